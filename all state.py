@@ -1,3 +1,6 @@
+from deck import starting_hands
+
+
 def simulate_game(player1, player2, current_player, history, results, depth, max_depth, initial_state, step_wins):
     """
     Simulate the game recursively, tracking the outcomes at each step and storing the full sequence of actions.
@@ -73,44 +76,22 @@ def simulate_game(player1, player2, current_player, history, results, depth, max
                 step_wins[current_state]["P2_wins"] += 1
 
 
-def find_all_game_outcomes(max_depth=100):
+def find_all_game_outcomes(max_depth=100, hand_size=5, deck=None):
     results = []
     step_wins = {}  # Dictionary to track wins at each step
-    for k1 in range(6):
-        for k2 in range(6):
-            # Initial state of the game
-            player1 = (k1, 5 - k1)  # True and fake cards
-            player2 = (k2, 5 - k2)
-            initial_state = (player1, player2)  # Keep initial states for reference
-
-            simulate_game(player1, player2, 1, [], results, 0, max_depth, initial_state, step_wins)
+    # Every (true, fake) split of hand_size cards for both players; a deck (deck.py) keeps only
+    # the starting pairs it can deal
+    for player1, player2 in starting_hands(hand_size, deck):
+        initial_state = (player1, player2)  # Keep initial states for reference
+
+        simulate_game(player1, player2, 1, [], results, 0, max_depth, initial_state, step_wins)
     
     return results, step_wins
 
 
-# Find outcomes and calculate step statistics
-outcomes, step_wins = find_all_game_outcomes(max_depth=50)
-
-# Output the entire process and statistics
-for outcome in outcomes:
-    initial_state = outcome["initial_state"]
-    history = outcome["history"]
-    winner = outcome["winner"]
-
-    # Print the full game sequence
-    print(f"Initial State: P1 {initial_state[0]}, P2 {initial_state[1]}")
-    print("Game Sequence:")
-    for action in history:
-        print(f"  Player {action['player']} {action['type']} {action.get('count', '')}")
-    print(f"Winner: P{winner}")
-    print()
-# Calculate the total number of different outcomes
-total_outcomes = len(outcomes)
-print(f"Total number of different outcomes: {total_outcomes}")
-
-import pandas as pd
-
 def save_outcomes_to_csv_with_pandas(outcomes, filename="game_outcomes.csv"):
+    import pandas as pd  # only needed for writing the CSV
+
     # Create a list of dictionaries to hold each outcome row
     data = []
     
@@ -143,10 +124,29 @@ def save_outcomes_to_csv_with_pandas(outcomes, filename="game_outcomes.csv"):
     # Save the DataFrame to a CSV file
     df.to_csv(filename, index=False)
 
-# Example of finding outcomes and saving to CSV using pandas
-outcomes, step_wins = find_all_game_outcomes(max_depth=50)
-save_outcomes_to_csv_with_pandas(outcomes, "game_outcomes.csv")
 
-# You can now check the "game_outcomes.csv" file for the saved data.
+if __name__ == "__main__":
+    # Find outcomes and calculate step statistics
+    outcomes, step_wins = find_all_game_outcomes(max_depth=50)
 
+    # Output the entire process and statistics
+    for outcome in outcomes:
+        initial_state = outcome["initial_state"]
+        history = outcome["history"]
+        winner = outcome["winner"]
 
+        # Print the full game sequence
+        print(f"Initial State: P1 {initial_state[0]}, P2 {initial_state[1]}")
+        print("Game Sequence:")
+        for action in history:
+            print(f"  Player {action['player']} {action['type']} {action.get('count', '')}")
+        print(f"Winner: P{winner}")
+        print()
+    # Calculate the total number of different outcomes
+    total_outcomes = len(outcomes)
+    print(f"Total number of different outcomes: {total_outcomes}")
+
+    # Save the same outcomes to CSV (no need to enumerate them a second time)
+    save_outcomes_to_csv_with_pandas(outcomes, "game_outcomes.csv")
+
+    # You can now check the "game_outcomes.csv" file for the saved data.
@@ -0,0 +1,484 @@
+"""
+Verbatim copies of the baseline implementations, pinned as references for differential.py.
+
+The engines in this repository have been optimized in place (game.build_game_tree now streams
+the CSV and builds nodes from state_codec, count.parse_outcomes streams and uses a trie, ...), so
+comparing against the current functions would compare a function with itself. The bodies
+below are copied unchanged from the first commit of the repository:
+
+    simulate_game                       "all state.py"
+    parse_outcomes                      count.py
+    get_possible_moves, format_path,
+    build_game_tree, backward_induction_spe,
+    trace_equilibrium_path              game.py (with its global node-ID counter)
+
+Only the module-level example runs of those scripts are left out. Do not edit these functions
+to follow later changes of the rules; change the engines and let differential.py catch the
+difference instead.
+"""
+import pandas as pd
+from collections import defaultdict
+
+
+###############################################################################
+# "all state.py"
+###############################################################################
+def simulate_game(player1, player2, current_player, history, results, depth, max_depth, initial_state, step_wins):
+    """
+    Simulate the game recursively, tracking the outcomes at each step and storing the full sequence of actions.
+    """
+    if depth > max_depth:
+        return
+
+    if player1[0] + player1[1] == 0 or player2[0] + player2[1] == 0:
+        # If the game ends, record the outcome and track the history of actions
+        challenge_success = history[-1]["type"] == "play_fake"
+        #history.append({"player": current_player, "type": "challenge", "success": challenge_success})
+        new_history = history + [{"player": current_player, "type": "challenge", "success": challenge_success}]
+        outcome = {
+            "initial_state": initial_state,
+            "history": new_history,
+            "winner": current_player if challenge_success else 3 - current_player
+        }
+        results.append(outcome)
+
+        # Update step_wins with win statistics at each step
+        for i, action in enumerate(history):
+            current_state = f"{action['player']}p{action.get('count', '')}"  # e.g., '1p3'
+            if current_state not in step_wins:
+                step_wins[current_state] = {"P1_wins": 0, "P2_wins": 0}
+            if outcome["winner"] == 1:
+                step_wins[current_state]["P1_wins"] += 1
+            elif outcome["winner"] == 2:
+                step_wins[current_state]["P2_wins"] += 1
+        return
+
+    if current_player == 1:
+        true_cards, fake_cards = player1
+        opponent_cards = player2
+    else:
+        true_cards, fake_cards = player2
+        opponent_cards = player1
+
+
+    # Actions: play true or fake cards
+    for m in range(1, true_cards + 1):
+        new_history = history + [{"player": current_player, "type": "play_true", "count": m}]
+        if current_player == 1:
+            simulate_game((true_cards - m, fake_cards), player2, 2, new_history, results, depth + 1, max_depth, initial_state, step_wins)
+        else:
+            simulate_game(player1, (true_cards - m, fake_cards), 1, new_history, results, depth + 1, max_depth, initial_state, step_wins)
+
+    for n in range(1, fake_cards + 1):
+        new_history = history + [{"player": current_player, "type": "play_fake", "count": n}]
+        if current_player == 1:
+            simulate_game((true_cards, fake_cards - n), player2, 2, new_history, results, depth + 1, max_depth, initial_state, step_wins)
+        else:
+            simulate_game(player1, (true_cards, fake_cards - n), 1, new_history, results, depth + 1, max_depth, initial_state, step_wins)
+
+    # Include a challenge action (except for Player 1's first move)
+    if depth > 0:
+        challenge_success = history[-1]["type"] == "play_fake" if history else False
+        new_history = history + [{"player": current_player, "type": "challenge", "success": challenge_success}]
+        outcome = {
+            "initial_state": initial_state,
+            "history": new_history,
+            "winner": current_player if challenge_success else 3 - current_player
+        }
+        results.append(outcome)
+
+        # Update step_wins with win statistics at each step
+        for i, action in enumerate(new_history):
+            current_state = f"{action['player']}p{action.get('count', '')}"  # e.g., '1p3'
+            if current_state not in step_wins:
+                step_wins[current_state] = {"P1_wins": 0, "P2_wins": 0}
+            if outcome["winner"] == 1:
+                step_wins[current_state]["P1_wins"] += 1
+            elif outcome["winner"] == 2:
+                step_wins[current_state]["P2_wins"] += 1
+
+
+###############################################################################
+# count.py
+###############################################################################
+def parse_outcomes(input_file, output_file):
+    # Load the initial data from CSV using pandas
+    data = pd.read_csv(input_file)
+
+    # Dictionary to store results for each starting hand combination
+    grouped_results = defaultdict(lambda: defaultdict(lambda: {'P1_win': 0, 'P2_win': 0}))
+
+    # Normalize paths to remove trailing challenge actions
+    def normalize_path(outcome_path):
+        if outcome_path[-1] in ['Player 2 challenge ', 'Player 1 challenge ']:
+            return outcome_path[:-1]
+        return outcome_path
+
+    # Recursive function to record win counts for all prefixes of a path
+    def record_path_counts(key, outcome_path, winner, current_path=""):
+        if not outcome_path:
+            return
+
+        # Extend the current path
+        next_action = outcome_path[0]
+        new_path = f"{current_path} -> {next_action}".strip(" -> ")
+
+        # Update win counts for the current path
+        if winner == 'P1':
+            grouped_results[key][new_path]['P1_win'] += 1
+        elif winner == 'P2':
+            grouped_results[key][new_path]['P2_win'] += 1
+
+        # Recur for the remaining path
+        record_path_counts(key, outcome_path[1:], winner, new_path)
+
+    # Analyze each row in the input file
+    for _, row in data.iterrows():
+        initial_p1, initial_p2, outcome_path, winner = row['P1 Hand'], row['P2 Hand'], row['Action Sequence'], row['Winner']
+        outcome_path = outcome_path.split(' -> ')
+
+        # Normalize the path to remove trailing challenge actions
+        normalized_path = normalize_path(outcome_path)
+
+        # Normalize the key for grouped results
+        key = (initial_p1, initial_p2)
+
+        # Record counts for the full path and all its prefixes
+        record_path_counts(key, normalized_path, winner)
+
+    # Prepare results for writing
+    rows = []
+    for (p1_hand, p2_hand), paths in grouped_results.items():
+        for path, counts in paths.items():
+            rows.append({
+                'P1_start': p1_hand,
+                'P2_start': p2_hand,
+                'Path': path,
+                'P1_win': counts['P1_win'],
+                'P2_win': counts['P2_win']
+            })
+
+    # Convert results to a DataFrame and write to a new CSV file
+    results_df = pd.DataFrame(rows)
+    results_df.to_csv(output_file, index=False)
+
+
+###############################################################################
+# game.py
+###############################################################################
+n = 2
+m = 3
+k = 5
+p = 0
+###############################################################################
+# 全局自增节点ID，用于给每个节点分配唯一ID
+###############################################################################
+_global_node_id_counter = 0
+
+def get_next_node_id():
+    global _global_node_id_counter
+    _global_node_id_counter += 1
+    return _global_node_id_counter
+
+
+###############################################################################
+# 工具函数：动作生成、路径格式化
+###############################################################################
+def get_possible_moves(player, true_cards, fake_cards, first_move=False):
+    """
+    根据当前玩家手里剩余的真牌(true_cards)和假牌(fake_cards)，
+    生成所有可能动作: 
+      - play_true(k)，k=1..true_cards
+      - play_fake(k)，k=1..fake_cards
+      - 如果不是第一步，则可以"challenge"挑战
+    """
+    moves = []
+    if true_cards > 0:
+        for count in range(1, true_cards + 1):
+            moves.append({"player": player, "type": "play_true", "count": count})
+    if fake_cards > 0:
+        for count in range(1, fake_cards + 1):
+            moves.append({"player": player, "type": "play_fake", "count": count})
+    if not first_move:
+        moves.append({"player": player, "type": "challenge"})
+    return moves
+
+
+def format_path(history, current_action):
+    """
+    将 'history + 当前动作' 拼接成字符串，以在CSV中匹配对应概率。
+    history 和 current_action 都是 dict, 如: {"player":1, "type":"play_true", "count":2}
+    格式化成: "Player 1 play_true 2 -> Player 2 challenge -> ..."
+    """
+    all_actions = history + [current_action]
+    formatted_actions = []
+    for action in all_actions:
+        count_str = str(action["count"]) if "count" in action else ""
+        action_str = f"Player {action['player']} {action['type']} {count_str}".strip()
+        formatted_actions.append(action_str)
+    return " -> ".join(formatted_actions)
+
+
+###############################################################################
+# 第1部分：构建博弈树，并将收益累加存储在节点的 "payoff" 中
+###############################################################################
+def build_game_tree(
+    player1_start=(n, m), 
+    player2_start=(k, p), 
+    csv_file="game_results.csv", 
+    max_moves=15
+):
+    """
+    构建游戏树(序贯博弈树)并返回 (game_tree, node_lookup, root_id):
+      - game_tree[node_id] = [child_id1, child_id2, ...]
+        表示从 node_id 这个节点可以走向哪些子节点
+        
+      - node_lookup[node_id] = {
+           "node_id": int,
+           "current_player": 1 or 2,
+           "p1_hand": (true_cards1, fake_cards1),
+           "p2_hand": (true_cards2, fake_cards2),
+           "history": [ {action1}, {action2}, ... ],
+           "payoff": (p1_payoff, p2_payoff),   # 累积收益(根->该节点)
+           "steps": int
+        }
+        
+      - root_id : 根节点ID。
+    """
+    data = pd.read_csv(csv_file)
+
+    # 存储： node_id -> [child_id, child_id...]
+    game_tree = defaultdict(list)
+    # 存储： node_id -> node 信息
+    node_lookup = {}
+
+    # 构造根节点
+    root_node_id = get_next_node_id()
+    root_node = {
+        "node_id": root_node_id,
+        "current_player": 1,                   # 先手玩家
+        "p1_hand": player1_start,
+        "p2_hand": player2_start,
+        "history": [],                         # 动作历史
+        "payoff": (0.0, 0.0),                  # 根节点收益设为0(累积基准)
+        "steps": 0
+    }
+    node_lookup[root_node_id] = root_node
+
+    # 用栈进行DFS扩展
+    stack = [root_node_id]
+
+    while stack:
+        current_id = stack.pop()
+        node = node_lookup[current_id]
+
+        # 如果超出最大步数，就不再扩展
+        if node["steps"] >= max_moves:
+            continue
+
+        current_player = node["current_player"]
+        parent_payoff_p1, parent_payoff_p2 = node["payoff"]
+
+        if current_player == 1:
+            t_cards, f_cards = node["p1_hand"]
+        else:
+            t_cards, f_cards = node["p2_hand"]
+
+        # 如果该玩家手里没牌，则默认为只能挑战(或直接终局, 根据你游戏规则)
+        # 这里演示：自动发起challenge
+        if (t_cards + f_cards) == 0:
+            # 当前玩家无牌可打，只能 challenge（或你手动构造 challenge 分支）
+            move = {"player": current_player, "type": "challenge"}
+            path_str = format_path(node["history"], move)
+
+            # 读取 CSV(若有)或其它逻辑，算 probability
+            matched_row = data[data["Path"] == path_str]
+            if not matched_row.empty:
+                row4 = matched_row.iloc[0, 3]
+                row5 = matched_row.iloc[0, 4]
+                prob = row4 / (row4 + row5) if (row4 + row5) > 0 else 0.5
+            else:
+                prob = 0.5
+
+            # 根据上一手是否是 play_fake 判断挑战是否成功
+            last_a = node["history"][-1] if len(node["history"]) > 0 else None
+            challenge_succ = (last_a is not None and last_a["type"] == "play_fake")
+            winner = current_player if challenge_succ else (3 - current_player)
+
+            # 这里改成胜者 +3，输者 -3
+            if winner == 1:
+                payoff_step_p1, payoff_step_p2 = (3.0, -3.0)
+            else:
+                payoff_step_p1, payoff_step_p2 = (-3.0, 3.0)
+
+            # 累加到父节点的收益
+            parent_payoff_p1, parent_payoff_p2 = node["payoff"]
+            child_payoff_p1 = parent_payoff_p1 + payoff_step_p1
+            child_payoff_p2 = parent_payoff_p2 + payoff_step_p2
+
+            # 构造子节点(终局)
+            child_node = {
+                "node_id": get_next_node_id(),
+                "current_player": 3 - current_player,  # 挑战结束后通常不再行动
+                "p1_hand": node["p1_hand"],
+                "p2_hand": node["p2_hand"],
+                "history": node["history"] + [move],
+                "payoff": (child_payoff_p1, child_payoff_p2),  # 终局收益
+                "steps": node["steps"] + 1
+            }
+            node_lookup[child_node["node_id"]] = child_node
+            game_tree[node["node_id"]].append(child_node["node_id"])
+            # 挑战一般是终局，不再扩展后续
+            continue
+
+
+        # 否则，获取所有可行动作
+        first_move = (len(node["history"]) == 0)
+        moves = get_possible_moves(current_player, t_cards, f_cards, first_move)
+
+        for mv in moves:
+            path_str = format_path(node["history"], mv)
+            matched = data[data["Path"] == path_str]
+            if not matched.empty:
+                row4 = matched.iloc[0, 3]
+                row5 = matched.iloc[0, 4]
+                prob = row4 / (row4 + row5) if (row4 + row5) > 0 else 0.5
+            else:
+                prob = 0.5
+
+            # 这里示例：将 "prob" 作为本步的即时收益给 P1，(1-prob) 给 P2
+            # 实际游戏中可根据规则计算更复杂/多样的收益
+            payoff_step_p1 = prob
+            payoff_step_p2 = 1.0 - prob
+
+            # 累加到父节点收益
+            child_payoff_p1 = parent_payoff_p1 + payoff_step_p1
+            child_payoff_p2 = parent_payoff_p2 + payoff_step_p2
+
+            # 更新手牌
+            new_p1_hand = node["p1_hand"]
+            new_p2_hand = node["p2_hand"]
+            if current_player == 1:
+                if mv["type"] == "play_true":
+                    new_p1_hand = (node["p1_hand"][0] - mv["count"], node["p1_hand"][1])
+                elif mv["type"] == "play_fake":
+                    new_p1_hand = (node["p1_hand"][0], node["p1_hand"][1] - mv["count"])
+            else:  # current_player == 2
+                if mv["type"] == "play_true":
+                    new_p2_hand = (node["p2_hand"][0] - mv["count"], node["p2_hand"][1])
+                elif mv["type"] == "play_fake":
+                    new_p2_hand = (node["p2_hand"][0], node["p2_hand"][1] - mv["count"])
+
+            child_id = get_next_node_id()
+            child_node = {
+                "node_id": child_id,
+                "current_player": 3 - current_player,
+                "p1_hand": new_p1_hand,
+                "p2_hand": new_p2_hand,
+                "history": node["history"] + [mv],
+                # payoff 存储 累积收益(父节点 + 本步)
+                "payoff": (child_payoff_p1, child_payoff_p2),
+                "steps": node["steps"] + 1
+            }
+            node_lookup[child_id] = child_node
+            game_tree[current_id].append(child_id)
+
+            # 如果动作是 challenge，一般终局，也可视情况再判断是否压栈
+            if mv["type"] != "challenge":
+                stack.append(child_id)
+
+    return game_tree, node_lookup, root_node_id
+
+
+###############################################################################
+# 第2部分：逆推法 (Backward Induction) 求子博弈精炼纳什均衡
+###############################################################################
+def backward_induction_spe(game_tree, node_lookup):
+    """
+    逆推法：对已构建好的 game_tree 执行子博弈精炼纳什均衡 (SPE) 求解。
+    
+    返回两个字典：
+      best_payoff[node_id] = (p1_best, p2_best)
+          表示从 node_id 出发，若后续都按照最优策略，得到的收益
+          
+      best_child[node_id] = child_id or None
+          表示 node_id 在最优策略下会选择走向哪个子节点(没有子节点则为None)
+    """
+    all_node_ids = list(node_lookup.keys())
+    game_tree_keys = set(game_tree.keys())
+
+    # 1) 找到“终端节点”，即在 game_tree 中没有孩子的节点
+    #    这些节点的 payoff 就是它们本身的累积收益，不需要再往下推
+    terminal_nodes = [nid for nid in all_node_ids if len(game_tree[nid]) == 0]
+
+    best_payoff = {}
+    best_child = {}
+
+    # 先把终端节点的 payoff 定好
+    for tid in terminal_nodes:
+        node = node_lookup[tid]
+        best_payoff[tid] = node["payoff"]  # (p1, p2)
+        best_child[tid] = None            # 没有后续子节点
+
+    # 2) 递归函数：若 best_payoff[nid] 未计算，则对其孩子做递归后，再选最优
+    def compute_best_response(nid):
+        if nid in best_payoff:
+            return best_payoff[nid]
+
+        node = node_lookup[nid]
+        current_player = node["current_player"]
+        children = game_tree[nid]
+
+        # 如果没有孩子(意外情况)，视作终端
+        if not children:
+            best_payoff[nid] = node["payoff"]
+            best_child[nid] = None
+            return best_payoff[nid]
+
+        # 否则，对所有子节点算出 best_payoff，再挑选当前玩家最优
+        best_val = None
+        best_c = None
+        for c in children:
+            cp = compute_best_response(c)  # (p1, p2)
+            if best_val is None:
+                best_val = cp
+                best_c = c
+            else:
+                if current_player == 1:
+                    # 玩家1看 p1 收益来选
+                    if cp[0] > best_val[0]:
+                        best_val = cp
+                        best_c = c
+                else:
+                    # 玩家2看 p2 收益来选
+                    if cp[1] > best_val[1]:
+                        best_val = cp
+                        best_c = c
+        
+        best_payoff[nid] = best_val
+        best_child[nid] = best_c
+        return best_val
+
+    # 3) 对所有节点做一次 compute_best_response (或只对根节点做，也会下探到全部)
+    for nid in all_node_ids:
+        compute_best_response(nid)
+
+    return best_payoff, best_child
+
+
+###############################################################################
+# 第3部分：打印SPE均衡路径
+###############################################################################
+def trace_equilibrium_path(root_id, best_child):
+    """
+    从 root_id 出发，沿着 best_child 的选择，一直走到终端，得到节点ID序列
+    """
+    path = []
+    cur = root_id
+    while True:
+        path.append(cur)
+        nxt = best_child[cur]
+        if nxt is None:
+            break
+        cur = nxt
+    return path
@@ -1,58 +1,28 @@
-import pandas as pd
-from collections import defaultdict
 import random
-
-_global_node_id_counter = 0
-
-def get_next_node_id():
-    global _global_node_id_counter
-    _global_node_id_counter += 1
-    return _global_node_id_counter
-
-
-def get_possible_moves(player, t_cards, f_cards, first_move=False):
-    """
-    示例：若有 t_cards 张真牌, f_cards 张假牌, 
-    可 play_true(k)、play_fake(k) (k ≤各自数量),
-    若不是第一步可以 challenge
-    """
-    moves = []
-    if t_cards > 0:
-        for c in range(1, t_cards + 1):
-            moves.append({"player": player, "type": "play_true", "count": c})
-    if f_cards > 0:
-        for c in range(1, f_cards + 1):
-            moves.append({"player": player, "type": "play_fake", "count": c})
-    if not first_move:
-        moves.append({"player": player, "type": "challenge"})
-    return moves
-
-
-def format_path(history, move):
-    """
-    跟之前类似，用来拼接 CSV path；你也可改成只输出数字或别的形式
-    """
-    all_moves = history + [move]
-    strings = []
-    for m in all_moves:
-        c = m.get("count","")
-        s = f"Player {m['player']} {m['type']} {c}".strip()
-        strings.append(s)
-    return " -> ".join(strings)
+import state_codec as codec
+from game import TreeBuilder, load_path_probabilities, path_trie, state_options
 
 
 def build_game_tree(player1_hand, player2_hand, csv_file="game_results.csv", max_steps=10):
     """
     跟之前的示例类似，构建扩展式博弈树(完全信息)，并返回 (game_tree, node_lookup, root_id)。
     """
-    data = pd.read_csv(csv_file)  # 若你没有CSV，注释掉即可
-
-    game_tree = defaultdict(list)
-    node_lookup = {}
-
-    root_id = get_next_node_id()
+    # 流式读入 CSV，建成以整数为键的路径字典树(规则同 data[data["Path"] == path].iloc[0])
+    trie, trie_probs = path_trie(load_path_probabilities(csv_file, start=(player1_hand, player2_hand)))
+
+    # 每棵树自己的节点ID空间(从 0 开始)，不同类型的树可以并行构建
+    builder = TreeBuilder()
+    game_tree = builder.game_tree
+    node_lookup = builder.node_lookup
+    # path_ids[nid]: 路径在字典树中的编号，-1 表示 CSV 中没有
+    path_ids = []
+    # 整数状态 -> 合法动作和子状态
+    options = {}
+
+    root_id = builder.new_id()
     root_node = {
         "node_id": root_id,
+        "state": codec.encode_state(1, player1_hand, player2_hand),
         "current_player": 1,
         "p1_hand": player1_hand,
         "p2_hand": player2_hand,
@@ -61,6 +31,7 @@ def build_game_tree(player1_hand, player2_hand, csv_file="game_results.csv", max
         "steps": 0
     }
     node_lookup[root_id] = root_node
+    path_ids.append(0)
 
     stack = [root_id]
 
@@ -70,91 +41,41 @@ def build_game_tree(player1_hand, player2_hand, csv_file="game_results.csv", max
         if node["steps"] >= max_steps:
             continue
 
+        state = node["state"]
+        if state not in options:
+            options[state] = state_options(state)
         cplayer = node["current_player"]
         p1_payoff_parent, p2_payoff_parent = node["payoff"]
+        path_id = path_ids[nid]
 
-        if cplayer == 1:
-            t_cards, f_cards = node["p1_hand"]
-        else:
-            t_cards, f_cards = node["p2_hand"]
-
-        # 如果没有可打的牌，就强制challenge当终局
-        if (t_cards + f_cards) == 0:
-            move = {"player": cplayer, "type": "challenge"}
-            last_a = node["history"][-1] if node["history"] else None
-            # 简化: 若对方上一步是 play_fake，则挑战成功
-            success = (last_a and last_a["type"] == "play_fake")
-            winner = cplayer if success else (3 - cplayer)
-
-            # 示例: 胜者 +3, 负者 -3
-            if winner == 1:
-                sp1, sp2 = (3.0, -3.0)
-            else:
-                sp1, sp2 = (-3.0, 3.0)
-
-            ch_id = get_next_node_id()
-            child_node = {
-                "node_id": ch_id,
-                "current_player": 3 - cplayer,
-                "p1_hand": node["p1_hand"],
-                "p2_hand": node["p2_hand"],
-                "history": node["history"] + [move],
-                "payoff": (p1_payoff_parent + sp1, p2_payoff_parent + sp2),
-                "steps": node["steps"] + 1
-            }
-            node_lookup[ch_id] = child_node
-            game_tree[nid].append(ch_id)
-            continue
-
-        # 否则，生成所有可行动作
-        first_move = (len(node["history"]) == 0)
-        moves = get_possible_moves(cplayer, t_cards, f_cards, first_move)
-
-        for mv in moves:
-            path_str = format_path(node["history"], mv)
-            matched = data[data["Path"] == path_str]
-            if not matched.empty:
-                v4 = matched.iloc[0,3]
-                v5 = matched.iloc[0,4]
-                prob = v4/(v4+v5) if (v4+v5)>0 else 0.5
-            else:
-                prob = 0.5  # 默认
-
-            # 示例：本步即时收益 = (prob, 1 - prob)
-            step_p1 = prob
-            step_p2 = 1 - prob
-
-            new_p1_hand = node["p1_hand"]
-            new_p2_hand = node["p2_hand"]
-            if cplayer == 1:
-                if mv["type"] == "play_true":
-                    new_p1_hand = (t_cards - mv["count"], f_cards)
-                elif mv["type"] == "play_fake":
-                    new_p1_hand = (t_cards, f_cards - mv["count"])
+        for move, child_state, mv, forced in options[state]:
+            child_path_id = trie.get((path_id, cplayer, move), -1) if path_id >= 0 else -1
+            if forced:
+                # 没有可打的牌，强制 challenge 当终局; 示例: 胜者 +3, 负者 -3
+                sp1, sp2 = (3.0, -3.0) if codec.challenge_winner(child_state) == 1 else (-3.0, 3.0)
             else:
-                if mv["type"] == "play_true":
-                    new_p2_hand = (t_cards - mv["count"], f_cards)
-                elif mv["type"] == "play_fake":
-                    new_p2_hand = (t_cards, f_cards - mv["count"])
-
-            child_payoff = (p1_payoff_parent + step_p1,
-                            p2_payoff_parent + step_p2)
+                # 示例：本步即时收益 = (prob, 1 - prob)，默认 0.5
+                prob = trie_probs[child_path_id] if child_path_id >= 0 else None
+                sp1 = 0.5 if prob is None else prob
+                sp2 = 1 - sp1
 
-            cid = get_next_node_id()
+            cid = builder.new_id()
             child_node = {
                 "node_id": cid,
+                "state": child_state,
                 "current_player": 3 - cplayer,
-                "p1_hand": new_p1_hand,
-                "p2_hand": new_p2_hand,
+                "p1_hand": codec.hand(child_state, 1),
+                "p2_hand": codec.hand(child_state, 2),
                 "history": node["history"] + [mv],
-                "payoff": child_payoff,
+                "payoff": (p1_payoff_parent + sp1, p2_payoff_parent + sp2),
                 "steps": node["steps"] + 1
             }
             node_lookup[cid] = child_node
+            path_ids.append(child_path_id)
             game_tree[nid].append(cid)
 
-            # 若动作是 challenge，可视情况不再扩展
-            if mv["type"] != "challenge":
+            # challenge 之后是终局，不再扩展
+            if not codec.is_terminal(child_state):
                 stack.append(cid)
 
     return game_tree, node_lookup, root_id
@@ -227,6 +148,18 @@ def build_and_solve_game(player1_hand, player2_hand, csv_file="game_results.csv"
     return gt, nl, rid, bp, bc
 
 
+def build_and_solve_types(player1_hand, opponent_hands, csv_file="game_results.csv", executor=None):
+    """
+    对每一种对手类型(玩家2的手牌)各做一次 build_and_solve_game，按 opponent_hands 的顺序返回结果列表。
+    每棵树有自己的节点ID空间，互不依赖；传入 executor(ThreadPoolExecutor / ProcessPoolExecutor)
+    时各类型的树并行构建，结果与串行构建完全相同。
+    """
+    jobs = [(player1_hand, opp_hand, csv_file) for opp_hand in opponent_hands]
+    if executor is None:
+        return [build_and_solve_game(*job) for job in jobs]
+    return list(executor.map(build_and_solve_game, *zip(*jobs)))
+
+
 def my_bayesian_best_move(
     my_nodeA,       # 在 TypeA 树中的节点id
     my_nodeB,       # 在 TypeB 树中的节点id
@@ -305,16 +238,40 @@ def my_bayesian_best_move(
     return best_move, best_value
 
 
+def bayesian_best_move_over_types(type_move_values, priors):
+    """
+    my_bayesian_best_move 的多类型版本(也不要求我方是玩家1):
+      type_move_values[i] = {move_key: 我方在 Type i 下执行该 move 后的最终收益}
+      priors[i]           = Type i 的概率
+    与 my_bayesian_best_move 一样，只考虑在所有类型下都存在的 move，
+    选 argmax_{m} sum_i priors[i] * type_move_values[i][m]，平局时取第一个。
+    返回: (best_move_key, best_expected_payoff)
+    """
+    best_move = None
+    best_value = None
+    if not type_move_values:
+        return best_move, best_value
+    for move in type_move_values[0]:
+        if any(move not in values for values in type_move_values[1:]):
+            continue
+        ev = sum(prior * values[move] for prior, values in zip(priors, type_move_values))
+        if best_value is None or ev > best_value:
+            best_value = ev
+            best_move = move
+    return best_move, best_value
+
 if __name__ == "__main__":
     # 对手可能是 (2,3) 还是 (3,2), 各 50%
     opponent_types = [ ((2,3), 0.5), ((3,2), 0.5) ]
     my_hand = (3,2)
 
-    # 分别构建 TypeA, TypeB 两个完全信息树
-    results = []
-    for opp_hand, prob in opponent_types:
-        g, nl, rid, bp, bc = build_and_solve_game(my_hand, opp_hand, "game_results.csv")
-        results.append((opp_hand, prob, g, nl, rid, bp, bc))
+    # 分别构建 TypeA, TypeB 两个完全信息树(两棵树各自编号，可以放在两个进程里同时构建)
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(len(opponent_types)) as executor:
+        solved = build_and_solve_types(my_hand, [opp_hand for opp_hand, _ in opponent_types],
+                                       "game_results.csv", executor)
+    results = [(opp_hand, prob, *solution) for (opp_hand, prob), solution in zip(opponent_types, solved)]
 
     # 现在看 "根节点" 处, 我方(玩家1)有哪些动作
     # 对 TypeA 树的根节点 => rootA,  TypeB 树的根节点 => rootB
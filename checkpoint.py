@@ -0,0 +1,302 @@
+"""
+Checkpointed, resumable versions of the long-running enumeration and solving jobs.
+
+- run_enumeration: the "all state.py" enumeration (find_all_game_outcomes +
+  save_outcomes_to_csv_with_pandas), written row by row to the outcomes CSV.
+  enumerate_within_budget falls back to memoized counting when that would be too large.
+- run_spe_solver: build_game_tree + backward_induction_spe for one starting pair,
+  as an iterative depth-first solver that appends each solved decision to a CSV file.
+
+Both keep their whole progress in a small state (DFS frontier, partial aggregates, position in
+the output file) that is pickled to checkpoint_file every checkpoint_every processed nodes.
+Checkpoints are written to a temporary file and atomically renamed, so a job killed at any point
+resumes from the last complete checkpoint; calling the same function again with the same
+checkpoint_file resumes, and gives exactly the output of an uninterrupted run.
+"""
+import argparse
+import csv
+import os
+import pickle
+
+import state_codec as codec
+from deck import HAND_SIZE, starting_hands
+from enumerate_states import DEFAULT_NODE_BUDGET, count_all_outcomes, explicit_enumeration_size
+from game import expand_node, format_path, load_path_probabilities, path_trie
+
+CHECKPOINT_VERSION = 2
+
+
+def _write_checkpoint(checkpoint_file, payload):
+    tmp_file = checkpoint_file + ".tmp"
+    with open(tmp_file, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, checkpoint_file)
+
+
+def _read_checkpoint(checkpoint_file, kind, params):
+    if not checkpoint_file or not os.path.exists(checkpoint_file):
+        return None
+    with open(checkpoint_file, "rb") as f:
+        payload = pickle.load(f)
+    if payload.get("version") != CHECKPOINT_VERSION or payload.get("kind") != kind:
+        raise ValueError(f"{checkpoint_file} is not a {kind} checkpoint of this version")
+    if payload["params"] != params:
+        raise ValueError(f"{checkpoint_file} was written with {payload['params']}, not {params}")
+    return payload
+
+
+###############################################################################
+# Enumeration of all outcomes ("all state.py")
+###############################################################################
+def _action_text(player, move):
+    # Same text as save_outcomes_to_csv_with_pandas, e.g. "Player 2 challenge " for a challenge
+    move_type, count = codec.decode_move(move)
+    count_str = "" if move_type == codec.CHALLENGE else str(count)
+    return f"Player {player} {codec.ACTION_NAMES[move_type]} {count_str}"
+
+
+def run_enumeration(output_file="game_outcomes.csv", checkpoint_file=None, max_depth=50,
+                    hand_size=HAND_SIZE, checkpoint_every=100000, deck=None):
+    """
+    Enumerate every outcome of every starting pair (deck.starting_hands) in the order of
+    find_all_game_outcomes and write them to output_file in the game_outcomes.csv format.
+    Returns the statistics of calculate_statistics
+    ({(p1_start, p2_start): {"P1_wins", "P2_wins", "total"}}).
+    """
+    params = {"max_depth": max_depth, "hand_size": hand_size, "deck": deck and tuple(deck),
+              "output_file": os.path.abspath(output_file)}
+    starts = starting_hands(hand_size, deck)
+
+    payload = _read_checkpoint(checkpoint_file, "enumeration", params)
+    if payload is None:
+        progress = {"start_index": 0, "stack": None, "statistics": {}, "offset": None}
+        out = open(output_file, "w", newline="")
+        csv.writer(out, lineterminator="\n").writerow(["P1 Hand", "P2 Hand", "Action Sequence", "Winner"])
+    else:
+        progress = payload["progress"]
+        out = open(output_file, "r+", newline="")
+        out.truncate(progress["offset"])
+        out.seek(progress["offset"])
+    writer = csv.writer(out, lineterminator="\n")
+
+    processed = 0
+    with out:
+        while progress["start_index"] < len(starts):
+            player1, player2 = starts[progress["start_index"]]
+            statistics = progress["statistics"].setdefault(
+                (player1, player2), {"P1_wins": 0, "P2_wins": 0, "total": 0})
+            if progress["stack"] is None:
+                progress["stack"] = [(codec.encode_state(1, player1, player2), "")]
+            stack = progress["stack"]
+            p1_hand = f"({player1[0]},{player1[1]})"
+            p2_hand = f"({player2[0]},{player2[1]})"
+
+            while stack:
+                state, sequence = stack.pop()
+                if codec.is_terminal(state):
+                    winner = codec.challenge_winner(state)
+                    writer.writerow([p1_hand, p2_hand, sequence, f"P{winner}"])
+                    statistics["total"] += 1
+                    statistics["P1_wins" if winner == 1 else "P2_wins"] += 1
+                elif codec.step(state) <= max_depth:
+                    player = codec.current_player(state)
+                    prefix = sequence + " -> " if sequence else ""
+                    for move, child in reversed(codec.successors(state, forced_when_any_empty=True)):
+                        stack.append((child, prefix + _action_text(player, move)))
+
+                processed += 1
+                if checkpoint_file and processed % checkpoint_every == 0:
+                    out.flush()
+                    progress["offset"] = out.tell()
+                    _write_checkpoint(checkpoint_file, {
+                        "version": CHECKPOINT_VERSION, "kind": "enumeration",
+                        "params": params, "progress": progress,
+                    })
+
+            progress["start_index"] += 1
+            progress["stack"] = None
+
+    if checkpoint_file and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+    return progress["statistics"]
+
+
+def enumerate_within_budget(output_file="game_outcomes.csv", checkpoint_file=None, max_depth=50,
+                            hand_size=HAND_SIZE, deck=None, node_budget=DEFAULT_NODE_BUDGET):
+    """
+    run_enumeration if the explicit enumeration visits at most node_budget states, otherwise
+    only the per-starting-pair statistics by memoized counting (enumerate_states), without an
+    outcomes file. The size is itself computed on merged states, so checking it is cheap.
+    Returns (statistics, explicit) where explicit tells whether output_file was written.
+    """
+    if explicit_enumeration_size(max_depth, hand_size, deck) > node_budget:
+        return count_all_outcomes(max_depth, hand_size, deck), False
+    return run_enumeration(output_file, checkpoint_file, max_depth, hand_size, deck=deck), True
+
+
+###############################################################################
+# Iterative SPE solver (build_game_tree + backward_induction_spe)
+###############################################################################
+DECISION_HEADER = ["Path", "Action", "P1 Payoff", "P2 Payoff"]
+
+
+def _history_key(history):
+    return format_path(history[:-1], history[-1]) if history else ""
+
+
+def run_spe_solver(player1_start, player2_start, csv_file="game_results.csv", max_moves=15,
+                   checkpoint_file=None, checkpoint_every=100000, path_probs=None,
+                   decisions_file="spe_decisions.csv"):
+    """
+    Solve the SPE of one starting pair with the rules and tie-breaking of
+    build_game_tree + backward_induction_spe, without keeping the tree in memory: only the
+    current root-to-node path is held, and each solved decision is appended to decisions_file.
+
+    decisions_file gets one row per non-terminal node, written when the node is solved (children
+    before parents, the root last): its CSV path ("" for the root), the chosen action as text
+    and the (p1, p2) payoff. Returns the root payoff; read_decisions and equilibrium_moves read
+    the file back.
+    """
+    params = {"player1_start": tuple(player1_start), "player2_start": tuple(player2_start),
+              "csv_file": os.path.abspath(csv_file), "max_moves": max_moves,
+              "decisions_file": os.path.abspath(decisions_file)}
+    if path_probs is None:
+        path_probs = load_path_probabilities(csv_file, start=(player1_start, player2_start))
+    trie_table = path_trie(path_probs)
+
+    payload = _read_checkpoint(checkpoint_file, "spe", params)
+    if payload is None:
+        root = {
+            "node_id": None,
+            "state": codec.encode_state(1, player1_start, player2_start),
+            "current_player": 1,
+            "p1_hand": player1_start,
+            "p2_hand": player2_start,
+            "history": [],
+            "payoff": (0.0, 0.0),
+            "steps": 0,
+            "path_id": 0
+        }
+        # frame: [node, children, next child index, best payoff, best child index]
+        progress = {"stack": [[root, None, 0, None, None]], "offset": None, "result": None}
+        out = open(decisions_file, "w", newline="")
+        csv.writer(out, lineterminator="\n").writerow(DECISION_HEADER)
+    else:
+        progress = payload["progress"]
+        out = open(decisions_file, "r+", newline="")
+        out.truncate(progress["offset"])
+        out.seek(progress["offset"])
+    writer = csv.writer(out, lineterminator="\n")
+    stack = progress["stack"]
+
+    processed = 0
+    with out:
+        while stack:
+            frame = stack[-1]
+            node = frame[0]
+            if frame[1] is None:
+                frame[1] = expand_node(node, trie_table) if node["steps"] < max_moves else []
+
+            if frame[2] < len(frame[1]):
+                child, expandable = frame[1][frame[2]]
+                if expandable and child["steps"] < max_moves:
+                    stack.append([child, None, 0, None, None])
+                    continue
+                child_payoff = child["payoff"]
+            else:
+                # All children solved (or a leaf): pop and report to the parent
+                stack.pop()
+                if frame[3] is None:
+                    child_payoff = node["payoff"]
+                else:
+                    child_payoff = frame[3]
+                    best_child = frame[1][frame[4]][0]
+                    writer.writerow([_history_key(node["history"]),
+                                     format_path([], best_child["history"][-1]), *frame[3]])
+                if not stack:
+                    progress["result"] = child_payoff
+                    break
+                frame = stack[-1]
+
+            # Fold child_payoff (child number frame[2]) into frame, as in backward_induction_spe
+            player = frame[0]["current_player"]
+            if frame[3] is None or child_payoff[player - 1] > frame[3][player - 1]:
+                frame[3] = child_payoff
+                frame[4] = frame[2]
+            frame[2] += 1
+
+            processed += 1
+            if checkpoint_file and processed % checkpoint_every == 0:
+                out.flush()
+                progress["offset"] = out.tell()
+                _write_checkpoint(checkpoint_file, {
+                    "version": CHECKPOINT_VERSION, "kind": "spe", "params": params, "progress": progress,
+                })
+
+    if checkpoint_file and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+    return progress["result"]
+
+
+def read_decisions(decisions_file="spe_decisions.csv"):
+    """
+    {path: (action text, (p1, p2))} of a decisions_file written by run_spe_solver.
+    """
+    with open(decisions_file, newline="") as f:
+        reader = csv.reader(f)
+        next(reader)
+        return {path: (action, (float(p1), float(p2))) for path, action, p1, p2 in reader}
+
+
+def equilibrium_moves(decisions):
+    """
+    The equilibrium path from the root as [(action text, payoff), ...], following decisions
+    (read_decisions) as trace_equilibrium_path follows best_child.
+    """
+    moves, key = [], ""
+    while key in decisions:
+        action, payoff = decisions[key]
+        moves.append((action, payoff))
+        key = f"{key} -> {action}" if key else action
+    return moves
+
+
+def _parse_hand(text):
+    true_cards, fake_cards = text.strip("()").split(",")
+    return int(true_cards), int(fake_cards)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumable enumeration / SPE solving")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enumerate_parser = subparsers.add_parser("enumerate")
+    enumerate_parser.add_argument("--output", default="game_outcomes.csv")
+    enumerate_parser.add_argument("--checkpoint", default="game_outcomes.ckpt")
+    enumerate_parser.add_argument("--max-depth", type=int, default=50)
+    enumerate_parser.add_argument("--hand-size", type=int, default=5)
+    enumerate_parser.add_argument("--every", type=int, default=100000)
+
+    solve_parser = subparsers.add_parser("solve")
+    solve_parser.add_argument("--p1", default="(2,3)")
+    solve_parser.add_argument("--p2", default="(5,0)")
+    solve_parser.add_argument("--csv", default="game_results.csv")
+    solve_parser.add_argument("--checkpoint", default="spe.ckpt")
+    solve_parser.add_argument("--decisions", default="spe_decisions.csv")
+    solve_parser.add_argument("--max-moves", type=int, default=15)
+    solve_parser.add_argument("--every", type=int, default=100000)
+
+    args = parser.parse_args()
+    if args.command == "enumerate":
+        statistics = run_enumeration(args.output, args.checkpoint, args.max_depth, args.hand_size, args.every)
+        for state, stats in statistics.items():
+            print(f"Initial State {state}: P1 Wins = {stats['P1_wins']}, P2 Wins = {stats['P2_wins']}, Total Games = {stats['total']}")
+    else:
+        root_payoff = run_spe_solver(_parse_hand(args.p1), _parse_hand(args.p2), args.csv,
+                                     args.max_moves, args.checkpoint, args.every,
+                                     decisions_file=args.decisions)
+        print("SPE payoff at the root =", root_payoff)
+        for action, payoff in equilibrium_moves(read_decisions(args.decisions)):
+            print(" ", action, payoff)
@@ -1,68 +1,231 @@
-import pandas as pd
-from collections import defaultdict
+import csv
+import hashlib
+import json
+import os
 
-def parse_outcomes(input_file, output_file):
-    # Load the initial data from CSV using pandas
-    data = pd.read_csv(input_file)
+from csv_stream import (
+    DEFAULT_CHUNK_SIZE, OUTCOME_COLUMNS, RESULT_COLUMNS, SEPARATOR, action_text, format_hand, is_challenge,
+    iter_outcome_chunks, iter_record_chunks, load_path_counts, parse_actions, parse_hand, WINNERS,
+)
 
-    # Dictionary to store results for each starting hand combination
-    grouped_results = defaultdict(lambda: defaultdict(lambda: {'P1_win': 0, 'P2_win': 0}))
 
-    # Normalize paths to remove trailing challenge actions
-    def normalize_path(outcome_path):
-        if outcome_path[-1] in ['Player 2 challenge ', 'Player 1 challenge ']:
-            return outcome_path[:-1]
-        return outcome_path
+class PathCounts:
+    """
+    Per-prefix win counts of integer-coded outcome rows (csv_stream.iter_outcome_chunks), kept as
+    one trie of action codes per starting pair. Memory grows with the number of distinct prefixes
+    (the size of the results CSV), not with the number of outcome rows. rows() yields the starting
+    pairs and, within each, the prefixes in order of first appearance.
+    """
 
-    # Recursive function to record win counts for all prefixes of a path
-    def record_path_counts(key, outcome_path, winner, current_path=""):
-        if not outcome_path:
+    def __init__(self):
+        self.roots = {}      # (P1 hand, P2 hand) -> root node
+        self.nodes = {}      # root node -> [prefix nodes in first-appearance order]
+        self.children = {}   # (node, action code) -> node
+        self.parent = []
+        self.code = []
+        self.p1_win = []
+        self.p2_win = []
+
+    def _new_node(self, parent, code):
+        self.parent.append(parent)
+        self.code.append(code)
+        self.p1_win.append(0)
+        self.p2_win.append(0)
+        return len(self.code) - 1
+
+    def add(self, p1_hand, p2_hand, actions, winner):
+        # A trailing challenge is dropped: the prefix it ends is counted on its own
+        if actions and is_challenge(actions[-1]):
+            actions = actions[:-1]
+        if not actions:
             return
+        key = (p1_hand, p2_hand)
+        node = self.roots.get(key)
+        if node is None:
+            node = self.roots[key] = self._new_node(-1, 0)
+            self.nodes[node] = []
+        prefixes = self.nodes[node]
+        children = self.children
+        wins = self.p1_win if winner == 1 else self.p2_win if winner == 2 else None
+        for code in actions:
+            child = children.get((node, code))
+            if child is None:
+                child = children[(node, code)] = self._new_node(node, code)
+                prefixes.append(child)
+            node = child
+            if wins is not None:
+                wins[node] += 1
+
+    def add_rows(self, rows):
+        for p1_hand, p2_hand, actions, winner in rows:
+            self.add(p1_hand, p2_hand, actions, winner)
+        return self
+
+    def starts(self):
+        return list(self.roots)
+
+    def rows(self, start=None):
+        """
+        (P1 hand, P2 hand, path text, P1_win, P2_win) for every prefix, of one starting pair or of all.
+        """
+        for key in ([start] if start is not None else self.roots):
+            root = self.roots.get(key)
+            if root is None:
+                continue
+            texts = {root: ""}
+            for node in self.nodes[root]:
+                parent = self.parent[node]
+                text = action_text(self.code[node])
+                if parent != root:
+                    text = f"{texts[parent]}{SEPARATOR}{text}"
+                texts[node] = text
+                yield key[0], key[1], text, self.p1_win[node], self.p2_win[node]
+
+
+def write_results(rows, output_file):
+    """
+    Write PathCounts.rows() as a results CSV (columns RESULT_COLUMNS), in the format of the
+    original pandas writer: hands as "(t,f)", one row per prefix.
+    """
+    with open(output_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(RESULT_COLUMNS)
+        writer.writerows(
+            (format_hand(p1_hand), format_hand(p2_hand), path, p1_win, p2_win)
+            for p1_hand, p2_hand, path, p1_win, p2_win in rows
+        )
+
+
+def parse_outcomes(input_file, output_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Aggregate an outcomes CSV into a results CSV. The outcomes are streamed in chunks
+    (csv_stream), so the input is never held in memory; see PathCounts.
+    """
+    counts = PathCounts()
+    for chunk in iter_outcome_chunks(input_file, chunk_size):
+        counts.add_rows(chunk)
+    write_results(counts.rows(), output_file)
+
+
+###############################################################################
+# Partitioned results store: one CSV per (P1_start, P2_start) plus a manifest
+###############################################################################
+MANIFEST_FILE = "manifest.json"
+
+
+def partition_file_name(p1_start, p2_start):
+    """
+    File name of a partition, e.g. ("(2,3)", "(5,0)") -> "2-3_5-0.csv".
+    """
+    def hand_tag(hand):
+        return hand.strip("()").replace(",", "-").replace(" ", "")
+    return f"{hand_tag(p1_start)}_{hand_tag(p2_start)}.csv"
+
+
+def load_manifest(results_dir):
+    manifest_path = os.path.join(results_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {"partitions": {}}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def _partition_checksums(input_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    # {"P1|P2": (P1 Hand, P2 Hand, checksum)} in first-appearance order, streamed; the checksum
+    # is the sha256 of the partition's "Action Sequence<TAB>Winner" lines, in order
+    digests = {}
+    for chunk in iter_record_chunks(input_file, OUTCOME_COLUMNS, chunk_size):
+        for p1_start, p2_start, outcome_path, winner in chunk:
+            key = f"{p1_start}|{p2_start}"
+            entry = digests.get(key)
+            if entry is None:
+                entry = digests[key] = (p1_start, p2_start, hashlib.sha256())
+            entry[2].update(f"{outcome_path}\t{winner}\n".encode("utf-8"))
+    return {key: (p1_start, p2_start, digest.hexdigest()) for key, (p1_start, p2_start, digest) in digests.items()}
+
+
+def update_partitioned_results(input_file, results_dir, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Incrementally rebuild the partitioned results store in results_dir from an outcomes CSV.
+    Only partitions whose outcome rows changed (by checksum) are re-aggregated and rewritten;
+    partitions that disappeared from the outcomes file are removed.
+    The outcomes file is streamed twice: once for the checksums, once to aggregate the
+    changed partitions.
+    Returns the list of (P1_start, P2_start) keys that were rewritten.
+    """
+    os.makedirs(results_dir, exist_ok=True)
+    old_partitions = load_manifest(results_dir)["partitions"]
+
+    partitions = {}
+    stale = {}
+    for key, (p1_start, p2_start, checksum) in _partition_checksums(input_file, chunk_size).items():
+        entry = {
+            "P1_start": p1_start,
+            "P2_start": p2_start,
+            "file": partition_file_name(p1_start, p2_start),
+            "checksum": checksum,
+        }
+        partitions[key] = entry
+
+        old_entry = old_partitions.get(key)
+        partition_path = os.path.join(results_dir, entry["file"])
+        if old_entry and old_entry["checksum"] == entry["checksum"] and os.path.exists(partition_path):
+            continue
+        stale[key] = entry
+
+    if stale:
+        counts = PathCounts()
+        for chunk in iter_record_chunks(input_file, OUTCOME_COLUMNS, chunk_size):
+            for p1_start, p2_start, outcome_path, winner in chunk:
+                if f"{p1_start}|{p2_start}" in stale:
+                    counts.add(parse_hand(p1_start), parse_hand(p2_start), parse_actions(outcome_path),
+                               WINNERS.get(winner, 0))
+        for entry in stale.values():
+            start = (parse_hand(entry["P1_start"]), parse_hand(entry["P2_start"]))
+            write_results(counts.rows(start), os.path.join(results_dir, entry["file"]))
+    rewritten = [(entry["P1_start"], entry["P2_start"]) for entry in stale.values()]
+
+    for key, old_entry in old_partitions.items():
+        if key not in partitions:
+            stale_path = os.path.join(results_dir, old_entry["file"])
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+
+    with open(os.path.join(results_dir, MANIFEST_FILE), "w") as f:
+        json.dump({"source": input_file, "partitions": partitions}, f, indent=2)
+
+    return rewritten
+
+
+def load_partition_counts(results_dir, p1_start, p2_start):
+    """
+    Path -> (P1_win, P2_win) of a single starting hand pair from the partitioned store, the same
+    table as csv_stream.load_path_counts(results_csv, start=...) on the combined results CSV.
+    Empty if the pair is not in the store.
+    """
+    entry = load_manifest(results_dir)["partitions"].get(f"{p1_start}|{p2_start}")
+    if entry is None:
+        return {}
+    return load_path_counts(os.path.join(results_dir, entry["file"]))
+
+
+def combine_partitions(results_dir, output_file):
+    """
+    Concatenate all partitions (in manifest order) into one results CSV,
+    identical to what parse_outcomes writes for the same outcomes file.
+    Partition files are copied line by line below a single header.
+    """
+    partitions = load_manifest(results_dir)["partitions"]
+    with open(output_file, "w", newline="", encoding="utf-8") as out:
+        csv.writer(out, lineterminator="\n").writerow(RESULT_COLUMNS)
+        for entry in partitions.values():
+            with open(os.path.join(results_dir, entry["file"]), newline="", encoding="utf-8") as f:
+                next(f, None)
+                out.writelines(f)
+
 
-        # Extend the current path
-        next_action = outcome_path[0]
-        new_path = f"{current_path} -> {next_action}".strip(" -> ")
-
-        # Update win counts for the current path
-        if winner == 'P1':
-            grouped_results[key][new_path]['P1_win'] += 1
-        elif winner == 'P2':
-            grouped_results[key][new_path]['P2_win'] += 1
-
-        # Recur for the remaining path
-        record_path_counts(key, outcome_path[1:], winner, new_path)
-
-    # Analyze each row in the input file
-    for _, row in data.iterrows():
-        initial_p1, initial_p2, outcome_path, winner = row['P1 Hand'], row['P2 Hand'], row['Action Sequence'], row['Winner']
-        outcome_path = outcome_path.split(' -> ')
-
-        # Normalize the path to remove trailing challenge actions
-        normalized_path = normalize_path(outcome_path)
-
-        # Normalize the key for grouped results
-        key = (initial_p1, initial_p2)
-
-        # Record counts for the full path and all its prefixes
-        record_path_counts(key, normalized_path, winner)
-
-    # Prepare results for writing
-    rows = []
-    for (p1_hand, p2_hand), paths in grouped_results.items():
-        for path, counts in paths.items():
-            rows.append({
-                'P1_start': p1_hand,
-                'P2_start': p2_hand,
-                'Path': path,
-                'P1_win': counts['P1_win'],
-                'P2_win': counts['P2_win']
-            })
-
-    # Convert results to a DataFrame and write to a new CSV file
-    results_df = pd.DataFrame(rows)
-    results_df.to_csv(output_file, index=False)
-
-# Example usage
-input_file = './game_outcomes.csv'  # Replace with your input file
-output_file = 'game_results.csv'  # Replace with your output file
-parse_outcomes(input_file, output_file)
+if __name__ == "__main__":
+    # Example usage
+    input_file = './game_outcomes.csv'  # Replace with your input file
+    output_file = 'game_results.csv'  # Replace with your output file
+    parse_outcomes(input_file, output_file)
@@ -1,8 +1,9 @@
-import pandas as pd
 from collections import defaultdict
 
 def parse_outcomes(input_file, output_file):
-    # Load the initial data from CSV using pandas
+    # Load the initial data from CSV using pandas (imported here so the module loads without it)
+    import pandas as pd
+
     data = pd.read_csv(input_file)
 
     # Dictionary to store results for each starting hand combination
@@ -62,7 +63,9 @@ def parse_outcomes(input_file, output_file):
     results_df = pd.DataFrame(rows)
     results_df.to_csv(output_file, index=False)
 
-# Example usage
-input_file = './incomplete_game_outcomes.csv'  # Replace with your input file
-output_file = 'incomplete_game_result.csv'  # Replace with your output file
-parse_outcomes(input_file, output_file)
+
+if __name__ == "__main__":
+    # Example usage
+    input_file = './incomplete_game_outcomes.csv'  # Replace with your input file
+    output_file = 'incomplete_game_result.csv'  # Replace with your output file
+    parse_outcomes(input_file, output_file)
@@ -0,0 +1,178 @@
+"""
+Streaming readers for the outcome and result CSVs, without pandas.
+
+    outcome CSV   P1 Hand, P2 Hand, Action Sequence, Winner       ("all state.py", checkpoint.py)
+    result CSV    P1_start, P2_start, Path, P1_win, P2_win        (count.parse_outcomes)
+
+Files are read with the csv module in chunks of chunk_size records, so memory does not depend on
+the file size. Outcome chunks are parsed in one loop into integer-coded rows and then yielded:
+
+    outcome row   ((t1, f1), (t2, f2), actions, winner)           winner 1, 2 or 0 if neither
+
+Result CSVs are read into Path -> (P1_win, P2_win) tables (load_path_counts).
+
+actions is a tuple of action codes, action_code(player, move) with move a state_codec move code,
+so "Player 2 play_fake 3" becomes action_code(2, encode_move(PLAY_FAKE, 3)). Codes are positive,
+carry the player in bit 0 and are looked up from a token cache, so each distinct action text is
+parsed only once per process. action_text(code) gives back the text game.format_path writes.
+"""
+import csv
+from itertools import islice
+
+import state_codec as codec
+
+SEPARATOR = " -> "
+DEFAULT_CHUNK_SIZE = 100000
+
+OUTCOME_COLUMNS = ["P1 Hand", "P2 Hand", "Action Sequence", "Winner"]
+RESULT_COLUMNS = ["P1_start", "P2_start", "Path", "P1_win", "P2_win"]
+
+WINNERS = {"P1": 1, "P2": 2}
+
+
+###############################################################################
+# Action and hand codes
+###############################################################################
+def action_code(player, move):
+    return (move << 1) | (player - 1)
+
+
+def code_player(code):
+    return (code & 1) + 1
+
+
+def code_move(code):
+    return code >> 1
+
+
+def is_challenge(code):
+    return codec.decode_move(code >> 1)[0] == codec.CHALLENGE
+
+
+_action_codes = {}    # token text -> code
+_action_texts = {}    # code -> text as written by game.format_path
+_hands = {}           # "(2,3)" -> (2, 3)
+
+
+def action_text(code):
+    text = _action_texts.get(code)
+    if text is None:
+        action = codec.move_to_action(code_player(code), code_move(code))
+        text = f"Player {action['player']} {action['type']} {action.get('count', '')}".strip()
+        _action_texts[code] = text
+    return text
+
+
+def parse_action(token):
+    """
+    "Player 1 play_true 2" -> action code; the trailing space of "Player 2 challenge " is ignored.
+    """
+    code = _action_codes.get(token)
+    if code is None:
+        parts = token.split()
+        if len(parts) not in (3, 4) or parts[0] != "Player" or parts[2] not in codec.ACTION_CODES:
+            raise ValueError(f"not an action: {token!r}")
+        move = codec.encode_move(codec.ACTION_CODES[parts[2]], int(parts[3]) if len(parts) == 4 else 0)
+        code = action_code(int(parts[1]), move)
+        _action_codes[token] = code
+    return code
+
+
+def parse_actions(sequence):
+    """
+    "Player 1 play_fake 1 -> Player 2 challenge " -> tuple of action codes.
+    """
+    codes = _action_codes
+    return tuple([codes[token] if token in codes else parse_action(token)
+                  for token in sequence.split(SEPARATOR)])
+
+
+def parse_hand(text):
+    """
+    "(2,3)" -> (2, 3)
+    """
+    hand = _hands.get(text)
+    if hand is None:
+        true_cards, fake_cards = text.strip().strip("()").split(",")
+        hand = (int(true_cards), int(fake_cards))
+        _hands[text] = hand
+    return hand
+
+
+def format_hand(hand):
+    return f"({hand[0]},{hand[1]})"
+
+
+###############################################################################
+# Readers
+###############################################################################
+def iter_record_chunks(csv_file, columns, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Lists of up to chunk_size raw records (tuples of strings), reduced to the named columns.
+    """
+    with open(csv_file, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise ValueError(f"{csv_file} has no column(s) {missing}")
+        indices = [header.index(column) for column in columns]
+        while True:
+            chunk = list(islice(reader, chunk_size))
+            if not chunk:
+                return
+            yield [tuple([record[i] for i in indices]) for record in chunk if record]
+
+
+def iter_outcome_chunks(csv_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Lists of parsed outcome rows (see the module docstring).
+    """
+    hands = _hands
+    winners = WINNERS
+    for chunk in iter_record_chunks(csv_file, OUTCOME_COLUMNS, chunk_size):
+        yield [
+            (hands[p1] if p1 in hands else parse_hand(p1),
+             hands[p2] if p2 in hands else parse_hand(p2),
+             parse_actions(sequence),
+             winners.get(winner, 0))
+            for p1, p2, sequence, winner in chunk
+        ]
+
+
+def iter_outcome_rows(csv_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    for chunk in iter_outcome_chunks(csv_file, chunk_size):
+        yield from chunk
+
+
+def load_path_counts(csv_file="game_results.csv", start=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Path -> (P1_win, P2_win) of a result CSV. Paths are kept as text, since that is how the tree
+    builders and simulators look them up.
+
+    Counts belong to a starting pair: the result CSV has one row per (P1_start, P2_start, Path),
+    and count.update_partitioned_results stores the same rows per pair. With start=(P1 hand,
+    P2 hand), only that pair's rows are read, which is exactly the table of its partition
+    (count.load_partition_counts). Without start, rows of all pairs are read and the first row of
+    each path wins, like data[data["Path"] == path].iloc[0]; the counts of a path are then those
+    of the first starting pair in the file that reaches it, which is the lookup the tree builders
+    and simulators have always used.
+    """
+    path_counts = {}
+    if start is None:
+        for chunk in iter_record_chunks(csv_file, ["Path", "P1_win", "P2_win"], chunk_size):
+            for path, p1_win, p2_win in chunk:
+                if path not in path_counts:
+                    path_counts[path] = (int(p1_win), int(p2_win))
+        return path_counts
+
+    hands = _hands
+    start = (tuple(start[0]), tuple(start[1]))
+    for chunk in iter_record_chunks(csv_file, RESULT_COLUMNS, chunk_size):
+        for p1, p2, path, p1_win, p2_win in chunk:
+            if ((hands[p1] if p1 in hands else parse_hand(p1)),
+                    (hands[p2] if p2 in hands else parse_hand(p2))) == start and path not in path_counts:
+                path_counts[path] = (int(p1_win), int(p2_win))
+    return path_counts
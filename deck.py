@@ -0,0 +1,71 @@
+"""
+Deck composition and starting hands.
+
+The game only distinguishes cards that match the table rank ("true" cards, jokers included)
+from the others ("fake" cards), so a deck is summarised by how many of each it holds. The
+README deck has 20 cards (2 jokers and 6 each of Queens, Kings and Aces); with one rank on the
+table that is 2 + 6 = 8 true and 12 fake cards.
+
+starting_hands(hand_size, deck) lists the (player1, player2) starting pairs in the order of
+find_all_game_outcomes. Without a deck every (k, hand_size - k) split is allowed for both
+players independently (the original 36 pairs for 5-card hands); with a deck only the pairs
+that can be dealt from it are kept. starting_hand_priors gives the matching deal probabilities.
+"""
+from collections import namedtuple
+from math import comb
+
+import state_codec as codec
+
+HAND_SIZE = 5
+
+Deck = namedtuple("Deck", ["true_cards", "fake_cards"])
+
+
+def make_deck(jokers=2, ranks=3, cards_per_rank=6):
+    """
+    The Deck of jokers plus ranks * cards_per_rank cards, one rank being the table rank.
+    """
+    return Deck(jokers + cards_per_rank, (ranks - 1) * cards_per_rank)
+
+
+README_DECK = make_deck()
+
+
+def hand_splits(hand_size=HAND_SIZE, deck=None):
+    """
+    Every (true_cards, fake_cards) hand of hand_size cards that the deck can supply.
+    """
+    if not 0 <= hand_size <= codec.MAX_CARDS:
+        raise ValueError(f"hand size {hand_size} does not fit in {codec.CARD_BITS} bits")
+    return [
+        (t, hand_size - t) for t in range(hand_size + 1)
+        if deck is None or (t <= deck.true_cards and hand_size - t <= deck.fake_cards)
+    ]
+
+
+def starting_hands(hand_size=HAND_SIZE, deck=None):
+    """
+    [(player1, player2)] starting pairs, player 1's split in the outer loop.
+    """
+    hands = hand_splits(hand_size, deck)
+    return [
+        (h1, h2) for h1 in hands for h2 in hands
+        if deck is None or (h1[0] + h2[0] <= deck.true_cards and h1[1] + h2[1] <= deck.fake_cards)
+    ]
+
+
+def starting_hand_priors(hand_size=HAND_SIZE, deck=None):
+    """
+    {(player1, player2): probability} over starting_hands. Uniform without a deck; with a deck,
+    proportional to the number of ways to deal the two hands from it.
+    """
+    hands = starting_hands(hand_size, deck)
+    if deck is None:
+        return {pair: 1.0 / len(hands) for pair in hands}
+    weights = {
+        (h1, h2): comb(deck.true_cards, h1[0]) * comb(deck.fake_cards, h1[1])
+        * comb(deck.true_cards - h1[0], h2[0]) * comb(deck.fake_cards - h1[1], h2[1])
+        for h1, h2 in hands
+    }
+    total = sum(weights.values())
+    return {pair: weight / total for pair, weight in weights.items()}
@@ -0,0 +1,518 @@
+"""
+Differential checks of the optimized engines against pinned copies of the baseline scripts.
+
+The references are the unmodified baseline functions in baseline_reference.py, not the current
+(optimized) versions of the same functions. Each check runs a reference and one or more engines
+on the same configuration and the same inputs, asserts that their outputs are identical, and
+records both run times:
+
+    enumeration   baseline simulate_game                  vs checkpoint.run_enumeration (CSV rows)
+    counts        baseline simulate_game                  vs enumerate_states.count_outcomes
+    symmetry      count memoized on full states           vs count_outcomes on canonical states
+                                                             (results equal, memo strictly smaller)
+    aggregation   baseline parse_outcomes                 vs count.parse_outcomes (streaming),
+                                                             count.update_partitioned_results + combine_partitions
+                  csv_stream.load_path_counts per pair    vs count.load_partition_counts
+    opponent      counts read off the outcome dicts       vs opponent_model.OpponentModel.update_from_log, on the
+                                                             outcome CSVs of "all state.py" and "incomplete all state.py"
+    solver        baseline build_game_tree + backward_induction_spe
+                                                          vs game.build_game_tree + backward_induction_spe,
+                                                             game.lazy_equilibrium_search (every node),
+                                                             checkpoint.run_spe_solver, node_store
+
+Solver timings start from the results CSV on both sides: every engine loads its path table from
+the file inside the timed region, as the reference does. Unless --csv is given, that file is
+generated first with the baseline pipeline (simulate_game + parse_outcomes) for the largest
+hands in the run, so loading it does not dominate small cases.
+
+Configurations are not sampled: every check runs over the whole space of hands x depths within
+the bounds (--max-cards, --max-depth, --solver-cards, --max-moves), smallest first, plus a few
+fixed larger edge cases. The first failure of each check is shrunk greedily: hands and depths are
+reduced one step at a time while the check still fails, and the minimal failing configuration
+is reported.
+
+    python differential.py --max-cards 3 --max-depth 6
+
+prints one line per (check, configuration, engine) with the speedup ratio and exits with status 1
+if any engine disagrees with its reference.
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import state_codec as codec
+
+
+def _timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _hands(hand_size):
+    return [(t, hand_size - t) for t in range(hand_size + 1)]
+
+
+###############################################################################
+# Reference runs
+###############################################################################
+def reference_outcomes(baseline, starts, max_depth):
+    outcomes = []
+    for player1, player2 in starts:
+        baseline.simulate_game(player1, player2, 1, [], outcomes, 0, max_depth, (player1, player2), {})
+    return outcomes
+
+
+def _outcome_rows(outcomes):
+    # Row text of save_outcomes_to_csv_with_pandas, without going through pandas
+    rows = []
+    for outcome in outcomes:
+        (p1, p2), history = outcome["initial_state"], outcome["history"]
+        sequence = " -> ".join(f"Player {a['player']} {a['type']} {a.get('count', '')}" for a in history)
+        rows.append([f"({p1[0]},{p1[1]})", f"({p2[0]},{p2[1]})", sequence, f"P{outcome['winner']}"])
+    return rows
+
+
+def write_outcomes(outcomes, outcomes_file):
+    import pandas as pd
+
+    pd.DataFrame(_outcome_rows(outcomes),
+                 columns=["P1 Hand", "P2 Hand", "Action Sequence", "Winner"]).to_csv(outcomes_file, index=False)
+
+
+def reference_results_csv(baseline, hand_size, workdir):
+    """
+    A results CSV made by the baseline pipeline (simulate_game + parse_outcomes) over every
+    starting pair of hand_size cards, for the solver checks.
+    """
+    starts = [(h1, h2) for h1 in _hands(hand_size) for h2 in _hands(hand_size)]
+    outcomes_file = os.path.join(workdir, "solver_outcomes.csv")
+    results_file = os.path.join(workdir, "solver_results.csv")
+    write_outcomes(reference_outcomes(baseline, starts, 100), outcomes_file)
+    baseline.parse_outcomes(outcomes_file, results_file)
+    return results_file
+
+
+###############################################################################
+# Checks: each returns [(engine, reference seconds, engine seconds, ok, detail)]
+###############################################################################
+def check_enumeration(baseline, hand_size, max_depth, workdir):
+    from checkpoint import run_enumeration
+
+    starts = [(h1, h2) for h1 in _hands(hand_size) for h2 in _hands(hand_size)]
+    outcomes, ref_time = _timed(reference_outcomes, baseline, starts, max_depth)
+    expected = _outcome_rows(outcomes)
+
+    output_file = os.path.join(workdir, "outcomes.csv")
+    _, fast_time = _timed(run_enumeration, output_file, None, max_depth, hand_size)
+    with open(output_file, newline="") as f:
+        actual = list(csv.reader(f))[1:]
+    ok = actual == expected
+    detail = f"{len(expected)} rows" if ok else f"{len(actual)} rows vs {len(expected)} expected"
+    return [("checkpoint.run_enumeration", ref_time, fast_time, ok, detail)]
+
+
+def check_counts(baseline, player1, player2, max_depth):
+    from enumerate_states import count_outcomes
+
+    outcomes, ref_time = _timed(reference_outcomes, baseline, [(player1, player2)], max_depth)
+    expected = (sum(o["winner"] == 1 for o in outcomes), sum(o["winner"] == 2 for o in outcomes))
+    actual, fast_time = _timed(count_outcomes, player1, player2, max_depth)
+    return [("enumerate_states.count_outcomes", ref_time, fast_time, tuple(actual) == expected,
+             f"{expected} vs {tuple(actual)}")]
+
+
+def _state_keyed_counts(starts, max_depth):
+    # count_outcomes with the memo keyed on the full state, without canonical_state
+    memo = {}
+
+    def count(state):
+        if state in memo:
+            return memo[state]
+        p1_wins = p2_wins = 0
+        if codec.step(state) <= max_depth:
+            for _, child in codec.successors(state, forced_when_any_empty=True):
+                if codec.is_terminal(child):
+                    if codec.challenge_winner(child) == 1:
+                        p1_wins += 1
+                    else:
+                        p2_wins += 1
+                else:
+                    child_p1, child_p2 = count(child)
+                    p1_wins += child_p1
+                    p2_wins += child_p2
+        memo[state] = (p1_wins, p2_wins)
+        return memo[state]
+
+    return {(p1, p2): count(codec.encode_state(1, p1, p2)) for p1, p2 in starts}, len(memo)
+
+
+def check_symmetry(hand_size, max_depth):
+    """
+    count_outcomes over every starting pair must equal a count memoized on the full state, with
+    a strictly smaller memo whenever the hands have at least two cards and max_depth cannot cut
+    off a game from its start (with one card there are no two positions to merge).
+    """
+    from enumerate_states import count_outcomes
+
+    starts = [(h1, h2) for h1 in _hands(hand_size) for h2 in _hands(hand_size)]
+    (expected, state_memo_size), ref_time = _timed(_state_keyed_counts, starts, max_depth)
+    memo = {}
+    actual, fast_time = _timed(lambda: {(p1, p2): count_outcomes(p1, p2, max_depth, memo) for p1, p2 in starts})
+    shrinks = len(memo) < state_memo_size or hand_size < 2 or max_depth < 2 * hand_size
+    return [("canonical memo", ref_time, fast_time, actual == expected and shrinks,
+             f"memo {len(memo)} vs {state_memo_size} states")]
+
+
+def check_aggregation(baseline, hand_size, max_depth, workdir):
+    from count import combine_partitions, parse_outcomes, update_partitioned_results
+
+    starts = [(h1, h2) for h1 in _hands(hand_size) for h2 in _hands(hand_size)]
+    outcomes_file = os.path.join(workdir, "agg_outcomes.csv")
+    write_outcomes(reference_outcomes(baseline, starts, max_depth), outcomes_file)
+
+    expected_file = os.path.join(workdir, "agg_expected.csv")
+    streamed_file = os.path.join(workdir, "agg_streamed.csv")
+    partitioned_file = os.path.join(workdir, "agg_partitioned.csv")
+    results_dir = tempfile.mkdtemp(prefix="agg_partitions", dir=workdir)
+
+    def partitioned():
+        update_partitioned_results(outcomes_file, results_dir)
+        combine_partitions(results_dir, partitioned_file)
+
+    _, ref_time = _timed(baseline.parse_outcomes, outcomes_file, expected_file)
+    with open(expected_file, "rb") as f:
+        expected = f.read()
+    results = []
+    for engine, run, output_file in (("count.parse_outcomes", lambda: parse_outcomes(outcomes_file, streamed_file),
+                                      streamed_file),
+                                     ("count partitions", partitioned, partitioned_file)):
+        _, fast_time = _timed(run)
+        with open(output_file, "rb") as f:
+            actual = f.read()
+        results.append((engine, ref_time, fast_time, actual == expected, f"{len(expected)} bytes"))
+
+    # Path counts are per starting pair: the flat reader scoped to a pair must return exactly
+    # the table of that pair's partition
+    from count import load_partition_counts
+    from csv_stream import format_hand, load_path_counts
+
+    flat, flat_time = _timed(lambda: {start: load_path_counts(expected_file, start) for start in starts})
+    partitioned, partition_time = _timed(lambda: {
+        start: load_partition_counts(results_dir, format_hand(start[0]), format_hand(start[1]))
+        for start in starts
+    })
+    results.append(("count.load_partition_counts", flat_time, partition_time, partitioned == flat,
+                    f"{sum(map(len, flat.values()))} paths"))
+    return results
+
+
+def _history_key(history):
+    return tuple(codec.action_to_move(action) for action in history)
+
+
+def _solution_table(node_lookup, best_payoff, best_child):
+    # {history key: (best payoff, chosen action)} of a solved tree, independent of node ids
+    return {
+        _history_key(node["history"]): (
+            tuple(best_payoff[nid]),
+            None if best_child[nid] is None else node_lookup[best_child[nid]]["history"][-1],
+        )
+        for nid, node in node_lookup.items()
+    }
+
+
+def _pair_results_csv(csv_file, player1, player2, workdir):
+    # The rows of one starting pair: the baseline's first-row lookup on this file is the
+    # pair-scoped table that the engines load with start=(player1, player2)
+    from csv_stream import format_hand
+
+    pair_file = os.path.join(workdir, "solver_pair_results.csv")
+    start = [format_hand(player1), format_hand(player2)]
+    with open(csv_file, newline="") as src, open(pair_file, "w", newline="") as dst:
+        reader, writer = csv.reader(src), csv.writer(dst)
+        writer.writerow(next(reader))
+        writer.writerows(row for row in reader if row[:2] == start)
+    return pair_file
+
+
+def check_solver(baseline, player1, player2, max_moves, csv_file, workdir):
+    import game
+    import node_store
+    from checkpoint import equilibrium_moves, read_decisions, run_spe_solver
+
+    # Every side starts from a results CSV: the reference reads the rows of this starting pair,
+    # game.build_game_tree reads csv_file itself and the other engines load their path table of
+    # the pair inside the timed region
+    pair_file = _pair_results_csv(csv_file, player1, player2, workdir)
+    start = (player1, player2)
+
+    def reference():
+        game_tree, node_lookup, root_id = baseline.build_game_tree(player1, player2, pair_file, max_moves)
+        best_payoff, best_child = baseline.backward_induction_spe(game_tree, node_lookup)
+        return node_lookup, root_id, best_payoff, best_child
+
+    (node_lookup, root_id, best_payoff, best_child), ref_time = _timed(reference)
+    expected = _solution_table(node_lookup, best_payoff, best_child)
+    root_payoff = tuple(best_payoff[root_id])
+    expected_path = [node_lookup[nid]["history"][-1]
+                     for nid in baseline.trace_equilibrium_path(root_id, best_child)[1:]]
+
+    results = []
+
+    def current_build():
+        game_tree, node_lookup, root_id = game.build_game_tree(player1, player2, csv_file, max_moves)
+        best_payoff, best_child = game.backward_induction_spe(game_tree, node_lookup)
+        return _solution_table(node_lookup, best_payoff, best_child)
+
+    actual, build_time = _timed(current_build)
+    results.append(("game.build_game_tree", ref_time, build_time, actual == expected,
+                    f"{len(actual)} nodes vs {len(expected)}"))
+
+    def lazy():
+        _, lazy_lookup, _, lazy_payoff, lazy_child = game.lazy_equilibrium_search(
+            player1, player2, max_moves=max_moves, path_probs=game.load_path_probabilities(csv_file, start=start))
+        return _solution_table(lazy_lookup, lazy_payoff, lazy_child)
+
+    actual, lazy_time = _timed(lazy)
+    results.append(("game.lazy_equilibrium_search", ref_time, lazy_time, actual == expected,
+                    f"{len(actual)} nodes vs {len(expected)}"))
+
+    decisions_file = os.path.join(workdir, "spe_decisions.csv")
+    payoff, checkpoint_time = _timed(run_spe_solver, player1, player2, csv_file, max_moves,
+                                     decisions_file=decisions_file)
+    path = [action for action, _ in equilibrium_moves(read_decisions(decisions_file))]
+    results.append(("checkpoint.run_spe_solver", ref_time, checkpoint_time,
+                    tuple(payoff) == root_payoff and path == [game.format_path([], a) for a in expected_path],
+                    f"root {tuple(payoff)}"))
+
+    def level_solve():
+        store = node_store.LevelNodeStore()
+        try:
+            node_store.build_level_tree(player1, player2, game.load_path_probabilities(csv_file, start=start),
+                                        max_moves, store)
+            return node_store.backward_induction_levels(store), node_store.trace_level_path(store)
+        finally:
+            store.close()
+
+    (level_payoff, level_path), level_time = _timed(level_solve)
+    results.append(("node_store levels", ref_time, level_time,
+                    level_payoff == root_payoff and level_path == expected_path, f"root {level_payoff}"))
+    return results
+
+
+def _load_script(file_name, module_name):
+    # The scripts with spaces in their names cannot be imported by name
+    import importlib.util
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), file_name)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _reference_model_counts(outcomes, hidden_types):
+    # {(player, history text): {action text: n}} as OpponentModel.history_counts should hold them
+    counts = {}
+    for outcome in outcomes:
+        history = ""
+        for action in outcome["history"]:
+            if action["type"] == "challenge":
+                text = "challenge"
+            elif hidden_types:
+                text = f"play {action['count']}"
+            else:
+                text = f"{action['type']} {action['count']}"
+            actions = counts.setdefault((action["player"], history), {})
+            actions[text] = actions.get(text, 0) + 1
+            token = f"Player {action['player']} {text}"
+            history = f"{history} -> {token}" if history else token
+    return counts
+
+
+def check_opponent(baseline, hand_size, max_depth, workdir):
+    """
+    OpponentModel fitted on the outcome CSV of each enumerator must hold exactly the action
+    counts of its outcomes: full moves for "all state.py", hidden play types for
+    "incomplete all state.py".
+    """
+    from opponent_model import OpponentModel
+
+    incomplete = _load_script("incomplete all state.py", "incomplete_all_state")
+    starts = [(h1, h2) for h1 in _hands(hand_size) for h2 in _hands(hand_size)]
+    results = []
+    for name, simulate_game, save, hidden_types in (
+        ("full moves", baseline.simulate_game, write_outcomes, False),
+        ("hidden types", incomplete.simulate_game, incomplete.save_outcomes_to_csv_with_pandas, True),
+    ):
+        outcomes = []
+        for player1, player2 in starts:
+            simulate_game(player1, player2, 1, [], outcomes, 0, max_depth, (player1, player2), {})
+        outcomes_file = os.path.join(workdir, "opponent_outcomes.csv")
+        save(outcomes, outcomes_file)
+
+        expected, ref_time = _timed(_reference_model_counts, outcomes, hidden_types)
+        model = OpponentModel()
+        _, fast_time = _timed(model.update_from_log, outcomes_file)
+        actual = {key: dict(actions) for key, actions in model.history_counts.items()}
+        results.append((f"OpponentModel, {name}", ref_time, fast_time, actual == expected,
+                        f"{len(outcomes)} outcomes, {len(expected)} histories"))
+    return results
+
+
+###############################################################################
+# Configuration space and shrinking
+###############################################################################
+CHECKS = ["enumeration", "counts", "symmetry", "aggregation", "opponent", "solver"]
+
+# Larger fixed cases, run after the exhaustive space
+EDGE_CASES = [
+    ("counts", {"player1": (0, 5), "player2": (0, 5), "max_depth": 12}),
+    ("counts", {"player1": (5, 0), "player2": (5, 0), "max_depth": 12}),
+    ("symmetry", {"hand_size": 5, "max_depth": 50}),
+    ("aggregation", {"hand_size": 2, "max_depth": 50}),
+    ("opponent", {"hand_size": 3, "max_depth": 50}),
+    ("solver", {"player1": (2, 3), "player2": (5, 0), "max_moves": 8}),
+]
+
+# Smallest value of every config field; hands keep at least one card
+MINIMUM = {"hand_size": 1, "max_depth": 0, "max_moves": 1}
+
+
+def hands_up_to(max_cards):
+    """
+    Every (true, fake) hand of 1..max_cards cards.
+    """
+    return [hand for size in range(1, max_cards + 1) for hand in _hands(size)]
+
+
+def _size(config):
+    return sum(sum(value) if isinstance(value, tuple) else value for value in config.values())
+
+
+def case_space(max_cards=3, max_depth=6, solver_cards=2, max_moves=5):
+    """
+    [(check name, config)] over the whole hands x depths space within the bounds, each check
+    ordered from the smallest configuration up, followed by EDGE_CASES.
+    """
+    hands = hands_up_to(max_cards)
+    space = {
+        "enumeration": [{"hand_size": h, "max_depth": d}
+                        for h in range(1, max_cards + 1) for d in range(max_depth + 1)],
+        "counts": [{"player1": p1, "player2": p2, "max_depth": d}
+                   for p1 in hands for p2 in hands for d in range(max_depth + 1)],
+        "symmetry": [{"hand_size": h, "max_depth": d}
+                     for h in range(1, max_cards + 1) for d in range(max_depth + 1)],
+        # depth 0 has no outcomes (no challenge on the first move), so nothing to aggregate
+        "aggregation": [{"hand_size": h, "max_depth": d}
+                        for h in range(1, min(max_cards, 3) + 1) for d in range(1, max_depth + 1)],
+        "opponent": [{"hand_size": h, "max_depth": d}
+                     for h in range(1, min(max_cards, 3) + 1) for d in range(1, max_depth + 1)],
+        "solver": [{"player1": p1, "player2": p2, "max_moves": m}
+                   for p1 in hands_up_to(solver_cards) for p2 in hands_up_to(solver_cards)
+                   for m in range(1, max_moves + 1)],
+    }
+    cases = [(check, config) for check in CHECKS for config in sorted(space[check], key=_size)]
+    return cases + EDGE_CASES
+
+
+def smaller_configs(config):
+    """
+    Neighbours of config with one field reduced by one step.
+    """
+    for key, value in config.items():
+        if isinstance(value, tuple):
+            true_cards, fake_cards = value
+            if true_cards + fake_cards > 1:
+                if true_cards > 0:
+                    yield {**config, key: (true_cards - 1, fake_cards)}
+                if fake_cards > 0:
+                    yield {**config, key: (true_cards, fake_cards - 1)}
+        elif value > MINIMUM[key]:
+            yield {**config, key: value - 1}
+
+
+def shrink(run_case, check, config):
+    """
+    Greedily move to a smaller configuration on which check still fails, until none does.
+    """
+    while True:
+        for candidate in smaller_configs(config):
+            if not all(ok for _, _, _, ok, _ in run_case(check, candidate)):
+                config = candidate
+                break
+        else:
+            return config
+
+
+def _config_text(config):
+    return " ".join(f"{key}={value}" for key, value in config.items())
+
+
+def run(max_cards=3, max_depth=6, solver_cards=2, max_moves=5, csv_file=None, checks=None, out=sys.stdout):
+    """
+    Run every case of case_space; returns the list of result rows
+    (check, config, engine, reference seconds, engine seconds, ok, detail).
+    The first failing configuration of each check is shrunk and reported.
+    """
+    import baseline_reference as baseline
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        cases = [(check, config) for check, config in case_space(max_cards, max_depth, solver_cards, max_moves)
+                 if not checks or check in checks]
+        if csv_file is None and any(check == "solver" for check, _ in cases):
+            largest = max(sum(config[key]) for check, config in cases if check == "solver"
+                          for key in ("player1", "player2"))
+            csv_file = reference_results_csv(baseline, largest, workdir)
+
+        def run_case(check, config):
+            if check == "enumeration":
+                return check_enumeration(baseline, config["hand_size"], config["max_depth"], workdir)
+            if check == "counts":
+                return check_counts(baseline, config["player1"], config["player2"], config["max_depth"])
+            if check == "symmetry":
+                return check_symmetry(config["hand_size"], config["max_depth"])
+            if check == "aggregation":
+                return check_aggregation(baseline, config["hand_size"], config["max_depth"], workdir)
+            if check == "opponent":
+                return check_opponent(baseline, config["hand_size"], config["max_depth"], workdir)
+            return check_solver(baseline, config["player1"], config["player2"], config["max_moves"], csv_file,
+                                workdir)
+
+        shrunk = set()
+        for check, config in cases:
+            results = run_case(check, config)
+            config_text = _config_text(config)
+            for engine, ref_time, fast_time, ok, detail in results:
+                speedup = ref_time / fast_time if fast_time > 0 else float("inf")
+                rows.append((check, config_text, engine, ref_time, fast_time, ok, detail))
+                print(f"{'ok  ' if ok else 'FAIL'} {check:11s} {config_text:45s} {engine:31s} "
+                      f"{ref_time * 1000:9.2f} ms -> {fast_time * 1000:9.2f} ms  x{speedup:7.1f}  {detail}",
+                      file=out)
+            if check not in shrunk and not all(ok for _, _, _, ok, _ in results):
+                shrunk.add(check)
+                print(f"     {check}: minimal failing configuration {_config_text(shrink(run_case, check, config))}",
+                      file=out)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Differential checks of optimized engines")
+    parser.add_argument("--max-cards", type=int, default=3, help="largest hand of the enumeration/count checks")
+    parser.add_argument("--max-depth", type=int, default=6)
+    parser.add_argument("--solver-cards", type=int, default=2, help="largest hand of the solver checks")
+    parser.add_argument("--max-moves", type=int, default=5)
+    parser.add_argument("--csv", default=None,
+                        help="results CSV for the solver checks (default: generated with the baseline pipeline)")
+    parser.add_argument("--check", action="append", choices=CHECKS)
+    args = parser.parse_args()
+
+    rows = run(args.max_cards, args.max_depth, args.solver_cards, args.max_moves, args.csv, args.check)
+    failures = [row for row in rows if not row[5]]
+    print(f"{len(rows) - len(failures)}/{len(rows)} engine runs match their reference")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,108 @@
+"""
+Memoized outcome counting on integer-encoded states (see state_codec.py).
+
+Produces the same per-starting-hand win counts as the outcomes of find_all_game_outcomes in
+"all state.py", tallied per starting pair (the format of init.py's calculate_statistics), for any
+hand size and deck (deck.py). init.py's own find_all_game_outcomes plays by other rules and gives
+other counts. Instead of walking (and storing) every action sequence, identical states are
+merged: they are memoized under canonical_state with horizon max_depth. Positions that
+max_depth cannot cut off are counted once, whatever their step, seat to move or count of the
+last play; results are swapped back to the actual seats.
+"""
+from deck import HAND_SIZE, starting_hands
+from state_codec import canonical_state, encode_state, successors, is_terminal, challenge_winner, step
+
+# Explicit enumerations larger than this many nodes are replaced by memoized counting
+DEFAULT_NODE_BUDGET = 10 ** 7
+
+
+def count_state(state, max_depth=100, memo=None):
+    """
+    (P1_wins, P2_wins) over all games continuing from a non-terminal state,
+    using the "all state.py" rules (challenge forced once either hand is empty).
+    memo maps canonical_state(state, max_depth) -> (wins of the player to move, wins of the other)
+    and can be shared between calls with the same max_depth.
+    """
+    if memo is None:
+        memo = {}
+
+    def count(state):
+        key, swapped = canonical_state(state, max_depth)
+        cached = memo.get(key)
+        if cached is not None:
+            return cached[::-1] if swapped else cached
+        p1_wins = p2_wins = 0
+        if step(state) <= max_depth:
+            for _, child in successors(state, forced_when_any_empty=True):
+                if is_terminal(child):
+                    if challenge_winner(child) == 1:
+                        p1_wins += 1
+                    else:
+                        p2_wins += 1
+                else:
+                    child_p1, child_p2 = count(child)
+                    p1_wins += child_p1
+                    p2_wins += child_p2
+        memo[key] = (p2_wins, p1_wins) if swapped else (p1_wins, p2_wins)
+        return p1_wins, p2_wins
+
+    return count(state)
+
+
+def count_outcomes(player1, player2, max_depth=100, memo=None):
+    """
+    Count P1 and P2 wins over all games from the given starting hands (see count_state).
+    """
+    return count_state(encode_state(1, player1, player2), max_depth, memo)
+
+
+def count_all_outcomes(max_depth=100, hand_size=HAND_SIZE, deck=None):
+    """
+    Same output as init.py's calculate_statistics applied to the outcomes of "all state.py"'s
+    find_all_game_outcomes(max_depth, hand_size, deck).
+    """
+    statistics = {}
+    memo = {}
+    for player1, player2 in starting_hands(hand_size, deck):
+        p1_wins, p2_wins = count_outcomes(player1, player2, max_depth, memo)
+        statistics[(player1, player2)] = {"P1_wins": p1_wins, "P2_wins": p2_wins, "total": p1_wins + p2_wins}
+    return statistics
+
+
+def count_nodes(state, max_depth=100, memo=None):
+    """
+    Number of states an explicit enumeration (find_all_game_outcomes, checkpoint.run_enumeration)
+    visits from state, itself and terminal states included. Computed on merged states, so it
+    costs as much as count_state however large the explicit tree is.
+    """
+    if memo is None:
+        memo = {}
+
+    def size(state):
+        key, _ = canonical_state(state, max_depth)
+        cached = memo.get(key)
+        if cached is not None:
+            return cached
+        total = 1
+        if not is_terminal(state) and step(state) <= max_depth:
+            for _, child in successors(state, forced_when_any_empty=True):
+                total += size(child)
+        memo[key] = total
+        return total
+
+    return size(state)
+
+
+def explicit_enumeration_size(max_depth=100, hand_size=HAND_SIZE, deck=None):
+    """
+    Total number of states visited by an explicit enumeration of every starting pair.
+    """
+    memo = {}
+    return sum(count_nodes(encode_state(1, player1, player2), max_depth, memo)
+               for player1, player2 in starting_hands(hand_size, deck))
+
+
+if __name__ == "__main__":
+    statistics = count_all_outcomes(max_depth=50)
+    for state, stats in statistics.items():
+        print(f"Initial State {state}: P1 Wins = {stats['P1_wins']}, P2 Wins = {stats['P2_wins']}, Total Games = {stats['total']}")
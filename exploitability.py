@@ -0,0 +1,307 @@
+"""
+Best-response and exploitability calculator for any strategy.
+
+A policy is a function decision_state -> [probability of each legal move], where the decision
+state is the dict of strategies.py. strategy_policy wraps any strategies.Strategy.
+
+Utilities are win probabilities (a game cut off at max_moves counts as half a win each), so the
+game is zero-sum and exploitability is well defined:
+
+    exploitability = opponent's best-response value - opponent's value in the game
+
+Every policy and both seats are evaluated on one GameGraph: all starting pairs of hand_size
+cards, expanded level by level up to max_moves. Node (state, history key) pairs are unique in
+the graph, and a policy is queried once per (player, state, history key) through a cache that
+can be shared between the two information models. The best response is one forward pass
+(reach probabilities of the policy, times the prior of the deal) and one backward pass, in
+which the opponent picks one move per information set:
+
+  - "node":    the opponent knows both hands, so every node is its own information set; the
+               game value is the complete-information minimax value (minimax_value).
+  - "infoset": the opponent knows only its own hand and the history, (opponent hand, history
+               key); the game value is the equilibrium of the same hidden-hand game, solved by
+               sequence_form with observe_types=True (needs SciPy).
+"""
+import state_codec as codec
+from csv_stream import action_code, action_text
+from deck import HAND_SIZE
+
+
+def strategy_policy(strategy):
+    """
+    Policy function of a strategies.Strategy. Deterministic adapters (CachedDecisionStrategy)
+    give a one-hot distribution, "play randomly" decisions and RandomStrategy give uniform ones.
+    Precomputation (prepare_job) is run in-process on first use.
+    """
+    def policy(state):
+        key = strategy.prepare_key(state)
+        if key is not None and not strategy.is_prepared(key):
+            function, args = strategy.prepare_job(key)
+            strategy.install(key, function(*args))
+        n_moves = len(state["legal_moves"])
+        decide = getattr(strategy, "decide", None)
+        index = decide(state) if decide is not None else None
+        if index is None:
+            return [1.0 / n_moves] * n_moves
+        return [1.0 if i == index else 0.0 for i in range(n_moves)]
+    return policy
+
+
+def _terminal_value(state, player):
+    return 1.0 if codec.challenge_winner(state) == player else 0.0
+
+
+def minimax_value(player1_start, player2_start, player, max_moves=15, memo=None):
+    """
+    Complete-information value (win probability) of player when both sides play optimally.
+    Win probabilities only depend on the state, so the search is memoized on
+    codec.canonical_state with horizon max_moves - 1 (the last step that is still searched):
+    positions that the cut-off cannot reach are merged across steps and seats. memo maps the key
+    to the value of the player to move, and can be shared between calls (any starting hands,
+    either player) with the same max_moves.
+    """
+    if memo is None:
+        memo = {}
+
+    def mover_value(state):
+        key, _ = codec.canonical_state(state, max_moves - 1)
+        if key in memo:
+            return memo[key]
+        if codec.step(state) >= max_moves:
+            result = 0.5
+        else:
+            to_move = codec.current_player(state)
+            result = max(
+                _terminal_value(child, to_move) if codec.is_terminal(child) else 1.0 - mover_value(child)
+                for _, child in codec.successors(state)
+            )
+        memo[key] = result
+        return result
+
+    root_value = mover_value(codec.encode_state(1, player1_start, player2_start))
+    return root_value if player == 1 else 1.0 - root_value
+
+
+class GameGraph:
+    """
+    The game of every starting pair of hand_size cards, one level per step, as lists:
+        levels[d]["state"][i]         state_codec state of node i of level d
+        levels[d]["parent"][i]        index of its parent in level d - 1 (-1 on level 0)
+        levels[d]["move"][i]          move that led to it (-1 on level 0)
+        levels[d]["start"][i]         index of its starting pair in starts
+        levels[d]["history_key"][i]   "Player 1 play_true 2 -> ..." as in strategies.py
+        levels[d]["first_child"][i], levels[d]["n_children"][i]   children in level d + 1
+    Challenges end the game, and nodes at step max_moves are not expanded.
+    """
+
+    def __init__(self, hand_size=HAND_SIZE, max_moves=15):
+        self.hand_size = hand_size
+        self.max_moves = max_moves
+        hands = [(t, hand_size - t) for t in range(hand_size + 1)]
+        self.starts = [(hand1, hand2) for hand1 in hands for hand2 in hands]
+        self.prior = 1.0 / len(self.starts)
+        self._game_values = {}
+
+        n = len(self.starts)
+        level = {
+            "state": [codec.encode_state(1, hand1, hand2) for hand1, hand2 in self.starts],
+            "parent": [-1] * n,
+            "move": [-1] * n,
+            "start": list(range(n)),
+            "history_key": [""] * n,
+        }
+        self.levels = [level]
+        for _ in range(max_moves):
+            child = {"state": [], "parent": [], "move": [], "start": [], "history_key": []}
+            first_child = []
+            n_children = []
+            for i, (state, start, key) in enumerate(zip(level["state"], level["start"], level["history_key"])):
+                first_child.append(len(child["state"]))
+                if codec.is_terminal(state):
+                    n_children.append(0)
+                    continue
+                player = codec.current_player(state)
+                options = codec.successors(state)
+                for move, child_state in options:
+                    text = action_text(action_code(player, move))
+                    child["state"].append(child_state)
+                    child["parent"].append(i)
+                    child["move"].append(move)
+                    child["start"].append(start)
+                    child["history_key"].append(f"{key} -> {text}" if key else text)
+                n_children.append(len(options))
+            level["first_child"] = first_child
+            level["n_children"] = n_children
+            if not child["state"]:
+                break
+            self.levels.append(child)
+            level = child
+        level.setdefault("first_child", [len(level["state"])] * len(level["state"]))
+        level.setdefault("n_children", [0] * len(level["state"]))
+
+    def num_nodes(self):
+        return sum(len(level["state"]) for level in self.levels)
+
+    def reach(self, policy, player, policy_cache=None):
+        """
+        Per level, the probability of reaching each node when player follows policy and the
+        opponent plays every move, times the prior of the deal. policy_cache maps
+        (player, state, history key) to the policy's move probabilities.
+        """
+        if policy_cache is None:
+            policy_cache = {}
+        level = self.levels[0]
+        reach = [[self.prior] * len(level["state"])]
+        histories = [[] for _ in level["state"]]
+        for depth in range(1, len(self.levels)):
+            parent_level, level = level, self.levels[depth]
+            parent_reach = reach[-1]
+            child_reach = [0.0] * len(level["state"])
+            child_histories = [None] * len(level["state"])
+            for i, state in enumerate(parent_level["state"]):
+                n_children = parent_level["n_children"][i]
+                if not n_children:
+                    continue
+                first = parent_level["first_child"][i]
+                mover = codec.current_player(state)
+                actions = [codec.move_to_action(mover, move) for move in level["move"][first:first + n_children]]
+                for j, action in enumerate(actions):
+                    child_histories[first + j] = histories[i] + [action]
+                if mover != player:
+                    child_reach[first:first + n_children] = [parent_reach[i]] * n_children
+                    continue
+                key = (player, state, parent_level["history_key"][i])
+                probs = policy_cache.get(key)
+                if probs is None:
+                    player1_start, player2_start = self.starts[parent_level["start"][i]]
+                    probs = policy_cache[key] = policy({
+                        "player": player,
+                        "state": state,
+                        "history": histories[i],
+                        "history_key": parent_level["history_key"][i],
+                        "legal_moves": actions,
+                        "player1_start": player1_start,
+                        "player2_start": player2_start,
+                        "rng": None,
+                    })
+                child_reach[first:first + n_children] = [parent_reach[i] * prob for prob in probs]
+            reach.append(child_reach)
+            histories = child_histories
+        return reach
+
+    def best_response_value(self, policy, player, information="node", policy_cache=None):
+        """
+        Win probability of the opponent of player, averaged over the deals, when it
+        best-responds to policy: one move per node ("node") or per (opponent hand, history key)
+        ("infoset").
+        """
+        if information not in ("node", "infoset"):
+            raise ValueError(f"unknown information model {information!r}")
+        opponent = 3 - player
+        reach = self.reach(policy, player, policy_cache)
+
+        # values[i]: reach-weighted win probability of the opponent below node i of the level
+        values = None
+        for depth in range(len(self.levels) - 1, -1, -1):
+            level = self.levels[depth]
+            level_reach = reach[depth]
+            child_values = values
+            values = [0.0] * len(level["state"])
+            infosets = {}
+            for i, state in enumerate(level["state"]):
+                n_children = level["n_children"][i]
+                if codec.is_terminal(state):
+                    values[i] = level_reach[i] if codec.challenge_winner(state) == opponent else 0.0
+                elif not n_children:
+                    values[i] = 0.5 * level_reach[i]
+                elif codec.current_player(state) == player:
+                    first = level["first_child"][i]
+                    values[i] = sum(child_values[first:first + n_children])
+                elif information == "node":
+                    first = level["first_child"][i]
+                    values[i] = max(child_values[first:first + n_children])
+                else:
+                    key = (codec.hand(state, opponent), level["history_key"][i])
+                    infosets.setdefault(key, []).append(i)
+
+            # The nodes of an information set share the opponent's legal moves
+            for nodes in infosets.values():
+                firsts = level["first_child"]
+                totals = [sum(child_values[firsts[i] + j] for i in nodes)
+                          for j in range(level["n_children"][nodes[0]])]
+                best = totals.index(max(totals))
+                for i in nodes:
+                    values[i] = child_values[firsts[i] + best]
+        return sum(values)
+
+    def game_value(self, player, information="node"):
+        """
+        Win probability of player when both sides play an equilibrium, averaged over the deals.
+        """
+        if information not in self._game_values:
+            if information == "node":
+                memo = {}
+                value = sum(self.prior * minimax_value(player1_start, player2_start, 1, self.max_moves, memo)
+                            for player1_start, player2_start in self.starts)
+            elif information == "infoset":
+                from sequence_form import build_sequence_form, solve_sequence_form
+
+                solution = solve_sequence_form(build_sequence_form(self.hand_size, self.max_moves,
+                                                                   observe_types=True))
+                value = solution["p1_win_probability"]
+            else:
+                raise ValueError(f"unknown information model {information!r}")
+            self._game_values[information] = value
+        value = self._game_values[information]
+        return value if player == 1 else 1.0 - value
+
+
+def exploitability(policy, information="node", max_moves=15, hand_size=HAND_SIZE, graph=None, policy_cache=None):
+    """
+    Exploitability of policy in both seats, averaged over the starting hands
+    (uniform over the (k, hand_size - k) splits for each player). Pass the same graph to
+    evaluate several policies, and the same policy_cache to evaluate one policy under both
+    information models.
+    """
+    if graph is None:
+        graph = GameGraph(hand_size, max_moves)
+    if policy_cache is None:
+        policy_cache = {}
+    report = {}
+    for player in (1, 2):
+        best_response = graph.best_response_value(policy, player, information, policy_cache)
+        game_value = graph.game_value(3 - player, information)
+        report[f"player{player}"] = {
+            "best_response_value": best_response,
+            "game_value": game_value,
+            "exploitability": best_response - game_value,
+        }
+    report["exploitability"] = (report["player1"]["exploitability"] + report["player2"]["exploitability"]) / 2
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from strategies import BayesianStrategy, CsvPolicyStrategy, RandomStrategy, SpeStrategy
+
+    informations = ("node", "infoset")
+    try:
+        import scipy  # noqa: F401  (optional dependency, only needed for the infoset game value)
+    except ImportError:
+        print("scipy is not installed (optional dependency: pip install scipy); the infoset game value "
+              "needs its LP solver, so only the node model is reported", file=sys.stderr)
+        informations = ("node",)
+
+    csv_file = "game_results.csv"
+    start = time.perf_counter()
+    graph = GameGraph()
+    print(f"Game graph: {graph.num_nodes()} nodes ({time.perf_counter() - start:.2f}s)")
+    for strategy in (CsvPolicyStrategy(csv_file), SpeStrategy(csv_file), BayesianStrategy(csv_file), RandomStrategy()):
+        policy = strategy_policy(strategy)
+        policy_cache = {}
+        for information in informations:
+            start = time.perf_counter()
+            report = exploitability(policy, information, graph=graph, policy_cache=policy_cache)
+            elapsed = time.perf_counter() - start
+            print(f"{strategy.name:10s} {information:8s} {report}  ({elapsed:.2f}s)")
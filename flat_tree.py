@@ -0,0 +1,231 @@
+import numpy as np
+from collections import deque, namedtuple
+
+from rng_streams import RandomStreams
+
+
+###############################################################################
+# 把 build_game_tree 得到的 dict 树压平成数组(CSR 风格的 child-offset 表示)
+###############################################################################
+FlatTree = namedtuple(
+    "FlatTree",
+    ["node_ids", "states", "child_offsets", "children", "payoff_p1", "payoff_p2", "steps"]
+)
+FlatTree.__doc__ = """
+压平后的博弈树，节点按 BFS 顺序编号，下标 0 为根节点：
+  - node_ids[i]       : 第 i 个节点在 node_lookup 中的 node_id
+  - states[i]         : 第 i 个节点的整数状态编码(state_codec)
+  - child_offsets[i]  : 第 i 个节点的孩子在 children 中的起始位置，
+                        孩子为 children[child_offsets[i]:child_offsets[i + 1]]
+  - children          : 所有孩子的下标(不是 node_id)
+  - payoff_p1/p2[i]   : 第 i 个节点的累积收益
+  - steps[i]          : 第 i 个节点的步数(从根到该节点的动作数)
+"""
+
+
+def flatten_game_tree(game_tree, node_lookup, root_id):
+    """
+    从 root_id 出发做 BFS，把 game_tree / node_lookup 转换成 FlatTree。
+    孩子的顺序与 game_tree[node_id] 中的顺序一致。
+    """
+    order = [root_id]
+    index_of = {root_id: 0}
+    child_offsets = [0]
+    children = []
+
+    queue = deque([root_id])
+    while queue:
+        nid = queue.popleft()
+        for cid in game_tree.get(nid, ()):
+            index_of[cid] = len(order)
+            order.append(cid)
+            children.append(index_of[cid])
+            queue.append(cid)
+        child_offsets.append(len(children))
+
+    return FlatTree(
+        node_ids=np.array(order, dtype=np.int64),
+        states=np.array([node_lookup[nid]["state"] for nid in order], dtype=np.int64),
+        child_offsets=np.array(child_offsets, dtype=np.int64),
+        children=np.array(children, dtype=np.int64),
+        payoff_p1=np.array([node_lookup[nid]["payoff"][0] for nid in order], dtype=np.float64),
+        payoff_p2=np.array([node_lookup[nid]["payoff"][1] for nid in order], dtype=np.float64),
+        steps=np.array([node_lookup[nid]["steps"] for nid in order], dtype=np.int64),
+    )
+
+
+###############################################################################
+# 批量随机路径采样：一次推进一整批路径，只累计统计量，不保存路径本身
+###############################################################################
+def _merge_moments(count_a, mean_a, m2_a, count_b, mean_b, m2_b):
+    """
+    合并两组样本的 (数量, 均值, 二阶中心矩之和)，即 Chan 等人的并行方差公式。
+    """
+    count = count_a + count_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * count_b / count
+    m2 = m2_a + m2_b + delta * delta * count_a * count_b / count
+    return count, mean, m2
+
+
+def sample_random_paths(flat_tree, num_paths, batch_size=65536, seed=None):
+    """
+    与 random_path_from_root_to_leaf 相同的随机策略(每一步在孩子中均匀随机选择)，
+    但一次推进 batch_size 条路径，只统计终局收益和路径长度。
+    seed 可以是整数、SeedSequence 或 RandomStreams(见 rng_streams)；第 b 批路径使用
+    独立的随机流 streams.batch(b)，同样的 seed 和 batch_size 得到逐位相同的结果，
+    各批也可以分给不同的进程计算。num_paths 和 batch_size 必须至少为 1，否则抛出 ValueError。
+
+    返回 dict:
+      {
+        "num_paths": int,
+        "mean": (p1_mean, p2_mean),        # 终局收益均值
+        "var": (p1_var, p2_var),           # 终局收益方差(总体方差)
+        "length_counts": {steps: count}    # 终局节点步数的分布
+      }
+    """
+    if num_paths < 1:
+        raise ValueError(f"num_paths 必须至少为 1，收到 {num_paths}")
+    if batch_size < 1:
+        raise ValueError(f"batch_size 必须至少为 1，收到 {batch_size}")
+    streams = RandomStreams(seed)
+    offsets = flat_tree.child_offsets
+    child_counts = offsets[1:] - offsets[:-1]
+    max_steps = int(flat_tree.steps.max())
+
+    count = 0
+    mean = np.zeros(2)
+    m2 = np.zeros(2)
+    length_counts = np.zeros(max_steps + 1, dtype=np.int64)
+
+    remaining = num_paths
+    batch = 0
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        remaining -= size
+        rng = streams.batch(batch).numpy()
+        batch += 1
+
+        current = np.zeros(size, dtype=np.int64)
+        while True:
+            n_children = child_counts[current]
+            moving = np.flatnonzero(n_children > 0)
+            if moving.size == 0:
+                break
+            picks = (rng.random(moving.size) * n_children[moving]).astype(np.int64)
+            current[moving] = flat_tree.children[offsets[current[moving]] + picks]
+
+        payoffs = np.stack([flat_tree.payoff_p1[current], flat_tree.payoff_p2[current]], axis=1)
+        batch_mean = payoffs.mean(axis=0)
+        batch_m2 = ((payoffs - batch_mean) ** 2).sum(axis=0)
+        count, mean, m2 = _merge_moments(count, mean, m2, size, batch_mean, batch_m2)
+        length_counts += np.bincount(flat_tree.steps[current], minlength=max_steps + 1)
+
+    return {
+        "num_paths": count,
+        "mean": (float(mean[0]), float(mean[1])),
+        "var": (float(m2[0] / count), float(m2[1] / count)),
+        "length_counts": {steps: int(c) for steps, c in enumerate(length_counts) if c > 0},
+    }
+
+
+def print_sample_statistics(stats):
+    """
+    打印 sample_random_paths 的统计结果。
+    """
+    print(f"\n===== 随机路径统计 (共 {stats['num_paths']} 条) =====")
+    print(f"Player 1 平均收益: {stats['mean'][0]:.4f}  方差: {stats['var'][0]:.4f}")
+    print(f"Player 2 平均收益: {stats['mean'][1]:.4f}  方差: {stats['var'][1]:.4f}")
+    print("路径长度分布:")
+    for steps, c in sorted(stats["length_counts"].items()):
+        print(f"  {steps:3d} 步: {c}")
+    print("")
+
+
+###############################################################################
+# 精确期望收益：自底向上一次线性扫描，代替随机采样
+###############################################################################
+def uniform_edge_probs(flat_tree):
+    """
+    均匀随机策略：每个节点在自己的孩子中等概率选择。
+    返回与 flat_tree.children 对齐的边概率数组。
+    """
+    offsets = flat_tree.child_offsets
+    child_counts = offsets[1:] - offsets[:-1]
+    return 1.0 / np.repeat(child_counts, child_counts).astype(np.float64)
+
+
+def strategy_to_edge_probs(flat_tree, strategy):
+    """
+    把按节点给出的混合策略转换成边概率数组。
+    strategy[node_id] = [prob_1, prob_2, ...]，顺序与 game_tree[node_id] 中的孩子顺序一致；
+    strategy 中没有出现的节点按均匀随机处理。
+    """
+    edge_probs = uniform_edge_probs(flat_tree)
+    offsets = flat_tree.child_offsets
+    for i, nid in enumerate(flat_tree.node_ids.tolist()):
+        if nid not in strategy:
+            continue
+        lo, hi = offsets[i], offsets[i + 1]
+        probs = np.asarray(strategy[nid], dtype=np.float64)
+        if probs.shape != (hi - lo,):
+            raise ValueError(f"节点 {nid} 有 {hi - lo} 个孩子，但策略给出了 {probs.size} 个概率")
+        if not np.isclose(probs.sum(), 1.0):
+            raise ValueError(f"节点 {nid} 的策略概率之和为 {probs.sum()}，不等于1")
+        edge_probs[lo:hi] = probs
+    return edge_probs
+
+
+def expected_payoffs(flat_tree, edge_probs=None):
+    """
+    计算在给定边概率(默认均匀随机)下，从每个节点出发的终局收益期望。
+    BFS 编号保证同一深度的节点连续，因此从最深一层往上逐层计算即可，总计一次线性扫描。
+
+    返回 (value_p1, value_p2) 两个数组，下标与 flat_tree 一致；根节点的期望为 value[0]。
+    """
+    if edge_probs is None:
+        edge_probs = uniform_edge_probs(flat_tree)
+    offsets = flat_tree.child_offsets
+    children = flat_tree.children
+    values = np.stack([flat_tree.payoff_p1, flat_tree.payoff_p2], axis=1)
+
+    # 每一层在 BFS 顺序中的起止位置
+    level_bounds = np.searchsorted(flat_tree.steps, np.arange(flat_tree.steps.max() + 2))
+    for depth in range(len(level_bounds) - 2, -1, -1):
+        lo, hi = level_bounds[depth], level_bounds[depth + 1]
+        internal = lo + np.flatnonzero(offsets[lo + 1:hi + 1] > offsets[lo:hi])
+        if internal.size == 0:
+            continue
+        edge_lo, edge_hi = offsets[lo], offsets[hi]
+        weighted = edge_probs[edge_lo:edge_hi, None] * values[children[edge_lo:edge_hi]]
+        values[internal] = np.add.reduceat(weighted, offsets[internal] - edge_lo, axis=0)
+
+    return values[:, 0], values[:, 1]
+
+
+def print_expected_payoff(value_p1, value_p2):
+    """
+    打印根节点的精确期望收益，对应 print_average_payoff 的采样估计。
+    """
+    print("\n===== 期望 Payoff (精确值) =====")
+    print(f"Player 1 期望收益: {value_p1[0]:.4f}")
+    print(f"Player 2 期望收益: {value_p2[0]:.4f}\n")
+
+
+if __name__ == "__main__":
+    from game import build_game_tree
+
+    game_tree, node_lookup, root_id = build_game_tree(
+        player1_start=(2, 3),
+        player2_start=(5, 0),
+        csv_file="game_results.csv",
+        max_moves=15
+    )
+    flat = flatten_game_tree(game_tree, node_lookup, root_id)
+    print("压平完成，节点总数 =", len(flat.node_ids))
+
+    stats = sample_random_paths(flat, num_paths=10 ** 6, seed=0)
+    print_sample_statistics(stats)
+
+    value_p1, value_p2 = expected_payoffs(flat)
+    print_expected_payoff(value_p1, value_p2)
@@ -1,18 +1,28 @@
-import pandas as pd
 from collections import defaultdict
+import state_codec as codec
 n = 2
 m = 3
 k = 5
 p = 0
 ###############################################################################
-# 全局自增节点ID，用于给每个节点分配唯一ID
+# 建树器：每棵树自己的节点ID空间
 ###############################################################################
-_global_node_id_counter = 0
+class TreeBuilder:
+    """
+    一棵树的 game_tree / node_lookup 和它的节点ID分配器。
+    ID 从 0 开始连续分配(根节点为 0)，所以 ID 可以直接当数组下标用；
+    每棵树各用一个 TreeBuilder，没有模块级的可变状态，多棵树可以在不同线程或进程里同时构建。
+    """
+
+    def __init__(self):
+        self.game_tree = defaultdict(list)
+        self.node_lookup = {}
+        self.num_ids = 0
 
-def get_next_node_id():
-    global _global_node_id_counter
-    _global_node_id_counter += 1
-    return _global_node_id_counter
+    def new_id(self):
+        nid = self.num_ids
+        self.num_ids += 1
+        return nid
 
 
 ###############################################################################
@@ -53,6 +63,42 @@ def format_path(history, current_action):
     return " -> ".join(formatted_actions)
 
 
+def state_options(state):
+    """
+    整数状态 state 下的全部 (move, child_state, action, forced)，顺序与 get_possible_moves 相同。
+    action 是写进 history 的动作字典；forced=True 表示当前玩家无牌可打、只能 challenge(收益为 ±3)。
+    """
+    player = codec.current_player(state)
+    t_cards, f_cards = codec.hand(state, player)
+    forced = (t_cards + f_cards) == 0
+    return [(move, child_state, codec.move_to_action(player, move), forced)
+            for move, child_state in codec.successors(state)]
+
+
+def path_trie(path_probs):
+    """
+    把 load_path_probabilities 得到的 {Path: prob} 建成以整数为键的字典树，
+    建树时沿着 (父路径编号, 玩家, move) 往下查，不用再给每个节点拼接路径字符串。
+    返回 (trie, probs)：trie[(parent_path_id, player, move)] = path_id，根(空路径)为 0；
+    probs[path_id] 为该路径的 prob，只是前缀、CSV 中没有该行时为 None。
+    """
+    trie = {}
+    probs = [None]
+    for path, prob in path_probs.items():
+        path_id = 0
+        for token in path.split(" -> "):
+            parts = token.split()
+            player = int(parts[1])
+            count = int(parts[3]) if len(parts) > 3 else 0
+            key = (path_id, player, codec.encode_move(codec.ACTION_CODES[parts[2]], count))
+            if key not in trie:
+                trie[key] = len(probs)
+                probs.append(None)
+            path_id = trie[key]
+        probs[path_id] = prob
+    return trie, probs
+
+
 ###############################################################################
 # 第1部分：构建博弈树，并将收益累加存储在节点的 "payoff" 中
 ###############################################################################
@@ -60,7 +106,9 @@ def build_game_tree(
     player1_start=(n, m), 
     player2_start=(k, p), 
     csv_file="game_results.csv", 
-    max_moves=15
+    max_moves=15,
+    path_probs=None,
+    results_dir=None
 ):
     """
     构建游戏树(序贯博弈树)并返回 (game_tree, node_lookup, root_id):
@@ -69,33 +117,46 @@ def build_game_tree(
         
       - node_lookup[node_id] = {
            "node_id": int,
+           "state": int,                        # state_codec 的整数编码
            "current_player": 1 or 2,
            "p1_hand": (true_cards1, fake_cards1),
            "p2_hand": (true_cards2, fake_cards2),
            "history": [ {action1}, {action2}, ... ],
            "payoff": (p1_payoff, p2_payoff),   # 累积收益(根->该节点)
-           "steps": int
+           "steps": int,
+           "path_id": int                       # 根到该节点的路径在 path_trie 中的编号，CSV 中没有时为 -1
         }
         
-      - root_id : 根节点ID。
+      - root_id : 根节点ID(总是 0，节点ID为 0..len(node_lookup)-1，见 TreeBuilder)。
+    path_probs 为已读好的 {Path: prob}(见 load_path_probabilities)；为 None 时只读这一对起手牌的行，
+    给出 results_dir 时从分区目录读，否则从 csv_file 读。
     """
-    data = pd.read_csv(csv_file)
+    # 流式读入这一对起手牌的路径概率，建成以整数为键的路径字典树
+    if path_probs is None:
+        path_probs = load_path_probabilities(csv_file, start=(player1_start, player2_start),
+                                             results_dir=results_dir)
+    trie_table = path_trie(path_probs)
 
+    builder = TreeBuilder()
     # 存储： node_id -> [child_id, child_id...]
-    game_tree = defaultdict(list)
+    game_tree = builder.game_tree
     # 存储： node_id -> node 信息
-    node_lookup = {}
+    node_lookup = builder.node_lookup
+    # 同一个整数状态的合法动作和子状态只生成一次
+    options = {}
 
-    # 构造根节点
-    root_node_id = get_next_node_id()
+    # 构造根节点(ID 为 0)
+    root_node_id = builder.new_id()
     root_node = {
         "node_id": root_node_id,
+        "state": codec.encode_state(1, player1_start, player2_start),  # 整数编码的状态
         "current_player": 1,                   # 先手玩家
         "p1_hand": player1_start,
         "p2_hand": player2_start,
         "history": [],                         # 动作历史
         "payoff": (0.0, 0.0),                  # 根节点收益设为0(累积基准)
-        "steps": 0
+        "steps": 0,
+        "path_id": 0                           # 空路径在字典树中的编号
     }
     node_lookup[root_node_id] = root_node
 
@@ -110,115 +171,14 @@ def build_game_tree(
         if node["steps"] >= max_moves:
             continue
 
-        current_player = node["current_player"]
-        parent_payoff_p1, parent_payoff_p2 = node["payoff"]
-
-        if current_player == 1:
-            t_cards, f_cards = node["p1_hand"]
-        else:
-            t_cards, f_cards = node["p2_hand"]
-
-        # 如果该玩家手里没牌，则默认为只能挑战(或直接终局, 根据你游戏规则)
-        # 这里演示：自动发起challenge
-        if (t_cards + f_cards) == 0:
-            # 当前玩家无牌可打，只能 challenge（或你手动构造 challenge 分支）
-            move = {"player": current_player, "type": "challenge"}
-            path_str = format_path(node["history"], move)
-
-            # 读取 CSV(若有)或其它逻辑，算 probability
-            matched_row = data[data["Path"] == path_str]
-            if not matched_row.empty:
-                row4 = matched_row.iloc[0, 3]
-                row5 = matched_row.iloc[0, 4]
-                prob = row4 / (row4 + row5) if (row4 + row5) > 0 else 0.5
-            else:
-                prob = 0.5
-
-            # 根据上一手是否是 play_fake 判断挑战是否成功
-            last_a = node["history"][-1] if len(node["history"]) > 0 else None
-            challenge_succ = (last_a is not None and last_a["type"] == "play_fake")
-            winner = current_player if challenge_succ else (3 - current_player)
-
-            # 这里改成胜者 +3，输者 -3
-            if winner == 1:
-                payoff_step_p1, payoff_step_p2 = (3.0, -3.0)
-            else:
-                payoff_step_p1, payoff_step_p2 = (-3.0, 3.0)
-
-            # 累加到父节点的收益
-            parent_payoff_p1, parent_payoff_p2 = node["payoff"]
-            child_payoff_p1 = parent_payoff_p1 + payoff_step_p1
-            child_payoff_p2 = parent_payoff_p2 + payoff_step_p2
-
-            # 构造子节点(终局)
-            child_node = {
-                "node_id": get_next_node_id(),
-                "current_player": 3 - current_player,  # 挑战结束后通常不再行动
-                "p1_hand": node["p1_hand"],
-                "p2_hand": node["p2_hand"],
-                "history": node["history"] + [move],
-                "payoff": (child_payoff_p1, child_payoff_p2),  # 终局收益
-                "steps": node["steps"] + 1
-            }
-            node_lookup[child_node["node_id"]] = child_node
-            game_tree[node["node_id"]].append(child_node["node_id"])
-            # 挑战一般是终局，不再扩展后续
-            continue
-
-
-        # 否则，获取所有可行动作
-        first_move = (len(node["history"]) == 0)
-        moves = get_possible_moves(current_player, t_cards, f_cards, first_move)
-
-        for mv in moves:
-            path_str = format_path(node["history"], mv)
-            matched = data[data["Path"] == path_str]
-            if not matched.empty:
-                row4 = matched.iloc[0, 3]
-                row5 = matched.iloc[0, 4]
-                prob = row4 / (row4 + row5) if (row4 + row5) > 0 else 0.5
-            else:
-                prob = 0.5
-
-            # 这里示例：将 "prob" 作为本步的即时收益给 P1，(1-prob) 给 P2
-            # 实际游戏中可根据规则计算更复杂/多样的收益
-            payoff_step_p1 = prob
-            payoff_step_p2 = 1.0 - prob
-
-            # 累加到父节点收益
-            child_payoff_p1 = parent_payoff_p1 + payoff_step_p1
-            child_payoff_p2 = parent_payoff_p2 + payoff_step_p2
-
-            # 更新手牌
-            new_p1_hand = node["p1_hand"]
-            new_p2_hand = node["p2_hand"]
-            if current_player == 1:
-                if mv["type"] == "play_true":
-                    new_p1_hand = (node["p1_hand"][0] - mv["count"], node["p1_hand"][1])
-                elif mv["type"] == "play_fake":
-                    new_p1_hand = (node["p1_hand"][0], node["p1_hand"][1] - mv["count"])
-            else:  # current_player == 2
-                if mv["type"] == "play_true":
-                    new_p2_hand = (node["p2_hand"][0] - mv["count"], node["p2_hand"][1])
-                elif mv["type"] == "play_fake":
-                    new_p2_hand = (node["p2_hand"][0], node["p2_hand"][1] - mv["count"])
-
-            child_id = get_next_node_id()
-            child_node = {
-                "node_id": child_id,
-                "current_player": 3 - current_player,
-                "p1_hand": new_p1_hand,
-                "p2_hand": new_p2_hand,
-                "history": node["history"] + [mv],
-                # payoff 存储 累积收益(父节点 + 本步)
-                "payoff": (child_payoff_p1, child_payoff_p2),
-                "steps": node["steps"] + 1
-            }
+        for child_node, expandable in expand_node(node, trie_table, options):
+            child_id = builder.new_id()
+            child_node["node_id"] = child_id
             node_lookup[child_id] = child_node
             game_tree[current_id].append(child_id)
 
-            # 如果动作是 challenge，一般终局，也可视情况再判断是否压栈
-            if mv["type"] != "challenge":
+            # challenge 之后是终局，不再扩展
+            if expandable:
                 stack.append(child_id)
 
     return game_tree, node_lookup, root_node_id
@@ -227,9 +187,12 @@ def build_game_tree(
 ###############################################################################
 # 第2部分：逆推法 (Backward Induction) 求子博弈精炼纳什均衡
 ###############################################################################
-def backward_induction_spe(game_tree, node_lookup):
+def backward_induction_spe(game_tree, node_lookup, leaf_evaluator=None):
     """
     逆推法：对已构建好的 game_tree 执行子博弈精炼纳什均衡 (SPE) 求解。
+
+    leaf_evaluator(node) -> (p1, p2) 给出被 max_moves 截断的(非终局)节点之后的估计收益，
+    该节点的值为 node["payoff"] 加上这个估值；为 None 时直接用 node["payoff"]。见 table_leaf_evaluator。
     
     返回两个字典：
       best_payoff[node_id] = (p1_best, p2_best)
@@ -239,7 +202,6 @@ def backward_induction_spe(game_tree, node_lookup):
           表示 node_id 在最优策略下会选择走向哪个子节点(没有子节点则为None)
     """
     all_node_ids = list(node_lookup.keys())
-    game_tree_keys = set(game_tree.keys())
 
     # 1) 找到“终端节点”，即在 game_tree 中没有孩子的节点
     #    这些节点的 payoff 就是它们本身的累积收益，不需要再往下推
@@ -252,6 +214,9 @@ def backward_induction_spe(game_tree, node_lookup):
     for tid in terminal_nodes:
         node = node_lookup[tid]
         best_payoff[tid] = node["payoff"]  # (p1, p2)
+        if leaf_evaluator is not None and not codec.is_terminal(node["state"]):
+            estimate = leaf_evaluator(node)
+            best_payoff[tid] = (node["payoff"][0] + estimate[0], node["payoff"][1] + estimate[1])
         best_child[tid] = None            # 没有后续子节点
 
     # 2) 递归函数：若 best_payoff[nid] 未计算，则对其孩子做递归后，再选最优
@@ -300,6 +265,184 @@ def backward_induction_spe(game_tree, node_lookup):
     return best_payoff, best_child
 
 
+###############################################################################
+# 第2部分(续)：读入路径概率、生成子节点，以及建树 + 求解的组合入口
+###############################################################################
+def load_path_probabilities(csv_file="game_results.csv", data=None, start=None, results_dir=None):
+    """
+    一次性读入 CSV，建立 Path -> prob 的字典，避免每个节点都扫描整张表。
+    start=(P1 起手牌, P2 起手牌) 时只读这一对起手牌的行(csv_stream.load_path_counts(..., start=...))；
+    再给出 results_dir 时改从 count.update_partitioned_results 写的分区目录里只读这一对的分区。
+    不给 start 时读所有起手牌的行，同一个 Path 出现多次时取第一行(与 data[data["Path"] == path].iloc[0] 相同)。
+    也可以直接传入已读好的 DataFrame data。
+    prob 的算法与 build_game_tree 保持一致: row4 / (row4 + row5)，分母为0时取0.5。
+    """
+    if data is None:
+        # 不经过 DataFrame，直接用 csv_stream 分块流式读取
+        from csv_stream import format_hand, load_path_counts
+
+        if results_dir is not None and start is not None:
+            from count import load_partition_counts
+
+            counts = load_partition_counts(results_dir, format_hand(start[0]), format_hand(start[1]))
+        else:
+            counts = load_path_counts(csv_file, start=start)
+        return {
+            path: row4 / (row4 + row5) if (row4 + row5) > 0 else 0.5
+            for path, (row4, row5) in counts.items()
+        }
+    path_probs = {}
+    for path, row4, row5 in zip(data["Path"], data.iloc[:, 3], data.iloc[:, 4]):
+        if path in path_probs:
+            continue
+        path_probs[path] = row4 / (row4 + row5) if (row4 + row5) > 0 else 0.5
+    return path_probs
+
+
+def expand_node(node, trie_table, options=None):
+    """
+    按 build_game_tree 的规则生成 node 的全部子节点(尚未分配 node_id)。
+    trie_table 是 path_trie 返回的 (trie, probs)，子节点的 path_id 沿字典树往下查；
+    options 可传入一个字典，按整数状态缓存 state_options 的结果。
+    返回 [(child_node, expandable), ...]，顺序与 state_options 相同；
+    expandable=False 表示该子节点是挑战后的终局，不再往下展开。
+    """
+    trie, trie_probs = trie_table
+    state = node["state"]
+    if options is None:
+        state_moves = state_options(state)
+    else:
+        if state not in options:
+            options[state] = state_options(state)
+        state_moves = options[state]
+    current_player = node["current_player"]
+    parent_payoff_p1, parent_payoff_p2 = node["payoff"]
+    path_id = node["path_id"]
+
+    children = []
+    for move, child_state, mv, forced in state_moves:
+        child_path_id = trie.get((path_id, current_player, move), -1) if path_id >= 0 else -1
+        if forced:
+            # 当前玩家无牌可打，只能 challenge：胜者 +3，输者 -3
+            if codec.challenge_winner(child_state) == 1:
+                payoff_step_p1, payoff_step_p2 = (3.0, -3.0)
+            else:
+                payoff_step_p1, payoff_step_p2 = (-3.0, 3.0)
+        else:
+            # 将 CSV 里这条路径的 "prob" 作为本步的即时收益给 P1，(1-prob) 给 P2，查不到取 0.5
+            prob = trie_probs[child_path_id] if child_path_id >= 0 else None
+            payoff_step_p1 = 0.5 if prob is None else prob
+            payoff_step_p2 = 1.0 - payoff_step_p1
+
+        child_node = {
+            "node_id": None,
+            "state": child_state,
+            "current_player": 3 - current_player,
+            "p1_hand": codec.hand(child_state, 1),
+            "p2_hand": codec.hand(child_state, 2),
+            "history": node["history"] + [mv],
+            # payoff 存储 累积收益(父节点 + 本步)
+            "payoff": (parent_payoff_p1 + payoff_step_p1, parent_payoff_p2 + payoff_step_p2),
+            "steps": node["steps"] + 1,
+            "path_id": child_path_id
+        }
+        children.append((child_node, not codec.is_terminal(child_state)))
+    return children
+
+
+def lazy_equilibrium_search(
+    player1_start=(n, m),
+    player2_start=(k, p),
+    csv_file="game_results.csv",
+    max_moves=15,
+    path_probs=None,
+    leaf_evaluator=None,
+    results_dir=None
+):
+    """
+    build_game_tree + backward_induction_spe 的组合入口(沿用旧名，调用方不用改)：
+    可以传入已读好的 path_probs，被 max_moves 截断的节点可以用 leaf_evaluator 估值。
+    建树和求解都直接调用上面两个函数，不再另写一套子节点生成和求解逻辑，
+    所以结果(包括 best_child 的平局规则)与两者分开调用完全相同。
+
+    返回 (game_tree, node_lookup, root_id, best_payoff, best_child)。
+    """
+    game_tree, node_lookup, root_id = build_game_tree(
+        player1_start, player2_start, csv_file, max_moves, path_probs=path_probs, results_dir=results_dir
+    )
+    best_payoff, best_child = backward_induction_spe(game_tree, node_lookup, leaf_evaluator)
+    return game_tree, node_lookup, root_id, best_payoff, best_child
+
+
+###############################################################################
+# 第2部分(续2)：深度受限搜索的叶子估值
+###############################################################################
+def continuation_values(step_prob=0.5):
+    """
+    预计算的续值表：key = (p1_hand, p2_hand, current_player, last_action_fake)，
+    value = 从这样的(非首步)节点开始双方都按 SPE 行动时，之后还能得到的收益 (p1, p2)。
+
+    每一步的收益都按 (step_prob, 1 - step_prob) 计(CSV 里查不到的深层路径本来就取 0.5)，
+    无牌时强制 challenge 仍为 ±3，选择规则与 backward_induction_spe 相同。
+    每次出牌至少少一张牌，所以不设步数上限也一定会结束，表的大小只取决于手牌组合数。
+    返回查表函数 lookup(p1_hand, p2_hand, current_player, last_action_fake)，表按需填充，
+    可以在多次搜索之间共用。
+    """
+    table = {}
+
+    def value(state):
+        p1_hand = codec.hand(state, 1)
+        p2_hand = codec.hand(state, 2)
+        current_player = codec.current_player(state)
+        key = (p1_hand, p2_hand, current_player, codec.last_action(state)[0] == codec.PLAY_FAKE)
+        if key in table:
+            return table[key]
+
+        t_cards, f_cards = codec.hand(state, current_player)
+        best_val = None
+        for _, child_state in codec.successors(state):
+            if (t_cards + f_cards) == 0:
+                # 无牌可打：强制 challenge，胜者 +3，输者 -3
+                cp = (3.0, -3.0) if codec.challenge_winner(child_state) == 1 else (-3.0, 3.0)
+            elif codec.is_terminal(child_state):
+                cp = (step_prob, 1.0 - step_prob)
+            else:
+                rest = value(child_state)
+                cp = (step_prob + rest[0], 1.0 - step_prob + rest[1])
+            if best_val is None or cp[current_player - 1] > best_val[current_player - 1]:
+                best_val = cp
+        table[key] = best_val
+        return best_val
+
+    table_get = table.get
+
+    def lookup(p1_hand, p2_hand, current_player, last_action_fake):
+        key = (p1_hand, p2_hand, current_player, last_action_fake)
+        cached = table_get(key)
+        if cached is not None:
+            return cached
+        last_type = codec.PLAY_FAKE if last_action_fake else codec.PLAY_TRUE
+        # step=1：截断的节点都不是第一步，可以 challenge
+        return value(codec.encode_state(current_player, p1_hand, p2_hand, last_type, 1, 1))
+
+    return lookup
+
+
+def table_leaf_evaluator(step_prob=0.5):
+    """
+    lazy_equilibrium_search 的默认叶子估值：在 continuation_values 表里查截断节点的续值。
+    也可以换成任何 node -> (p1, p2) 的函数(例如学到的估值模型)。
+    """
+    lookup = continuation_values(step_prob)
+
+    def evaluate(node):
+        last = node["history"][-1] if node["history"] else None
+        last_action_fake = last is not None and last["type"] == "play_fake"
+        return lookup(node["p1_hand"], node["p2_hand"], node["current_player"], last_action_fake)
+
+    return evaluate
+
+
 ###############################################################################
 # 第3部分：打印SPE均衡路径
 ###############################################################################
@@ -335,13 +478,16 @@ def print_equilibrium_path(path_ids, node_lookup):
             print("    ", h)
         print("")
 
-import random
-
-def random_path_from_root_to_leaf(game_tree, node_lookup, root_id):
+def random_path_from_root_to_leaf(game_tree, node_lookup, root_id, rng=None):
     """
     从 root_id 出发，随机地挑选子节点走下去，直到走到某个无子节点(叶)为止。
     返回这条路径上所有节点ID的列表(从根到终端)。
+    rng 为随机数来源(种子、RandomStreams 或 random.Random，见 rng_streams)；
+    为 None 时与原来一样使用全局 random 模块，结果不可复现。
     """
+    from rng_streams import python_rng
+
+    rng = python_rng(rng)
     path_ids = []
     current_id = root_id
     while True:
@@ -351,7 +497,7 @@ def random_path_from_root_to_leaf(game_tree, node_lookup, root_id):
             # 到达终端节点，没有后继
             break
         # 随机选一个子节点
-        next_id = random.choice(children)
+        next_id = rng.choice(children)
         current_id = next_id
     return path_ids
 
@@ -425,8 +571,14 @@ if __name__ == "__main__":
     print_equilibrium_path(eq_path, node_lookup)
 
 
-     # 4) 随机挑选10条路径并打印
-    random_paths = [random_path_from_root_to_leaf(game_tree, node_lookup, root_id) for _ in range(100)]
+     # 4) 随机挑选10条路径并打印(固定种子，每条路径一个独立的随机流，结果可复现)
+    from rng_streams import RandomStreams
+
+    streams = RandomStreams(seed=0)
+    random_paths = [
+        random_path_from_root_to_leaf(game_tree, node_lookup, root_id, rng=streams.game(i).python())
+        for i in range(100)
+    ]
     for i, rpath in enumerate(random_paths, 1):
         print(f"\n===== 随机路径 {i} =====")
         print_path_info(rpath, node_lookup)
@@ -0,0 +1,177 @@
+"""
+Information-set index for the incomplete-information ("count only") variant.
+
+"incomplete all state.py" writes every full-information outcome with the play type removed
+("Player 1 2 -> Player 2 1 -> Player 1 "), and count2.py / count3.py then rebuild per-prefix win
+counts from those strings. Here the same counts are produced without any strings:
+
+  - an information set is a starting pair plus the count-only history (player and number of
+    cards of every play, challenges as count 0); the sets form a trie and each gets a dense id;
+  - full-information states are enumerated level by level with the "all state.py" rules, and
+    each node is mapped to its information set as it is generated. Nodes that share both their
+    information set and their state are merged (with a multiplicity), and the outcomes below a
+    node come from the memoized counter of enumerate_states, so no outcome is walked twice;
+  - win counts are accumulated per information-set id.
+
+infoset_rows gives the rows of count3.py (include_challenge=True) or count2.py
+(include_challenge=False); only the row order differs, because those scripts follow the order of
+the outcomes file.
+"""
+from collections import defaultdict
+
+import numpy as np
+
+import state_codec as codec
+from deck import HAND_SIZE, starting_hands
+from enumerate_states import count_state
+
+CHALLENGE_COUNT = 0
+
+
+class InfosetIndex:
+    """
+    Trie of information sets. Id i has parent[i], player[i] (who acted last) and count[i]
+    (cards played, CHALLENGE_COUNT for a challenge); roots have parent -1 and hold the starting
+    pair in start[i]. p1_wins / p2_wins are the outcome counts through each set after finalize().
+    """
+
+    def __init__(self):
+        self.parent = []
+        self.player = []
+        self.count = []
+        self.start = []
+        self._ids = {}
+        self._p1_wins = []
+        self._p2_wins = []
+
+    def __len__(self):
+        return len(self.parent)
+
+    def _new(self, parent, player, count, start):
+        self.parent.append(parent)
+        self.player.append(player)
+        self.count.append(count)
+        self.start.append(start)
+        self._p1_wins.append(0)
+        self._p2_wins.append(0)
+        return len(self.parent) - 1
+
+    def root(self, start):
+        key = ("root", start)
+        if key not in self._ids:
+            self._ids[key] = self._new(-1, 0, 0, start)
+        return self._ids[key]
+
+    def child(self, infoset, player, count):
+        key = (infoset, player, count)
+        if key not in self._ids:
+            self._ids[key] = self._new(infoset, player, count, self.start[infoset])
+        return self._ids[key]
+
+    def add_wins(self, infoset, p1_wins, p2_wins):
+        self._p1_wins[infoset] += p1_wins
+        self._p2_wins[infoset] += p2_wins
+
+    def finalize(self):
+        """
+        Convert the trie to arrays (parent, player, count, p1_wins, p2_wins as numpy arrays).
+        """
+        self.parent = np.array(self.parent, dtype=np.int64)
+        self.player = np.array(self.player, dtype=np.int8)
+        self.count = np.array(self.count, dtype=np.int16)
+        self.p1_wins = np.array(self._p1_wins, dtype=np.int64)
+        self.p2_wins = np.array(self._p2_wins, dtype=np.int64)
+        self._ids = None
+        return self
+
+
+def build_infoset_index(max_depth=50, hand_size=HAND_SIZE, include_challenge=True, group_by_start=True, deck=None):
+    """
+    Enumerate every game of the "all state.py" enumerator and accumulate outcome counts per
+    information set. With group_by_start=False all starting pairs share one root, i.e. the sets
+    are keyed on the count-only history alone.
+    """
+    index = InfosetIndex()
+    memo = {}
+    for player1, player2 in starting_hands(hand_size, deck):
+        start = (player1, player2) if group_by_start else None
+        root = index.root(start)
+        frontier = {(root, codec.encode_state(1, player1, player2)): 1}
+        while frontier:
+            next_frontier = defaultdict(int)
+            for (infoset, state), multiplicity in frontier.items():
+                if codec.step(state) > max_depth:
+                    continue
+                player = codec.current_player(state)
+                for move, child in codec.successors(state, forced_when_any_empty=True):
+                    move_type, count = codec.decode_move(move)
+                    if move_type == codec.CHALLENGE:
+                        if not include_challenge:
+                            continue
+                        winner = codec.challenge_winner(child)
+                        wins = (1, 0) if winner == 1 else (0, 1)
+                        child_infoset = index.child(infoset, player, CHALLENGE_COUNT)
+                        index.add_wins(child_infoset, wins[0] * multiplicity, wins[1] * multiplicity)
+                        continue
+                    p1_wins, p2_wins = count_state(child, max_depth, memo)
+                    if p1_wins + p2_wins == 0:
+                        # no outcome below this node, it never shows up in the outcome files
+                        continue
+                    child_infoset = index.child(infoset, player, count)
+                    index.add_wins(child_infoset, p1_wins * multiplicity, p2_wins * multiplicity)
+                    next_frontier[(child_infoset, child)] += multiplicity
+            frontier = next_frontier
+    return index.finalize()
+
+
+def infoset_path(index, infoset):
+    """
+    The count-only path of an information set, in the text of count2.py / count3.py,
+    e.g. "Player 1 2 -> Player 2 1 -> Player 1" (a trailing challenge has no count).
+    """
+    tokens = []
+    while index.parent[infoset] >= 0:
+        count = int(index.count[infoset])
+        player = int(index.player[infoset])
+        tokens.append(f"Player {player}" if count == CHALLENGE_COUNT else f"Player {player} {count}")
+        infoset = int(index.parent[infoset])
+    return " -> ".join(reversed(tokens))
+
+
+def infoset_rows(index):
+    """
+    Rows {P1_start, P2_start, Path, P1_win, P2_win} for every non-root information set.
+    """
+    rows = []
+    for infoset in range(len(index)):
+        if index.parent[infoset] < 0:
+            continue
+        start = index.start[infoset]
+        rows.append({
+            # empty when the index was built with group_by_start=False
+            "P1_start": f"({start[0][0]},{start[0][1]})" if start else "",
+            "P2_start": f"({start[1][0]},{start[1][1]})" if start else "",
+            "Path": infoset_path(index, infoset),
+            "P1_win": int(index.p1_wins[infoset]),
+            "P2_win": int(index.p2_wins[infoset]),
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    import os
+    import time
+
+    for include_challenge, reference in ((False, "incomplete_game_result.csv"), (True, "incomplete_game_result_1.csv")):
+        start = time.perf_counter()
+        index = build_infoset_index(max_depth=50, include_challenge=include_challenge)
+        elapsed = time.perf_counter() - start
+        print(f"include_challenge={include_challenge}: {len(index)} information sets "
+              f"(including the 36 roots) in {elapsed * 1000:.1f} ms")
+        if os.path.exists(reference):
+            import pandas as pd
+
+            data = pd.read_csv(reference)
+            expected = sorted(zip(data["P1_start"], data["P2_start"], data["Path"], data["P1_win"], data["P2_win"]))
+            actual = sorted(tuple(row.values()) for row in infoset_rows(index))
+            print(f"  rows match {reference} (up to order): {actual == expected}")
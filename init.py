@@ -1,3 +1,6 @@
+from deck import starting_hands
+
+
 def simulate_game(player1, player2, current_player, history, results, depth, max_depth, initial_state):
     """
     Simulate the game recursively and store outcomes.
@@ -49,16 +52,14 @@ def simulate_game(player1, player2, current_player, history, results, depth, max
             simulate_game(player1, (true_cards, fake_cards - n), 1, new_history, results, depth + 1, max_depth, initial_state)
 
 
-def find_all_game_outcomes(max_depth=100):
+def find_all_game_outcomes(max_depth=100, hand_size=5, deck=None):
     results = []
-    for k1 in range(6):
-        for k2 in range(6):
-            # Initial state of the game
-            player1 = (k1, 5 - k1)  # True and fake cards
-            player2 = (k2, 5 - k2)
-            initial_state = (player1, player2)  # Keep initial states for reference
-
-            simulate_game(player1, player2, 1, [], results, 0, max_depth, initial_state)
+    # Every (true, fake) split of hand_size cards for both players; a deck (deck.py) keeps only
+    # the starting pairs it can deal
+    for player1, player2 in starting_hands(hand_size, deck):
+        initial_state = (player1, player2)  # Keep initial states for reference
+
+        simulate_game(player1, player2, 1, [], results, 0, max_depth, initial_state)
     return results
 
 
@@ -80,10 +81,12 @@ def calculate_statistics(outcomes):
 
     return statistics
 
-# Find outcomes and calculate statistics
-outcomes = find_all_game_outcomes(max_depth=50)
-statistics = calculate_statistics(outcomes)
 
-# Output statistics
-for state, stats in statistics.items():
-    print(f"Initial State {state}: P1 Wins = {stats['P1_wins']}, P2 Wins = {stats['P2_wins']}, Total Games = {stats['total']}")
+if __name__ == "__main__":
+    # Find outcomes and calculate statistics
+    outcomes = find_all_game_outcomes(max_depth=50)
+    statistics = calculate_statistics(outcomes)
+
+    # Output statistics
+    for state, stats in statistics.items():
+        print(f"Initial State {state}: P1 Wins = {stats['P1_wins']}, P2 Wins = {stats['P2_wins']}, Total Games = {stats['total']}")
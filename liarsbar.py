@@ -0,0 +1,251 @@
+"""
+Command-line entry point for the analysis scripts:
+
+    python liarsbar.py enumerate  [--output game_outcomes.csv] [--max-depth 50] [--counts-only]
+                                  [--hand-size 5] [--deck readme|T,F] [--node-budget 10000000]
+    python liarsbar.py aggregate  [--input game_outcomes.csv] [--output game_results.csv] [--partitioned DIR]
+    python liarsbar.py solve      [--p1 "(2,3)"] [--p2 "(5,0)"] [--csv game_results.csv] [--max-moves 15]
+    python liarsbar.py simulate   [--p1 "(3,2)"] [--p2 "(2,3)"] [--csv game_results.csv] [--seed 0]
+    python liarsbar.py scale      [--max-hand-size 10] [--deck readme|T,F] [--node-budget 1000000]
+    python liarsbar.py bench      [--paths 1000000] [--seed 0]
+
+Only this module's own imports (argparse, time) happen at startup. Each subcommand imports
+the modules it needs when it runs; none of them loads pandas, since the CSVs are streamed
+through csv_stream. Every command reports on stderr how long its imports and its work took;
+bench measures the cold import time of every subcommand's modules (COMMAND_MODULES) in a fresh
+interpreter.
+"""
+import argparse
+import sys
+import time
+
+_STARTED = time.perf_counter()
+
+# Modules each subcommand imports when it runs, including the ones its functions import lazily;
+# bench times importing each set in a fresh interpreter
+COMMAND_MODULES = {
+    "enumerate": ["deck", "enumerate_states", "checkpoint"],
+    "aggregate": ["count"],
+    "solve": ["game", "csv_stream"],
+    "simulate": ["simulation", "csv_stream", "rng_streams"],
+    "scale": ["deck", "enumerate_states", "checkpoint"],
+}
+
+
+class _Timer:
+    def __init__(self):
+        self.imports = 0.0
+
+    def load(self, name):
+        start = time.perf_counter()
+        module = __import__(name)
+        self.imports += time.perf_counter() - start
+        return module
+
+
+def _parse_hand(text):
+    true_cards, fake_cards = text.strip("()").split(",")
+    return int(true_cards), int(fake_cards)
+
+
+###############################################################################
+# Subcommands
+###############################################################################
+def _parse_deck(text):
+    # "readme" for the 20-card README deck, "T,F" for T true and F fake cards, None for no deck
+    if text is None:
+        return None
+    deck = __import__("deck")
+    if text == "readme":
+        return deck.README_DECK
+    true_cards, fake_cards = text.split(",")
+    return deck.Deck(int(true_cards), int(fake_cards))
+
+
+def cmd_enumerate(args, timer):
+    deck = _parse_deck(args.deck)
+    if args.counts_only:
+        enumerate_states = timer.load("enumerate_states")
+        statistics = enumerate_states.count_all_outcomes(args.max_depth, args.hand_size, deck)
+    else:
+        checkpoint = timer.load("checkpoint")
+        statistics, explicit = checkpoint.enumerate_within_budget(
+            args.output, args.checkpoint, args.max_depth, args.hand_size, deck, args.node_budget)
+        if not explicit:
+            print(f"Explicit enumeration exceeds --node-budget {args.node_budget}; counted merged states "
+                  f"instead and did not write {args.output}", file=sys.stderr)
+    for state, stats in statistics.items():
+        print(f"Initial State {state}: P1 Wins = {stats['P1_wins']}, P2 Wins = {stats['P2_wins']}, Total Games = {stats['total']}")
+
+
+def cmd_aggregate(args, timer):
+    count = timer.load("count")
+    if args.partitioned:
+        rewritten = count.update_partitioned_results(args.input, args.partitioned)
+        print(f"Rewrote {len(rewritten)} partitions in {args.partitioned}")
+        if args.output:
+            count.combine_partitions(args.partitioned, args.output)
+    else:
+        count.parse_outcomes(args.input, args.output or "game_results.csv")
+
+
+def cmd_solve(args, timer):
+    game = timer.load("game")
+    player1_start, player2_start = _parse_hand(args.p1), _parse_hand(args.p2)
+    path_probs = game.load_path_probabilities(args.csv, start=(player1_start, player2_start))
+    game_tree, node_lookup, root_id, best_payoff, best_child = game.lazy_equilibrium_search(
+        player1_start, player2_start, max_moves=args.max_moves, path_probs=path_probs
+    )
+    print("Nodes expanded:", len(node_lookup))
+    print("SPE payoff at the root =", best_payoff[root_id])
+    for nid in game.trace_equilibrium_path(root_id, best_child)[1:]:
+        print(" ", game.format_path([], node_lookup[nid]["history"][-1]))
+
+
+def cmd_simulate(args, timer):
+    simulation = timer.load("simulation")
+    rng_streams = timer.load("rng_streams")
+    streams = rng_streams.RandomStreams(args.seed)
+    outcome = simulation.single_game_simulation_with_probabilities(
+        _parse_hand(args.p1), _parse_hand(args.p2), args.csv, max_moves=args.max_moves, rng=streams.game(0)
+    )
+    print(f"\nGame History: {simulation.format_history(outcome['history'])}")
+    print(f"Winner: Player {outcome['winner']}")
+    if args.seed is None:
+        print(f"(replay with --seed {streams.entropy})", file=sys.stderr)
+
+
+def cmd_scale(args, timer):
+    enumerate_states = timer.load("enumerate_states")
+    checkpoint = timer.load("checkpoint")
+    os = timer.load("os")
+    deck = _parse_deck(args.deck)
+
+    print(f"{'hand':>4s} {'pairs':>6s} {'explicit states':>18s} {'outcomes':>18s} "
+          f"{'memo count':>11s} {'explicit':>11s}")
+    for hand_size in range(1, args.max_hand_size + 1):
+        start = time.perf_counter()
+        statistics = enumerate_states.count_all_outcomes(args.max_depth, hand_size, deck)
+        count_time = time.perf_counter() - start
+        size = enumerate_states.explicit_enumeration_size(args.max_depth, hand_size, deck)
+        if size <= args.node_budget:
+            start = time.perf_counter()
+            checkpoint.run_enumeration(os.devnull, None, args.max_depth, hand_size, deck=deck)
+            explicit = f"{(time.perf_counter() - start) * 1000:9.1f} ms"
+        else:
+            explicit = "over budget"
+        outcomes = sum(stats["total"] for stats in statistics.values())
+        print(f"{hand_size:4d} {len(statistics):6d} {size:18d} {outcomes:18d} "
+              f"{count_time * 1000:8.1f} ms {explicit:>11s}")
+
+
+def cmd_bench(args, timer):
+    subprocess = timer.load("subprocess")
+
+    print("Cold import time of each subcommand (liarsbar + its modules, fresh interpreter, best of %d):"
+          % args.repeat)
+    for name, modules in COMMAND_MODULES.items():
+        code = (f"import time; t = time.perf_counter(); import liarsbar, {', '.join(modules)}; "
+                f"print(time.perf_counter() - t)")
+        samples = []
+        for _ in range(args.repeat):
+            result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+            if result.returncode != 0:
+                break
+            samples.append(float(result.stdout))
+        timing = f"{min(samples) * 1000:8.1f} ms" if samples else "  failed"
+        print(f"  {name:18s} {timing}  ({', '.join(modules)})")
+
+    enumerate_states = timer.load("enumerate_states")
+    game = timer.load("game")
+    print("Workloads:")
+    start = time.perf_counter()
+    enumerate_states.count_all_outcomes(args.max_depth)
+    print(f"  {'count_all_outcomes':18s} {(time.perf_counter() - start) * 1000:8.1f} ms  (max_depth={args.max_depth})")
+    try:
+        path_probs = game.load_path_probabilities(args.csv, start=((2, 3), (5, 0)))
+    except FileNotFoundError:
+        print(f"  {args.csv} not found, skipping the solver benchmark")
+        return
+    start = time.perf_counter()
+    game.lazy_equilibrium_search((2, 3), (5, 0), max_moves=15, path_probs=path_probs)
+    print(f"  {'lazy_equilibrium':18s} {(time.perf_counter() - start) * 1000:8.1f} ms  ((2,3) vs (5,0), max_moves=15)")
+
+    flat_tree = timer.load("flat_tree")
+    flat = flat_tree.flatten_game_tree(*game.build_game_tree((2, 3), (5, 0), args.csv, 15))
+    start = time.perf_counter()
+    stats = flat_tree.sample_random_paths(flat, num_paths=args.paths, seed=args.seed)
+    # the sampled means are printed in full so runs with the same seed can be compared bit for bit
+    print(f"  {'sample_paths':18s} {(time.perf_counter() - start) * 1000:8.1f} ms  "
+          f"({args.paths} paths, seed={args.seed}, mean={stats['mean']!r})")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="liarsbar", description="Liar's Bar analysis tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enumerate_parser = subparsers.add_parser("enumerate", help="enumerate every game outcome")
+    enumerate_parser.add_argument("--output", default="game_outcomes.csv")
+    enumerate_parser.add_argument("--checkpoint", default=None)
+    enumerate_parser.add_argument("--max-depth", type=int, default=50)
+    enumerate_parser.add_argument("--hand-size", type=int, default=5)
+    enumerate_parser.add_argument("--deck", default=None, help='"readme" or "TRUE,FAKE" card counts')
+    enumerate_parser.add_argument("--node-budget", type=int, default=10 ** 7,
+                                  help="count merged states instead of writing outcomes above this size")
+    enumerate_parser.add_argument("--counts-only", action="store_true",
+                                  help="only count wins per starting pair, without writing the outcomes")
+    enumerate_parser.set_defaults(handler=cmd_enumerate)
+
+    aggregate_parser = subparsers.add_parser("aggregate", help="outcomes CSV -> per-path win counts")
+    aggregate_parser.add_argument("--input", default="game_outcomes.csv")
+    aggregate_parser.add_argument("--output", default=None)
+    aggregate_parser.add_argument("--partitioned", default=None, metavar="DIR",
+                                  help="update a partitioned results store instead of one CSV")
+    aggregate_parser.set_defaults(handler=cmd_aggregate)
+
+    solve_parser = subparsers.add_parser("solve", help="SPE of one starting pair")
+    solve_parser.add_argument("--p1", default="(2,3)")
+    solve_parser.add_argument("--p2", default="(5,0)")
+    solve_parser.add_argument("--csv", default="game_results.csv")
+    solve_parser.add_argument("--max-moves", type=int, default=15)
+    solve_parser.set_defaults(handler=cmd_solve)
+
+    simulate_parser = subparsers.add_parser("simulate", help="one game with the CSV-probability policy")
+    simulate_parser.add_argument("--p1", default="(3,2)")
+    simulate_parser.add_argument("--p2", default="(2,3)")
+    simulate_parser.add_argument("--csv", default="game_results.csv")
+    simulate_parser.add_argument("--max-moves", type=int, default=15)
+    simulate_parser.add_argument("--seed", type=int, default=None)
+    simulate_parser.set_defaults(handler=cmd_simulate)
+
+    scale_parser = subparsers.add_parser("scale", help="enumeration runtime versus hand size")
+    scale_parser.add_argument("--max-hand-size", type=int, default=10)
+    scale_parser.add_argument("--max-depth", type=int, default=50)
+    scale_parser.add_argument("--deck", default=None, help='"readme" or "TRUE,FAKE" card counts')
+    scale_parser.add_argument("--node-budget", type=int, default=10 ** 6,
+                              help="skip the explicit enumeration above this many states")
+    scale_parser.set_defaults(handler=cmd_scale)
+
+    bench_parser = subparsers.add_parser("bench", help="import times and core workloads")
+    bench_parser.add_argument("--csv", default="game_results.csv")
+    bench_parser.add_argument("--max-depth", type=int, default=50)
+    bench_parser.add_argument("--repeat", type=int, default=3)
+    bench_parser.add_argument("--paths", type=int, default=10 ** 6)
+    bench_parser.add_argument("--seed", type=int, default=0)
+    bench_parser.set_defaults(handler=cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    timer = _Timer()
+    start = time.perf_counter()
+    args.handler(args, timer)
+    total = time.perf_counter() - start
+    print(f"[liarsbar {args.command}] startup {(start - _STARTED) * 1000:.1f} ms, "
+          f"imports {timer.imports * 1000:.1f} ms, run {(total - timer.imports) * 1000:.1f} ms",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import os
+import tempfile
+import numpy as np
+
+import state_codec as codec
+
+
+###############################################################################
+# 按层存储的节点仓库：超出内存预算时把冷层写到磁盘，用 np.memmap 按需换入
+###############################################################################
+NODE_DTYPE = np.dtype([
+    ("state", np.int64),          # state_codec 编码
+    ("parent", np.int64),         # 父节点在上一层中的下标
+    ("move", np.int32),           # 从父节点走到本节点的动作(state_codec 的 move 编码)
+    ("path_id", np.int32),        # 本节点路径在 CSV 路径字典树中的编号，-1 表示 CSV 中没有
+    ("payoff", np.float64, 2),    # 累积收益(根->该节点)
+    ("first_child", np.int64),    # 孩子在下一层中的起始下标，孩子连续存放
+    ("n_children", np.int32),
+    ("best", np.float64, 2),      # 逆推得到的 best_payoff
+    ("best_child", np.int64),     # 逆推得到的 best_child(下一层中的下标)，没有则为 -1
+])
+
+
+class LevelNodeStore:
+    """
+    第 d 层是一个 NODE_DTYPE 结构化数组，存放所有 steps == d 的节点。
+    在内存中的层总字节数超过 memory_budget 时，最早(最浅)的层会被写成 spill_dir 下的
+    np.memmap 文件并从内存中释放；之后访问该层时由操作系统按页换入。
+    逆推法每次只需要相邻两层，所以预算只要能放下两层就不会反复换入换出。
+    """
+
+    def __init__(self, memory_budget=256 * 1024 * 1024, spill_dir=None):
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self._own_spill_dir = None
+        self.levels = []
+        self.spilled = set()
+
+    def __len__(self):
+        return len(self.levels)
+
+    def level(self, depth):
+        return self.levels[depth]
+
+    def in_memory_bytes(self):
+        return sum(self.levels[d].nbytes for d in range(len(self.levels)) if d not in self.spilled)
+
+    def num_nodes(self):
+        return sum(len(level) for level in self.levels)
+
+    def add_level(self, array):
+        self.levels.append(array)
+        self._enforce_budget(keep=len(self.levels) - 1)
+        return len(self.levels) - 1
+
+    def new_level(self, size):
+        """
+        追加一个长度为 size 的空层并返回它。先换出较浅的层腾出预算；
+        仍然放不下时，新层直接建成磁盘上的 memmap，不会先在内存里整层分配。
+        """
+        depth = len(self.levels)
+        nbytes = size * NODE_DTYPE.itemsize
+        for d in range(depth):
+            if self.in_memory_bytes() + nbytes <= self.memory_budget:
+                break
+            if d != depth - 1:
+                self.spill(d)
+        if size > 0 and self.in_memory_bytes() + nbytes > self.memory_budget:
+            array = np.memmap(self._spill_path(depth), dtype=NODE_DTYPE, mode="w+", shape=(size,))
+            self.spilled.add(depth)
+        else:
+            array = np.zeros(size, dtype=NODE_DTYPE)
+        self.levels.append(array)
+        return array
+
+    def _spill_path(self, depth):
+        if self.spill_dir is None:
+            self._own_spill_dir = tempfile.TemporaryDirectory(prefix="liarsbar-nodes-")
+            self.spill_dir = self._own_spill_dir.name
+        os.makedirs(self.spill_dir, exist_ok=True)
+        return os.path.join(self.spill_dir, f"level_{depth:04d}.dat")
+
+    def spill(self, depth):
+        """
+        把第 depth 层写到磁盘，换成可读写的 memmap。
+        """
+        if depth in self.spilled or len(self.levels[depth]) == 0:
+            return
+        array = self.levels[depth]
+        mapped = np.memmap(self._spill_path(depth), dtype=NODE_DTYPE, mode="w+", shape=array.shape)
+        mapped[:] = array
+        mapped.flush()
+        self.levels[depth] = mapped
+        self.spilled.add(depth)
+
+    def _enforce_budget(self, keep):
+        # 从最浅的层开始换出，keep 层(正在使用的层)总留在内存里
+        for depth in range(len(self.levels)):
+            if self.in_memory_bytes() <= self.memory_budget:
+                break
+            if depth != keep:
+                self.spill(depth)
+
+    def close(self):
+        # 去掉对各层的引用，memmap 随之释放并关闭映射
+        del self.levels[:]
+        self.spilled = set()
+        if self._own_spill_dir is not None:
+            self._own_spill_dir.cleanup()
+            self._own_spill_dir = None
+
+
+###############################################################################
+# CSV 路径字典树：用整数 path_id 代替路径字符串，节点里不用再存 history
+###############################################################################
+def build_path_trie(path_probs):
+    """
+    把 load_path_probabilities 得到的 {Path: prob} 建成字典树(见 game.path_trie)。
+    返回 (trie, probs)：trie[(parent_path_id, player, move)] = path_id，根(空路径)为 0；
+    probs[path_id] 为该路径的 prob，只是前缀、CSV 中没有该行时为 nan。
+    """
+    from game import path_trie
+
+    trie, probs = path_trie(path_probs)
+    return trie, np.array([np.nan if prob is None else prob for prob in probs], dtype=np.float64)
+
+
+###############################################################################
+# 按层(BFS)构建博弈树，与 build_game_tree 的规则和收益完全一致
+###############################################################################
+def _child_counts(states):
+    """
+    各状态按 state_codec.successors 规则的子节点数(向量化)：终局 0，无牌可打 1(强制 challenge)，
+    否则 真牌数 + 假牌数，非第一步再加 1(challenge)。
+    """
+    player_bit = states & 1
+    true_shift = np.where(player_bit == 1, codec.P2_TRUE_SHIFT, codec.P1_TRUE_SHIFT)
+    fake_shift = np.where(player_bit == 1, codec.P2_FAKE_SHIFT, codec.P1_FAKE_SHIFT)
+    cards = ((states >> true_shift) & codec.CARD_MASK) + ((states >> fake_shift) & codec.CARD_MASK)
+    can_challenge = ((states >> codec.STEP_SHIFT) & codec.STEP_MASK) > 0
+    counts = np.where(cards == 0, 1, cards + can_challenge)
+    terminal = ((states >> codec.LAST_TYPE_SHIFT) & 3) == codec.CHALLENGE
+    return np.where(terminal, 0, counts).astype(np.int32)
+
+
+def build_level_tree(player1_start, player2_start, path_probs, max_moves=15, store=None,
+                     chunk_size=65536):
+    """
+    一层一层地生成博弈树，第 d+1 层只依赖第 d 层，生成后第 d 层即可被换出。
+    每层先按子节点数算出大小，由 store.new_level 预先分配(放不下预算时直接是 memmap)，
+    再按 chunk_size 个节点一块地填入，所以峰值内存不超过预算加一块的大小。
+    返回填好的 LevelNodeStore。
+    """
+    if store is None:
+        store = LevelNodeStore()
+    trie, trie_probs = build_path_trie(path_probs)
+
+    root = np.zeros(1, dtype=NODE_DTYPE)
+    root["state"] = codec.encode_state(1, player1_start, player2_start)
+    root["parent"] = -1
+    root["best_child"] = -1
+    store.add_level(root)
+
+    depth = 0
+    while depth < max_moves:
+        level = store.level(depth)
+        n_children = _child_counts(np.asarray(level["state"]))
+        first_child = np.zeros(len(level), dtype=np.int64)
+        np.cumsum(n_children[:-1], out=first_child[1:])
+        total = int(n_children.sum())
+        if total == 0:
+            break
+        level["first_child"] = first_child
+        level["n_children"] = n_children
+
+        children = store.new_level(total)
+        rows = []
+        filled = 0
+        for i in range(len(level)):
+            if n_children[i] == 0:
+                continue
+            state = int(level["state"][i])
+            player = codec.current_player(state)
+            t_cards, f_cards = codec.hand(state, player)
+            path_id = int(level["path_id"][i])
+            payoff_p1, payoff_p2 = level["payoff"][i]
+            for move, child_state in codec.successors(state):
+                child_path_id = -1 if path_id < 0 else trie.get((path_id, player, move), -1)
+                if (t_cards + f_cards) == 0:
+                    # 无牌可打：强制 challenge，胜者 +3，输者 -3
+                    step_p1, step_p2 = (3.0, -3.0) if codec.challenge_winner(child_state) == 1 else (-3.0, 3.0)
+                else:
+                    prob = trie_probs[child_path_id] if child_path_id >= 0 else np.nan
+                    prob = 0.5 if np.isnan(prob) else prob
+                    step_p1, step_p2 = prob, 1.0 - prob
+                rows.append((child_state, i, move, child_path_id, (payoff_p1 + step_p1, payoff_p2 + step_p2)))
+            if len(rows) >= chunk_size:
+                filled = _fill_rows(children, filled, rows)
+                rows = []
+        _fill_rows(children, filled, rows)
+        children["best_child"] = -1
+        depth += 1
+    return store
+
+
+def _fill_rows(children, start, rows):
+    # 把一块 (state, parent, move, path_id, payoff) 写进 children[start:start + len(rows)]
+    block = children[start:start + len(rows)]
+    block["state"] = [r[0] for r in rows]
+    block["parent"] = [r[1] for r in rows]
+    block["move"] = [r[2] for r in rows]
+    block["path_id"] = [r[3] for r in rows]
+    block["payoff"] = [r[4] for r in rows]
+    return start + len(rows)
+
+
+###############################################################################
+# 逐层逆推：与 backward_induction_spe 相同的选择规则(严格更大才替换，平局取第一个)
+###############################################################################
+def backward_induction_levels(store):
+    """
+    从最深一层往上，每次只访问相邻两层，把 best / best_child 写回各层。
+    返回根节点的 best_payoff。
+    """
+    deepest = len(store) - 1
+    level = store.level(deepest)
+    level["best"] = level["payoff"]
+    level["best_child"] = -1
+
+    for depth in range(deepest - 1, -1, -1):
+        level = store.level(depth)
+        children = store.level(depth + 1)
+        n_children = np.asarray(level["n_children"])
+        has_children = n_children > 0
+
+        best = np.array(level["payoff"])
+        best_child = np.full(len(level), -1, dtype=np.int64)
+        if has_children.any():
+            starts = np.asarray(level["first_child"])[has_children]
+            # 玩家1看 p1 收益，玩家2看 p2 收益
+            player_index = (np.asarray(level["state"])[has_children] & 1).astype(np.int64)
+            segment = np.repeat(np.arange(len(starts)), n_children[has_children])
+            child_best = np.asarray(children["best"])
+            values = child_best[np.arange(len(segment)) + starts[0], player_index[segment]]
+            segment_max = np.maximum.reduceat(values, starts - starts[0])
+            positions = np.arange(len(values))
+            candidates = np.where(values == segment_max[segment], positions, len(values))
+            first_best = np.minimum.reduceat(candidates, starts - starts[0]) + starts[0]
+            best[has_children] = child_best[first_best]
+            best_child[has_children] = first_best
+        level["best"] = best
+        level["best_child"] = best_child
+
+    return tuple(float(value) for value in store.level(0)["best"][0])
+
+
+def trace_level_path(store):
+    """
+    沿 best_child 从根走到终端，返回均衡路径上的动作列表(与 format_path 用的 dict 相同)。
+    """
+    actions = []
+    depth, index = 0, 0
+    while True:
+        child = int(store.level(depth)["best_child"][index])
+        if child < 0:
+            break
+        depth += 1
+        node = store.level(depth)[child]
+        player = codec.current_player(int(store.level(depth - 1)["state"][index]))
+        actions.append(codec.move_to_action(player, int(node["move"])))
+        index = child
+    return actions
+
+
+if __name__ == "__main__":
+    from game import load_path_probabilities
+
+    path_probs = load_path_probabilities("game_results.csv", start=((2, 3), (5, 0)))
+    store = LevelNodeStore(memory_budget=1024 * 1024)
+    build_level_tree((2, 3), (5, 0), path_probs, max_moves=15, store=store)
+    print("博弈树构建完成，节点总数 =", store.num_nodes(), "，换出层数 =", len(store.spilled))
+    print("根节点 SPE 收益 =", backward_induction_levels(store))
+    for action in trace_level_path(store):
+        print("  ", action)
+    store.close()
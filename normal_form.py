@@ -0,0 +1,306 @@
+"""
+Normal-form analysis: the README payoff matrix (Truthful Play / Bluff / Call Bluff), batches of
+perturbed copies of it, and the induced normal form of small game.py trees.
+
+Matrices are numpy arrays of shape (N, m, n) (a single (m, n) matrix is a batch of one); A holds
+the row player's payoffs and B the column player's.
+
+    support_enumeration   all mixed Nash equilibria of every matrix in the batch. For each pair
+                          of equal-size supports the indifference systems of all N matrices are
+                          solved with one batched np.linalg.solve, so the Python loop runs over
+                          support pairs only, never over matrices. Like every support
+                          enumeration it assumes nondegenerate games (perturbed matrices are,
+                          almost surely); a degenerate game may have equilibria it does not list.
+    zero_sum_values       value and maximin strategy of the zero-sum part (A - B) / 2 of every
+                          matrix, as one block-diagonal sparse linear program (scipy HiGHS).
+    induced_normal_form   reduced pure strategies and payoffs of a game_tree / node_lookup, to
+                          compare backward_induction_spe with the equilibria of the matrix game.
+
+The README leaves Call Bluff vs Call Bluff undefined ("N/A"); readme_payoff_matrices fills it with
+invalid_payoff, (0, 0) by default.
+"""
+import itertools
+import time
+
+import numpy as np
+
+README_ACTIONS = ("Truthful Play", "Bluff", "Call Bluff")
+
+
+def readme_payoff_matrices(invalid_payoff=(0.0, 0.0)):
+    """
+    (A, B) of the README payoff matrix, rows Player A, columns Player B.
+    """
+    cells = [
+        [(0, 0), (1, 1), (3, -3)],
+        [(1, 1), (0, 0), (-3, 3)],
+        [(-3, 3), (3, -3), invalid_payoff],
+    ]
+    payoffs = np.array(cells, dtype=np.float64)
+    return payoffs[:, :, 0], payoffs[:, :, 1]
+
+
+def perturbed_matrices(A, B, num_matrices, scale=0.25, seed=0):
+    """
+    num_matrices copies of (A, B) with independent N(0, scale^2) noise on every payoff.
+    """
+    from rng_streams import RandomStreams
+
+    rng = RandomStreams(seed).numpy()
+    noise = rng.normal(0.0, scale, size=(2, num_matrices) + np.shape(A))
+    return A + noise[0], B + noise[1]
+
+
+def _as_batch(matrix):
+    matrix = np.asarray(matrix, dtype=np.float64)
+    return matrix[np.newaxis] if matrix.ndim == 2 else matrix
+
+
+###############################################################################
+# Support enumeration
+###############################################################################
+def _equalizer(M, rows, cols):
+    """
+    For every matrix of the batch, the mix q over cols that makes the rows of M[:, rows, cols]
+    pay the same value v:  M[rows, cols] q = v, sum(q) = 1.
+    Returns (q (N, k), v (N,), solvable (N,)).
+    """
+    N = M.shape[0]
+    k = len(rows)
+    system = np.zeros((N, k + 1, k + 1))
+    system[:, :k, :k] = M[:, rows][:, :, cols]
+    system[:, :k, k] = -1.0
+    system[:, k, :k] = 1.0
+    rhs = np.zeros((N, k + 1))
+    rhs[:, k] = 1.0
+    solvable = np.abs(np.linalg.det(system)) > 1e-12
+    # singular systems get the identity so the batched solve goes through; they are masked out
+    system[~solvable] = np.eye(k + 1)
+    solution = np.linalg.solve(system, rhs[:, :, np.newaxis])[:, :, 0]
+    return solution[:, :k], solution[:, k], solvable
+
+
+def support_enumeration(A, B, tol=1e-9, max_support=None):
+    """
+    Mixed Nash equilibria of every bimatrix game (A[i], B[i]) of the batch.
+    Returns a dict of arrays with one entry per equilibrium found:
+      {"matrix": (E,) batch index, "x": (E, m) row mix, "y": (E, n) column mix,
+       "payoff": (E, 2) expected payoffs}
+    Equilibria of the same matrix are listed by increasing support size.
+    """
+    A, B = _as_batch(A), _as_batch(B)
+    N, m, n = A.shape
+    Bt = np.transpose(B, (0, 2, 1))
+    found = {"matrix": [], "x": [], "y": [], "payoff": []}
+    for k in range(1, min(m, n, max_support or min(m, n)) + 1):
+        for rows in itertools.combinations(range(m), k):
+            for cols in itertools.combinations(range(n), k):
+                rows_l, cols_l = list(rows), list(cols)
+                # column mix that makes the row player indifferent on rows, and vice versa
+                y_sub, v, ok_y = _equalizer(A, rows_l, cols_l)
+                x_sub, u, ok_x = _equalizer(Bt, cols_l, rows_l)
+                ok = ok_y & ok_x & (y_sub > tol).all(axis=1) & (x_sub > tol).all(axis=1)
+                if not ok.any():
+                    continue
+                x = np.zeros((N, m))
+                y = np.zeros((N, n))
+                x[:, rows_l] = x_sub
+                y[:, cols_l] = y_sub
+                # no profitable deviation outside the supports
+                ok &= (np.einsum("bij,bj->bi", A, y) <= v[:, np.newaxis] + tol).all(axis=1)
+                ok &= (np.einsum("bi,bij->bj", x, B) <= u[:, np.newaxis] + tol).all(axis=1)
+                index = np.flatnonzero(ok)
+                if index.size:
+                    found["matrix"].append(index)
+                    found["x"].append(x[index])
+                    found["y"].append(y[index])
+                    found["payoff"].append(np.stack([v[index], u[index]], axis=1))
+    if not found["matrix"]:
+        return {"matrix": np.zeros(0, dtype=np.int64), "x": np.zeros((0, m)),
+                "y": np.zeros((0, n)), "payoff": np.zeros((0, 2))}
+    result = {key: np.concatenate(parts) for key, parts in found.items()}
+    order = np.argsort(result["matrix"], kind="stable")
+    return {key: value[order] for key, value in result.items()}
+
+
+###############################################################################
+# Zero-sum part: one block-diagonal LP for the whole batch
+###############################################################################
+def zero_sum_values(A, B=None):
+    """
+    Value and optimal row mix of the zero-sum game Z = (A - B) / 2 (or Z = A when B is None)
+    for every matrix of the batch: max_x min_j (x^T Z)_j. The N small LPs are stacked into one
+    sparse LP with block-diagonal constraints, which HiGHS solves in a single call.
+    Returns (values (N,), x (N, m)). Needs scipy, an optional dependency of this repository.
+    """
+    try:
+        from scipy import sparse
+        from scipy.optimize import linprog
+    except ImportError as error:
+        raise ImportError("zero_sum_values needs scipy, an optional dependency: pip install scipy") from error
+
+    Z = _as_batch(A) if B is None else (_as_batch(A) - _as_batch(B)) / 2.0
+    N, m, n = Z.shape
+    # variables per matrix: x_1..x_m, v; maximize sum(v) <=> minimize -sum(v)
+    width = m + 1
+    cost = np.zeros(N * width)
+    cost[m::width] = -1.0
+
+    # v - (Z^T x)_j <= 0 for every column j
+    block = np.arange(N)[:, np.newaxis, np.newaxis]
+    col = np.arange(n)[np.newaxis, :, np.newaxis]
+    row_index = np.broadcast_to(block * n + col, (N, n, m + 1))
+    var_index = np.broadcast_to(block * width + np.arange(m + 1), (N, n, m + 1))
+    values = np.concatenate([-np.transpose(Z, (0, 2, 1)), np.ones((N, n, 1))], axis=2)
+    A_ub = sparse.csr_matrix((values.ravel(), (row_index.ravel(), var_index.ravel())), shape=(N * n, N * width))
+
+    # sum(x) = 1 for every matrix
+    eq_rows = np.repeat(np.arange(N), m)
+    eq_cols = (np.arange(N)[:, np.newaxis] * width + np.arange(m)).ravel()
+    A_eq = sparse.csr_matrix((np.ones(N * m), (eq_rows, eq_cols)), shape=(N, N * width))
+
+    # x >= 0, v free
+    bounds = np.tile(np.array([(0.0, np.inf)] * m + [(-np.inf, np.inf)]), (N, 1))
+    result = linprog(cost, A_ub=A_ub, b_ub=np.zeros(N * n), A_eq=A_eq, b_eq=np.ones(N),
+                     bounds=bounds, method="highs")
+    if not result.success:
+        raise RuntimeError(f"zero-sum LP failed: {result.message}")
+    solution = result.x.reshape(N, width)
+    return solution[:, m], solution[:, :m]
+
+
+###############################################################################
+# Induced normal form of a game.py tree
+###############################################################################
+def _reduced_strategies(game_tree, node_lookup, nid, player):
+    # Plans of player below nid: one choice at every node of player reachable under the plan
+    children = game_tree.get(nid, [])
+    if not children:
+        return [{}]
+    if node_lookup[nid]["current_player"] == player:
+        return [{**plan, nid: cid} for cid in children
+                for plan in _reduced_strategies(game_tree, node_lookup, cid, player)]
+    plans = [{}]
+    for cid in children:
+        plans = [{**a, **b} for a in plans for b in _reduced_strategies(game_tree, node_lookup, cid, player)]
+    return plans
+
+
+def induced_normal_form(game_tree, node_lookup, root_id):
+    """
+    Reduced normal form of a (small) game tree: returns (A, B, plans1, plans2) where plans_p
+    lists the reduced pure strategies of player p as {node_id: chosen child_id} and
+    A[i, j], B[i, j] are the leaf payoffs reached by plans1[i] against plans2[j].
+    """
+    plans1 = _reduced_strategies(game_tree, node_lookup, root_id, 1)
+    plans2 = _reduced_strategies(game_tree, node_lookup, root_id, 2)
+    A = np.zeros((len(plans1), len(plans2)))
+    B = np.zeros_like(A)
+    for i, plan1 in enumerate(plans1):
+        for j, plan2 in enumerate(plans2):
+            nid = root_id
+            while game_tree.get(nid):
+                nid = (plan1 if node_lookup[nid]["current_player"] == 1 else plan2)[nid]
+            A[i, j], B[i, j] = node_lookup[nid]["payoff"]
+    return A, B, plans1, plans2
+
+
+def compare_with_spe(player1_start, player2_start, csv_file="game_results.csv", max_moves=4):
+    """
+    Solve a small tree with backward_induction_spe and with the induced normal form.
+    Returns a dict with the SPE root value, whether the SPE profile is a pure Nash equilibrium
+    of the matrix game, and the payoffs of every equilibrium support enumeration finds.
+    """
+    from game import backward_induction_spe, build_game_tree
+
+    game_tree, node_lookup, root_id = build_game_tree(player1_start, player2_start, csv_file, max_moves)
+    best_payoff, best_child = backward_induction_spe(game_tree, node_lookup)
+    A, B, plans1, plans2 = induced_normal_form(game_tree, node_lookup, root_id)
+
+    def spe_plan(plans):
+        # the reduced strategy that agrees with best_child wherever it is defined
+        return next(i for i, plan in enumerate(plans) if all(best_child[nid] == cid for nid, cid in plan.items()))
+
+    i, j = spe_plan(plans1), spe_plan(plans2)
+    equilibria = support_enumeration(A, B)
+    return {
+        "shape": A.shape,
+        "spe_value": tuple(float(v) for v in best_payoff[root_id]),
+        "spe_cell": (float(A[i, j]), float(B[i, j])),
+        "spe_is_nash": bool(A[i, j] >= A[:, j].max() - 1e-9 and B[i, j] >= B[i, :].max() - 1e-9),
+        "equilibrium_payoffs": sorted({tuple(round(float(v), 9) for v in p) for p in equilibria["payoff"]}),
+    }
+
+
+###############################################################################
+# Benchmark
+###############################################################################
+def benchmark(num_matrices=10000, scale=0.25, seed=0, loop_sample=500):
+    """
+    Time the batched solvers on num_matrices perturbed README matrices against solving
+    loop_sample of them one by one, and check that both give the same equilibria.
+    """
+    A, B = perturbed_matrices(*readme_payoff_matrices(), num_matrices, scale, seed)
+
+    start = time.perf_counter()
+    batched = support_enumeration(A, B)
+    batched_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    looped = [support_enumeration(A[i], B[i]) for i in range(loop_sample)]
+    loop_time = (time.perf_counter() - start) * num_matrices / loop_sample
+
+    same = True
+    for i, single in enumerate(looped):
+        mine = batched["matrix"] == i
+        same &= bool(np.allclose(batched["x"][mine], single["x"]) and np.allclose(batched["y"][mine], single["y"]))
+
+    start = time.perf_counter()
+    values, _ = zero_sum_values(A, B)
+    lp_time = time.perf_counter() - start
+
+    counts = np.bincount(batched["matrix"], minlength=num_matrices)
+    return {
+        "num_matrices": num_matrices,
+        "equilibria": int(len(batched["matrix"])),
+        "equilibria_per_matrix": {int(c): int(k) for c, k in zip(*np.unique(counts, return_counts=True))},
+        "batched_seconds": batched_time,
+        "loop_seconds_estimate": loop_time,
+        "batched_matches_loop": same,
+        "zero_sum_lp_seconds": lp_time,
+        "zero_sum_value_range": (float(values.min()), float(values.max())),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    try:
+        import scipy  # noqa: F401  (optional dependency, only needed here)
+    except ImportError:
+        sys.exit("normal_form.py needs scipy for the zero-sum LP, an optional dependency: pip install scipy")
+
+    A, B = readme_payoff_matrices()
+    equilibria = support_enumeration(A, B)
+    print("README payoff matrix (Call Bluff vs Call Bluff = (0, 0)):")
+    for x, y, payoff in zip(equilibria["x"], equilibria["y"], equilibria["payoff"]):
+        print("  A plays", {a: round(float(p), 4) for a, p in zip(README_ACTIONS, x)},
+              "B plays", {a: round(float(p), 4) for a, p in zip(README_ACTIONS, y)},
+              "payoff", tuple(round(float(v), 4) for v in payoff))
+    value, x = zero_sum_values(A, B)
+    print(f"  zero-sum part: value {value[0]:.4f}, A maximin mix {np.round(x[0], 4)}")
+
+    stats = benchmark()
+    print(f"\n{stats['num_matrices']} perturbed matrices: {stats['equilibria']} equilibria "
+          f"(per matrix: {stats['equilibria_per_matrix']})")
+    print(f"  batched support enumeration {stats['batched_seconds'] * 1000:.1f} ms, "
+          f"one by one ~{stats['loop_seconds_estimate'] * 1000:.0f} ms, same equilibria: {stats['batched_matches_loop']}")
+    print(f"  zero-sum parts, one block LP {stats['zero_sum_lp_seconds'] * 1000:.1f} ms, "
+          f"values in {stats['zero_sum_value_range']}")
+
+    print("\nInduced normal form vs backward_induction_spe:")
+    for player1_start, player2_start, max_moves in (((1, 0), (0, 1), 6), ((1, 1), (1, 0), 5), ((2, 0), (0, 1), 5)):
+        result = compare_with_spe(player1_start, player2_start, max_moves=max_moves)
+        print(f"  {player1_start} vs {player2_start}, max_moves={max_moves}: matrix {result['shape']}, "
+              f"SPE {result['spe_value']}, SPE profile is a Nash equilibrium: {result['spe_is_nash']}, "
+              f"equilibrium payoffs {result['equilibrium_payoffs']}")
@@ -0,0 +1,240 @@
+"""
+Opponent model learned from game logs in the outcomes-CSV format
+(columns: P1 Hand, P2 Hand, Action Sequence, Winner).
+
+Both outcome formats are accepted: the full moves of "all state.py" and the hidden play types of
+"incomplete all state.py" ("Player 1 2"), whose plays are counted as "play <count>" and do not
+enter the bluff rates. Histories and moves to query such a model are written the same way, e.g.
+{"player": 1, "type": "play", "count": 2}.
+
+Logs are read in chunks, so files larger than memory can be processed, and the model keeps
+only counts:
+    - per (player, history): how often each action followed that history;
+    - per player: how often each action was played overall (the back-off distribution);
+    - per (player, history) and per player: plays and fake plays (bluff rates).
+
+The model remembers how many rows of each log it has consumed, so calling update_from_log
+again after a log has grown only reads the new rows. It is saved as (optionally gzipped) JSON.
+
+OpponentModel.likelihood has the same signature as particle_belief.PathLikelihoods.likelihood,
+so it can be passed to ParticleBelief as the action likelihood.
+"""
+import gzip
+import json
+import os
+from collections import defaultdict
+
+MODEL_VERSION = 1
+HISTORY_SEPARATOR = " -> "
+ACTION_TYPES = ("play_true", "play_fake", "challenge")
+# Type of a play whose kind the log does not show ("incomplete all state.py")
+HIDDEN_PLAY = "play"
+
+
+def _action_text(action):
+    # Same text as game.format_path for a single action, e.g. "play_fake 2" or "challenge"
+    return f"{action['type']} {action.get('count', '')}".strip()
+
+
+def _history_text(history):
+    return HISTORY_SEPARATOR.join(f"Player {a['player']} {_action_text(a)}" for a in history)
+
+
+def parse_action_sequence(sequence):
+    """
+    Action Sequence of either outcome format -> [(player, action text)]:
+
+        "all state.py"             "Player 1 play_true 2 -> Player 2 challenge "
+                                   -> [(1, "play_true 2"), (2, "challenge")]
+        "incomplete all state.py"  "Player 1 2 -> Player 2 "
+                                   -> [(1, "play 2"), (2, "challenge")]
+
+    The incomplete format hides the play type, so its plays become "play <count>"
+    (HIDDEN_PLAY), and its challenges are written without an action at all.
+    """
+    actions = []
+    for token in sequence.split(HISTORY_SEPARATOR):
+        parts = token.split()
+        if len(parts) < 2 or parts[0] != "Player" or not parts[1].isdigit():
+            raise ValueError(f"not an action: {token!r} in {sequence!r}")
+        player = int(parts[1])
+        if len(parts) == 2:
+            text = "challenge"
+        elif len(parts) == 3 and parts[2].isdigit():
+            text = f"{HIDDEN_PLAY} {parts[2]}"
+        elif parts[2] in ACTION_TYPES and len(parts) == (3 if parts[2] == "challenge" else 4):
+            text = " ".join(parts[2:])
+        else:
+            raise ValueError(f"not an action: {token!r} in {sequence!r}")
+        actions.append((player, text))
+    return actions
+
+
+class OpponentModel:
+    def __init__(self, alpha=1.0, bluff_prior_weight=1.0):
+        self.alpha = alpha
+        self.bluff_prior_weight = bluff_prior_weight
+        self.history_counts = defaultdict(lambda: defaultdict(int))   # (player, history) -> action -> n
+        self.action_counts = defaultdict(lambda: defaultdict(int))    # player -> action -> n
+        self.history_bluffs = defaultdict(lambda: [0, 0])             # (player, history) -> [fake plays, plays]
+        self.player_bluffs = defaultdict(lambda: [0, 0])              # player -> [fake plays, plays]
+        self.sources = {}                                             # log path -> rows consumed
+
+    ###########################################################################
+    # Fitting
+    ###########################################################################
+    def update_from_sequences(self, sequences):
+        """
+        Add the counts of an iterable of Action Sequence strings.
+        """
+        for sequence in sequences:
+            history = ""
+            for player, text in parse_action_sequence(sequence):
+                self.history_counts[(player, history)][text] += 1
+                self.action_counts[player][text] += 1
+                if text.startswith(("play_true", "play_fake")):
+                    fake = 1 if text.startswith("play_fake") else 0
+                    for bluffs in (self.history_bluffs[(player, history)], self.player_bluffs[player]):
+                        bluffs[0] += fake
+                        bluffs[1] += 1
+                token = f"Player {player} {text}"
+                history = f"{history}{HISTORY_SEPARATOR}{token}" if history else token
+
+    def update_from_log(self, log_file, chunk_size=100000):
+        """
+        Stream log_file in chunks of chunk_size rows, skipping the rows already consumed by
+        earlier calls. Returns the number of new rows.
+        """
+        import pandas as pd  # only needed for reading logs
+
+        key = os.path.abspath(log_file)
+        consumed = self.sources.get(key, 0)
+        new_rows = 0
+        reader = pd.read_csv(log_file, usecols=["Action Sequence"], chunksize=chunk_size,
+                             skiprows=range(1, consumed + 1))
+        for chunk in reader:
+            self.update_from_sequences(chunk["Action Sequence"])
+            new_rows += len(chunk)
+            self.sources[key] = consumed + new_rows
+        return new_rows
+
+    ###########################################################################
+    # Queries
+    ###########################################################################
+    def action_distribution(self, player, history, legal_moves):
+        """
+        Smoothed probability of each legal move of player after history (a list of actions):
+
+            P(a | h) = (n(h, a) + alpha * b(a)) / (sum over legal a' of n(h, a') + alpha)
+
+        where b is the player's overall action frequency (add-one smoothed) restricted to the
+        legal moves, so unseen histories fall back to the player's general tendencies.
+        """
+        texts = [_action_text(move) for move in legal_moves]
+        overall = self.action_counts.get(player, {})
+        backoff = [overall.get(text, 0) + 1 for text in texts]
+        backoff_total = sum(backoff)
+        seen = self.history_counts.get((player, _history_text(history)), {})
+        counts = [seen.get(text, 0) for text in texts]
+        total = sum(counts) + self.alpha
+        return [(n + self.alpha * b / backoff_total) / total for n, b in zip(counts, backoff)]
+
+    def likelihood(self, player1_start, player2_start, history, action, legal_moves):
+        """
+        P(action | history), 0 if action is not legal. The starting hands only matter through
+        legal_moves; the signature matches PathLikelihoods.likelihood.
+        """
+        text = _action_text(action)
+        for move, prob in zip(legal_moves, self.action_distribution(action["player"], history, legal_moves)):
+            if _action_text(move) == text:
+                return prob
+        return 0.0
+
+    def bluff_rate(self, player, history=None):
+        """
+        Share of fake plays among player's plays after history (or overall if history is None),
+        shrunk towards the overall rate with weight bluff_prior_weight.
+        """
+        fake, plays = self.player_bluffs.get(player, (0, 0))
+        overall = (fake + 1) / (plays + 2)
+        if history is None:
+            return overall
+        fake, plays = self.history_bluffs.get((player, _history_text(history)), (0, 0))
+        return (fake + self.bluff_prior_weight * overall) / (plays + self.bluff_prior_weight)
+
+    ###########################################################################
+    # Persistence
+    ###########################################################################
+    def to_dict(self):
+        history_counts = defaultdict(dict)
+        for (player, history), actions in self.history_counts.items():
+            history_counts[str(player)][history] = dict(actions)
+        history_bluffs = defaultdict(dict)
+        for (player, history), bluffs in self.history_bluffs.items():
+            history_bluffs[str(player)][history] = list(bluffs)
+        return {
+            "version": MODEL_VERSION,
+            "alpha": self.alpha,
+            "bluff_prior_weight": self.bluff_prior_weight,
+            "sources": self.sources,
+            "action_counts": {str(p): dict(a) for p, a in self.action_counts.items()},
+            "player_bluffs": {str(p): list(b) for p, b in self.player_bluffs.items()},
+            "history_counts": history_counts,
+            "history_bluffs": history_bluffs,
+        }
+
+    @classmethod
+    def from_dict(cls, payload):
+        if payload.get("version") != MODEL_VERSION:
+            raise ValueError(f"unsupported opponent model version {payload.get('version')!r}")
+        model = cls(payload["alpha"], payload["bluff_prior_weight"])
+        model.sources = dict(payload["sources"])
+        for player, actions in payload["action_counts"].items():
+            model.action_counts[int(player)].update(actions)
+        for player, bluffs in payload["player_bluffs"].items():
+            model.player_bluffs[int(player)] = list(bluffs)
+        for player, histories in payload["history_counts"].items():
+            for history, actions in histories.items():
+                model.history_counts[(int(player), history)].update(actions)
+        for player, histories in payload["history_bluffs"].items():
+            for history, bluffs in histories.items():
+                model.history_bluffs[(int(player), history)] = list(bluffs)
+        return model
+
+    def save(self, model_file):
+        opener = gzip.open if model_file.endswith(".gz") else open
+        tmp_file = model_file + ".tmp"
+        with opener(tmp_file, "wt") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp_file, model_file)
+
+    @classmethod
+    def load(cls, model_file):
+        opener = gzip.open if model_file.endswith(".gz") else open
+        with opener(model_file, "rt") as f:
+            return cls.from_dict(json.load(f))
+
+
+def update_model_file(model_file, log_files, chunk_size=100000, alpha=1.0):
+    """
+    Load model_file (or start a new model), consume the new rows of every log and save it back.
+    Returns (model, {log_file: number of new rows consumed}).
+    """
+    model = OpponentModel.load(model_file) if os.path.exists(model_file) else OpponentModel(alpha)
+    new_rows = {}
+    for log_file in log_files:
+        new_rows[log_file] = model.update_from_log(log_file, chunk_size)
+    model.save(model_file)
+    return model, new_rows
+
+
+if __name__ == "__main__":
+    model, new_rows = update_model_file("opponent_model.json.gz", ["game_outcomes.csv"])
+    for log_file, rows in new_rows.items():
+        print(f"{log_file}: {rows} new rows")
+    for player in (1, 2):
+        print(f"Player {player}: overall bluff rate = {model.bluff_rate(player):.3f}")
+    opening = [{"player": 1, "type": "play_true", "count": c} for c in range(1, 6)]
+    opening += [{"player": 1, "type": "play_fake", "count": c} for c in range(1, 6)]
+    for move, prob in zip(opening, model.action_distribution(1, [], opening)):
+        print(f"  P({_action_text(move)} | start) = {prob:.3f}")
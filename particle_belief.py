@@ -0,0 +1,231 @@
+import numpy as np
+
+import state_codec as codec
+from bayes import bayesian_best_move_over_types
+from csv_stream import DEFAULT_CHUNK_SIZE, RESULT_COLUMNS, format_hand, iter_record_chunks
+from game import format_path
+from rng_streams import numpy_rng
+
+
+###############################################################################
+# 动作似然：由路径结果表(game_results.csv)得到 P(对手动作 | 历史, 起手牌)
+###############################################################################
+class PathLikelihoods:
+    """
+    从路径结果表读入每个 (P1_start, P2_start, Path) 经过的对局数 N = P1_win + P2_win，
+    把在历史 h 下出现动作 a 的概率估计为
+
+        P(a | h, 起手牌) = (N(h -> a) + alpha) / sum_{合法的 a'} (N(h -> a') + alpha)
+
+    alpha 为加法平滑，表中没有的路径(例如 challenge，或更大牌堆下没有枚举过的路径)
+    计数为 0，只靠平滑给出概率；合法动作之外的动作概率为 0。
+    CSV 由 csv_stream 分块流式读入，同一个 (P1_start, P2_start, Path) 出现多次时取第一行。
+    """
+
+    def __init__(self, csv_file="game_results.csv", alpha=1.0, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.alpha = alpha
+        self.counts = {}
+        counts = self.counts
+        for chunk in iter_record_chunks(csv_file, RESULT_COLUMNS, chunk_size):
+            for p1_start, p2_start, path, p1_win, p2_win in chunk:
+                key = (p1_start, p2_start, path)
+                if key not in counts:
+                    counts[key] = int(p1_win) + int(p2_win)
+
+    def likelihood(self, player1_start, player2_start, history, action, legal_moves):
+        """
+        动作 action 在 history 之后出现的概率，legal_moves 为此时的全部合法动作。
+        """
+        if not any(_same_move(action, move) for move in legal_moves):
+            return 0.0
+        p1_text, p2_text = format_hand(player1_start), format_hand(player2_start)
+
+        def smoothed(move):
+            return self.counts.get((p1_text, p2_text, format_path(history, move)), 0) + self.alpha
+
+        total = sum(smoothed(move) for move in legal_moves)
+        return smoothed(action) / total if total > 0 else 1.0 / len(legal_moves)
+
+
+def _same_move(a, b):
+    return a["type"] == b["type"] and a.get("count", 0) == b.get("count", 0)
+
+
+def _state_after(player1_start, player2_start, history):
+    # 从起手牌按 history 逐步走到当前的整数状态；history 中有不合法的动作时返回 None
+    state = codec.encode_state(1, player1_start, player2_start)
+    for action in history:
+        if codec.is_terminal(state) or action["player"] != codec.current_player(state):
+            return None
+        state = dict(codec.successors(state)).get(codec.action_to_move(action))
+        if state is None:
+            return None
+    return state
+
+
+def _legal_moves(state):
+    # 当前玩家的全部合法动作，规则和顺序与 state_codec.successors 相同
+    player = codec.current_player(state)
+    return [codec.move_to_action(player, move) for move, _ in codec.successors(state)]
+
+
+###############################################################################
+# 粒子滤波信念：用加权样本表示对手的起手牌
+###############################################################################
+class ParticleBelief:
+    """
+    我方坐在 seat(1 或 2)、起手牌为 own_hand，对手的起手牌未知。
+    信念用 num_particles 个粒子表示：hands[i] 为第 i 个粒子假设的对手起手牌，weights[i] 为权重。
+
+    - prior 可以是 [(hand, prob), ...] 的列表，也可以是 rng -> hand 的采样函数
+      (牌堆很大、假设空间无法列举时用后者)。
+    - observe(history, action)：对手在 history 之后做出 action，按 PathLikelihoods 重新加权；
+      有效样本数 ESS = 1 / sum(w^2) 低于 resample_threshold * num_particles 时做系统重采样。
+    - 每次更新和决策的开销只与粒子中不同起手牌的个数(≤ num_particles)有关，与假设空间大小无关。
+    - seed 可以是整数、SeedSequence、RandomStreams(例如 streams.game(i))或 numpy Generator，
+      由 rng_streams.numpy_rng 得到随机数流，与模拟器的其余部分共用同一套可复现的种子。
+    """
+
+    def __init__(self, own_hand, seat, prior, likelihoods, num_particles=256,
+                 resample_threshold=0.5, seed=None):
+        self.own_hand = tuple(own_hand)
+        self.seat = seat
+        self.opponent = 3 - seat
+        self.prior = prior
+        self.likelihoods = likelihoods
+        self.num_particles = num_particles
+        self.resample_threshold = resample_threshold
+        self.rng = numpy_rng(seed)
+        self.history = []
+        self.hands, self.weights = self._draw_from_prior()
+
+    def _draw_from_prior(self):
+        if callable(self.prior):
+            hands = np.array([self.prior(self.rng) for _ in range(self.num_particles)], dtype=np.int64)
+        else:
+            support = np.array([hand for hand, _ in self.prior], dtype=np.int64)
+            probs = np.array([prob for _, prob in self.prior], dtype=np.float64)
+            hands = support[self.rng.choice(len(support), size=self.num_particles, p=probs / probs.sum())]
+        return hands, np.full(self.num_particles, 1.0 / self.num_particles)
+
+    def _starts(self, opponent_hand):
+        if self.seat == 1:
+            return self.own_hand, opponent_hand
+        return opponent_hand, self.own_hand
+
+    def _action_likelihood(self, opponent_hand, history, action):
+        player1_start, player2_start = self._starts(opponent_hand)
+        state = _state_after(player1_start, player2_start, history)
+        if state is None or codec.is_terminal(state) or codec.current_player(state) != self.opponent:
+            return 0.0
+        legal_moves = _legal_moves(state)
+        return self.likelihoods.likelihood(player1_start, player2_start, history, action, legal_moves)
+
+    def _reweight(self, history, action):
+        # 同一个起手牌只算一次似然
+        unique_hands, inverse = np.unique(self.hands, axis=0, return_inverse=True)
+        values = np.array([
+            self._action_likelihood(tuple(int(c) for c in hand), history, action) for hand in unique_hands
+        ])
+        return self.weights * values[inverse.reshape(-1)]
+
+    def effective_sample_size(self):
+        return 1.0 / float(np.sum(self.weights ** 2))
+
+    def observe(self, history, action):
+        """
+        记录一步动作。对手的动作会更新权重；我方的动作只追加到历史。
+        """
+        if action["player"] == self.opponent:
+            weights = self._reweight(history, action)
+            total = weights.sum()
+            if total > 0:
+                self.weights = weights / total
+            else:
+                # 所有粒子都与观测矛盾：从先验重新抽样，并按完整历史重新加权
+                self.hands, self.weights = self._draw_from_prior()
+                for i, past in enumerate(history + [action]):
+                    if past["player"] == self.opponent:
+                        self.weights = self._reweight(history[:i], past)
+                total = self.weights.sum()
+                self.weights = self.weights / total if total > 0 else np.full(self.num_particles, 1.0 / self.num_particles)
+            if self.effective_sample_size() < self.resample_threshold * self.num_particles:
+                self.resample()
+        self.history = history + [action]
+
+    def resample(self):
+        """
+        系统重采样：N 个等间距的点落在累积权重上，重采样后权重都为 1/N。
+        """
+        n = self.num_particles
+        positions = (self.rng.random() + np.arange(n)) / n
+        cumulative = np.cumsum(self.weights)
+        cumulative[-1] = 1.0
+        self.hands = self.hands[np.searchsorted(cumulative, positions)]
+        self.weights = np.full(n, 1.0 / n)
+
+    def posterior(self):
+        """
+        {对手起手牌: 后验概率}，把相同起手牌的粒子合并，权重为 0 的不列出。
+        """
+        result = {}
+        for hand, weight in zip(map(tuple, self.hands.tolist()), self.weights):
+            if weight > 0:
+                result[hand] = result.get(hand, 0.0) + float(weight)
+        return result
+
+    def best_move(self, move_values):
+        """
+        move_values(opponent_hand) -> {move_key: 我方执行该 move 后的收益}(当前历史下)。
+        按后验对每个不同的起手牌取一次 move_values，再用 bayesian_best_move_over_types 做决策。
+        返回 (best_move_key, best_expected_payoff)。
+        """
+        hands, priors = zip(*self.posterior().items())
+        type_values = [move_values(hand) for hand in hands]
+        kept = [(values, prior) for values, prior in zip(type_values, priors) if values]
+        if not kept:
+            return None, None
+        return bayesian_best_move_over_types([v for v, _ in kept], [p for _, p in kept])
+
+
+def spe_move_values(csv_file, own_hand, seat, history_key, max_moves=15, cache=None):
+    """
+    ParticleBelief.best_move 用的 move_values：对给定的对手起手牌求完全信息 SPE，
+    返回当前历史(history_key)下我方各个 move(state_codec 编码)的收益。
+    每个起手牌的解存在 cache 里，同一局后续的决策可以复用。
+    """
+    from strategies import solve_bayes_values
+
+    if cache is None:
+        cache = {}
+
+    def move_values(opponent_hand):
+        if opponent_hand not in cache:
+            cache[opponent_hand] = solve_bayes_values(csv_file, max_moves, own_hand, seat, [opponent_hand])[0]
+        return cache[opponent_hand].get(history_key, {})
+
+    return move_values
+
+
+if __name__ == "__main__":
+    from strategies import history_key
+
+    # 与 bayes.py 的例子相同：我方(玩家1)为 (3,2)，对手可能是 (k, 5-k) 中的任意一种
+    likelihoods = PathLikelihoods("game_results.csv")
+    prior = [((t, 5 - t), 1.0 / 6) for t in range(6)]
+    belief = ParticleBelief((3, 2), 1, prior, likelihoods, num_particles=512, seed=0)
+
+    history = [
+        {"player": 1, "type": "play_true", "count": 1},
+        {"player": 2, "type": "play_fake", "count": 2},
+        {"player": 1, "type": "play_true", "count": 1},
+        {"player": 2, "type": "play_fake", "count": 1},
+    ]
+    for i, action in enumerate(history):
+        belief.observe(history[:i], action)
+        print(format_path([], action), "-> ESS =", round(belief.effective_sample_size(), 1))
+        print("   后验:", {hand: round(p, 3) for hand, p in sorted(belief.posterior().items())})
+
+    cache = {}
+    values = spe_move_values("game_results.csv", (3, 2), 1, history_key(history), cache=cache)
+    print("粒子信念下的最优动作 =", belief.best_move(values))
@@ -0,0 +1,89 @@
+"""
+Reproducible random streams for sampling and simulation.
+
+A run is seeded once with RandomStreams(seed). Every consumer then takes its own stream from
+it by key instead of sharing the global random module:
+
+    streams = RandomStreams(0)
+    streams.worker(3).numpy()        # numpy Generator of worker 3
+    streams.game(1234).python()      # random.Random of game 1234
+    streams.worker(3).game(7)        # streams nest: game 7 of worker 3
+
+Streams are numpy SeedSequence children addressed by their spawn key, so a stream depends only
+on the seed and its key, never on how many other streams were created before it or in which
+process. The same seed therefore gives bit-identical draws whether games run serially, in
+batches or spread over worker processes.
+"""
+import random
+
+import numpy as np
+
+# First element of the spawn key, so worker, game and batch streams never collide
+WORKER, GAME, BATCH = 0, 1, 2
+
+
+class RandomStreams:
+    def __init__(self, seed=None):
+        if isinstance(seed, RandomStreams):
+            seed = seed.seed_sequence
+        if not isinstance(seed, np.random.SeedSequence):
+            # seed=None draws fresh entropy; it can be read back from .entropy to replay the run
+            seed = np.random.SeedSequence(seed)
+        self.seed_sequence = seed
+
+    @property
+    def entropy(self):
+        return self.seed_sequence.entropy
+
+    def child(self, *key):
+        """
+        The stream with the given integer key below this one.
+        """
+        parent = self.seed_sequence
+        return RandomStreams(np.random.SeedSequence(
+            parent.entropy, spawn_key=tuple(parent.spawn_key) + tuple(int(k) for k in key),
+            pool_size=parent.pool_size,
+        ))
+
+    def worker(self, index):
+        return self.child(WORKER, index)
+
+    def game(self, index):
+        return self.child(GAME, index)
+
+    def batch(self, index):
+        return self.child(BATCH, index)
+
+    def numpy(self):
+        """
+        A fresh numpy Generator for this stream (for vectorized draws).
+        """
+        return np.random.Generator(np.random.PCG64(self.seed_sequence))
+
+    def python(self):
+        """
+        A fresh random.Random for this stream (for the dict-based code paths).
+        """
+        words = self.seed_sequence.generate_state(4, dtype=np.uint32)
+        return random.Random(int.from_bytes(words.tobytes(), "little"))
+
+
+def numpy_rng(seed=None):
+    """
+    A numpy Generator from a seed, a SeedSequence, a RandomStreams or an existing Generator.
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return RandomStreams(seed).numpy()
+
+
+def python_rng(seed=None):
+    """
+    A random.Random from a seed, a SeedSequence, a RandomStreams or an existing Random.
+    None keeps the old behaviour of the scripts: the global random module.
+    """
+    if seed is None:
+        return random
+    if isinstance(seed, random.Random):
+        return seed
+    return RandomStreams(seed).python()
@@ -0,0 +1,386 @@
+"""
+Sequence-form linear program for exact equilibria of the hidden-hand game.
+
+backward_induction_spe solves one complete-information tree per starting pair. In the game as
+played, a player sees its own hand but not the opponent's, and of the opponent's plays only how
+many cards went down. The game modelled here:
+
+  - chance deals (player1_start, player2_start) with deck.starting_hand_priors (uniform over the
+    36 pairs of 5-card hands by default);
+  - moves follow game.py (state_codec.successors; a player with no cards must challenge);
+  - a player observes its own hand and moves, and the opponent's moves with the play type
+    hidden ("Player 2 3", as in "incomplete all state.py"); challenges are public.
+    observe_types=True shows the full moves instead;
+  - only challenges pay: +3 to the winner and -3 to the loser. A game cut off at max_moves
+    pays 0. The game is therefore zero-sum, and (value + 3) / 6 is player 1's win probability
+    with cut-off games counted as half a win, the utility of exploitability.py.
+
+In sequence form (Koller, Megiddo and von Stengel), a player's behaviour strategy is its
+realization plan: x[s] is the probability of playing all of sequence s, that is, the player's
+own moves along a path. Plans are constrained by E x = e. Row 0 is x[empty] = 1; for every
+information set, the sequences that extend it sum to the sequence that leads to it. A[s1, s2]
+sums prior * payoff over the leaves reached by s1 and s2. Player 1's equilibrium plan and the
+game value solve
+
+    max q[0]   subject to   F^T q - A^T x <= 0,   E x = e,   x >= 0
+
+and player 2's plan y is the dual of the inequality rows. E, F and A are sparse and built in one
+pass over node_store.build_level_tree for each starting pair. They have one column per sequence
+and one nonzero per leaf, so the LP grows with the number of nodes and not with the number of
+pure strategies, which normal_form.induced_normal_form would enumerate. The LP is solved with
+SciPy's HiGHS, imported lazily like in normal_form.zero_sum_values; SciPy is an optional
+dependency, and a missing install raises an ImportError that says so.
+"""
+import time
+
+import numpy as np
+
+import state_codec as codec
+from deck import HAND_SIZE, starting_hand_priors
+from node_store import build_level_tree
+
+CHALLENGE_PAYOFF = 3.0
+
+
+def _scipy():
+    # (scipy.sparse, scipy.optimize.linprog); SciPy is an optional dependency of this repository
+    try:
+        from scipy import sparse
+        from scipy.optimize import linprog
+    except ImportError as error:
+        raise ImportError("sequence_form needs scipy, an optional dependency: pip install scipy") from error
+    return sparse, linprog
+
+
+class SequenceFormGame:
+    """
+    Information sets and sequences of both players, plus the leaf payoffs as sparse triplets.
+    For player p (index p - 1 of the per-player lists):
+        infoset_parent[i]    sequence leading to information set i
+        infoset_key[i]       (own starting hand, observation id)
+        sequence_infoset[s]  information set where sequence s makes its last move, -1 for s = 0
+        sequence_move[s]     that move (state_codec move code), -1 for s = 0
+    Observation ids index a trie shared by both players: observation o extends obs_parent[o]
+    by obs_player[o] making move obs_code[o] (a count only, for hidden plays).
+    """
+
+    def __init__(self, observe_types=False):
+        self.observe_types = observe_types
+        self.infoset_parent = ([], [])
+        self.infoset_key = ([], [])
+        self.sequence_infoset = ([-1], [-1])
+        self.sequence_move = ([-1], [-1])
+        self._infosets = ({}, {})
+        self._sequences = ({}, {})
+        self.obs_parent = [-1]
+        self.obs_player = [0]
+        self.obs_code = [0]
+        self._observations = {}
+        self.num_nodes = 0
+        self.num_starts = 0
+        self._rows = []
+        self._cols = []
+        self._payoffs = []
+
+    def num_sequences(self, player):
+        return len(self.sequence_move[player - 1])
+
+    def num_infosets(self, player):
+        return len(self.infoset_parent[player - 1])
+
+    def _observe(self, obs, player, code):
+        key = (obs, player, code)
+        child = self._observations.get(key)
+        if child is None:
+            child = self._observations[key] = len(self.obs_parent)
+            self.obs_parent.append(obs)
+            self.obs_player.append(player)
+            self.obs_code.append(code)
+        return child
+
+    def _infoset(self, player, own_hand, obs, parent_sequence):
+        index = player - 1
+        key = (own_hand, obs)
+        infoset = self._infosets[index].get(key)
+        if infoset is None:
+            infoset = self._infosets[index][key] = len(self.infoset_parent[index])
+            self.infoset_parent[index].append(parent_sequence)
+            self.infoset_key[index].append(key)
+        elif self.infoset_parent[index][infoset] != parent_sequence:
+            raise ValueError(f"player {player} does not have perfect recall at {key}")
+        return infoset
+
+    def _sequence(self, player, infoset, move):
+        index = player - 1
+        key = (infoset, move)
+        sequence = self._sequences[index].get(key)
+        if sequence is None:
+            sequence = self._sequences[index][key] = len(self.sequence_move[index])
+            self.sequence_infoset[index].append(infoset)
+            self.sequence_move[index].append(move)
+        return sequence
+
+    def _observed_move(self, move):
+        if self.observe_types or codec.decode_move(move)[0] == codec.CHALLENGE:
+            return move
+        return move & codec.CARD_MASK
+
+    def add_tree(self, store, player1_start, player2_start, prior):
+        """
+        Add the tree of one starting pair (a LevelNodeStore from build_level_tree), reached
+        by chance with probability prior.
+        """
+        hands = (tuple(player1_start), tuple(player2_start))
+        # per node of the current level: observation id and sequence of each player
+        obs = [(0, 0)]
+        sequences = [(0, 0)]
+        self.num_nodes += 1
+        for depth in range(1, len(store)):
+            parent_states = store.level(depth - 1)["state"].tolist()
+            level = store.level(depth)
+            child_obs = []
+            child_sequences = []
+            last_parent = -1
+            for parent, move, state in zip(level["parent"].tolist(), level["move"].tolist(),
+                                           level["state"].tolist()):
+                if parent != last_parent:
+                    last_parent = parent
+                    mover = codec.current_player(parent_states[parent])
+                    m = mover - 1
+                    parent_obs = obs[parent]
+                    parent_sequences = sequences[parent]
+                    infoset = self._infoset(mover, hands[m], parent_obs[m], parent_sequences[m])
+                sequence = self._sequence(mover, infoset, move)
+                observed = self._observed_move(move)
+                if mover == 1:
+                    node_obs = (self._observe(parent_obs[0], 1, move), self._observe(parent_obs[1], 1, observed))
+                    node_sequences = (sequence, parent_sequences[1])
+                else:
+                    node_obs = (self._observe(parent_obs[0], 2, observed), self._observe(parent_obs[1], 2, move))
+                    node_sequences = (parent_sequences[0], sequence)
+                child_obs.append(node_obs)
+                child_sequences.append(node_sequences)
+                if codec.is_terminal(state):
+                    payoff = CHALLENGE_PAYOFF if codec.challenge_winner(state) == 1 else -CHALLENGE_PAYOFF
+                    self._rows.append(node_sequences[0])
+                    self._cols.append(node_sequences[1])
+                    self._payoffs.append(prior * payoff)
+            obs = child_obs
+            sequences = child_sequences
+            self.num_nodes += len(child_obs)
+        self.num_starts += 1
+
+    ###########################################################################
+    # Sparse matrices
+    ###########################################################################
+    def constraints(self, player):
+        """
+        (E, e) of player's realization plans: E x = e, one row per information set plus row 0.
+        """
+        sparse, _ = _scipy()
+
+        index = player - 1
+        n_sequences = self.num_sequences(player)
+        n_infosets = self.num_infosets(player)
+        sequence_infoset = np.array(self.sequence_infoset[index][1:], dtype=np.int64)
+        rows = np.concatenate([[0], sequence_infoset + 1, np.arange(n_infosets) + 1])
+        cols = np.concatenate([[0], np.arange(1, n_sequences), self.infoset_parent[index]]).astype(np.int64)
+        values = np.concatenate([[1.0], np.ones(n_sequences - 1), -np.ones(n_infosets)])
+        E = sparse.csr_matrix((values, (rows, cols)), shape=(n_infosets + 1, n_sequences))
+        e = np.zeros(n_infosets + 1)
+        e[0] = 1.0
+        return E, e
+
+    def payoff_matrix(self):
+        """
+        Player 1's expected payoff A (sequences of player 1 x sequences of player 2); duplicate
+        (s1, s2) leaves are summed.
+        """
+        sparse, _ = _scipy()
+
+        return sparse.csr_matrix(
+            (np.array(self._payoffs), (np.array(self._rows, dtype=np.int64), np.array(self._cols, dtype=np.int64))),
+            shape=(self.num_sequences(1), self.num_sequences(2)),
+        )
+
+    ###########################################################################
+    # Labels
+    ###########################################################################
+    def observation_text(self, obs):
+        tokens = []
+        while obs > 0:
+            player, code = self.obs_player[obs], self.obs_code[obs]
+            move_type, count = codec.decode_move(code)
+            if move_type == codec.CHALLENGE:
+                tokens.append(f"Player {player} challenge")
+            elif move_type == codec.NO_ACTION:
+                tokens.append(f"Player {player} {count}")
+            else:
+                tokens.append(f"Player {player} {codec.ACTION_NAMES[move_type]} {count}")
+            obs = self.obs_parent[obs]
+        return " -> ".join(reversed(tokens))
+
+    def infoset_label(self, player, infoset):
+        """
+        (own starting hand, history as seen by player), e.g. ((2, 3), "Player 1 play_true 2 -> Player 2 1").
+        """
+        own_hand, obs = self.infoset_key[player - 1][infoset]
+        return own_hand, self.observation_text(obs)
+
+
+def build_sequence_form(hand_size=HAND_SIZE, max_moves=15, deck=None, priors=None, observe_types=False):
+    """
+    The sequence form of the hidden-hand game over every starting pair of priors
+    (default: starting_hand_priors(hand_size, deck)).
+    """
+    if priors is None:
+        priors = starting_hand_priors(hand_size, deck)
+    game = SequenceFormGame(observe_types)
+    for (player1_start, player2_start), prior in priors.items():
+        store = build_level_tree(player1_start, player2_start, {}, max_moves)
+        try:
+            game.add_tree(store, player1_start, player2_start, prior)
+        finally:
+            store.close()
+    return game
+
+
+###############################################################################
+# Solving
+###############################################################################
+def solve_sequence_form(game):
+    """
+    Equilibrium of the zero-sum game: {"value" (player 1's payoff), "p1_win_probability",
+    "x", "y" (realization plans of players 1 and 2), "seconds" (LP time)}.
+    """
+    sparse, linprog = _scipy()
+
+    E, e = game.constraints(1)
+    F, f = game.constraints(2)
+    A = game.payoff_matrix()
+    n1, n2 = A.shape
+    m2 = F.shape[0]
+
+    # variables: x (n1), q (m2); maximize f^T q = q[0]
+    cost = np.zeros(n1 + m2)
+    cost[n1:] = -f
+    A_ub = sparse.hstack([-A.T, F.T], format="csr")
+    A_eq = sparse.hstack([E, sparse.csr_matrix((E.shape[0], m2))], format="csr")
+    bounds = [(0.0, None)] * n1 + [(None, None)] * m2
+
+    start = time.perf_counter()
+    result = linprog(cost, A_ub=A_ub, b_ub=np.zeros(n2), A_eq=A_eq, b_eq=e, bounds=bounds, method="highs")
+    seconds = time.perf_counter() - start
+    if not result.success:
+        raise RuntimeError(f"sequence-form LP failed: {result.message}")
+
+    value = -result.fun
+    return {
+        "value": value,
+        "p1_win_probability": (value + CHALLENGE_PAYOFF) / (2 * CHALLENGE_PAYOFF),
+        "x": np.maximum(result.x[:n1], 0.0),
+        "y": np.maximum(-result.ineqlin.marginals, 0.0),
+        "seconds": seconds,
+    }
+
+
+def best_response_value(game, player, opponent_plan):
+    """
+    Payoff of player (player 1's payoff for player 1, its negative for player 2) when it
+    best-responds to the opponent's realization plan. All sequences of an information set are
+    created together (add_tree expands a node's children in one go), so they have consecutive ids
+    above the sequence that leads there; one pass over the sequences from the last id down
+    folds every information set into its parent.
+    """
+    A = game.payoff_matrix()
+    index = player - 1
+    values = np.array(A @ opponent_plan if player == 1 else -(A.T @ opponent_plan), dtype=np.float64)
+    best = np.full(game.num_infosets(player), -np.inf)
+    sequence_infoset = game.sequence_infoset[index]
+    infoset_parent = game.infoset_parent[index]
+    for sequence in range(game.num_sequences(player) - 1, 0, -1):
+        infoset = sequence_infoset[sequence]
+        best[infoset] = max(best[infoset], values[sequence])
+        if sequence_infoset[sequence - 1] != infoset:
+            values[infoset_parent[infoset]] += best[infoset]
+    return float(values[0])
+
+
+def equilibrium_gap(game, x, y):
+    """
+    Sum of both players' best-response gains against (x, y); zero exactly at an equilibrium.
+    """
+    return best_response_value(game, 1, y) + best_response_value(game, 2, x)
+
+
+def behavior_strategy(game, player, plan):
+    """
+    {infoset_label: {move: probability}} of a realization plan, with state_codec move codes.
+    Information sets the plan never reaches get the uniform strategy.
+    """
+    index = player - 1
+    moves = {}
+    for sequence in range(1, game.num_sequences(player)):
+        moves.setdefault(game.sequence_infoset[index][sequence], []).append(sequence)
+    strategy = {}
+    for infoset, sequences in moves.items():
+        reach = plan[game.infoset_parent[index][infoset]]
+        if reach > 0:
+            probs = {game.sequence_move[index][s]: float(plan[s] / reach) for s in sequences}
+        else:
+            probs = {game.sequence_move[index][s]: 1.0 / len(sequences) for s in sequences}
+        strategy[game.infoset_label(player, infoset)] = probs
+    return strategy
+
+
+###############################################################################
+# Benchmark
+###############################################################################
+def benchmark(hand_sizes=(1, 2, 3, 4, 5), max_moves=15, deck=None, observe_types=False):
+    """
+    Build and solve the game for every hand size; one dict of sizes, times, value and
+    equilibrium gap per hand size.
+    """
+    report = []
+    for hand_size in hand_sizes:
+        start = time.perf_counter()
+        game = build_sequence_form(hand_size, max_moves, deck, observe_types=observe_types)
+        build_time = time.perf_counter() - start
+        solution = solve_sequence_form(game)
+        report.append({
+            "hand_size": hand_size,
+            "starting_pairs": game.num_starts,
+            "nodes": game.num_nodes,
+            "sequences": (game.num_sequences(1), game.num_sequences(2)),
+            "infosets": (game.num_infosets(1), game.num_infosets(2)),
+            "payoff_nonzeros": int(game.payoff_matrix().nnz),
+            "build_seconds": build_time,
+            "solve_seconds": solution["seconds"],
+            "value": solution["value"],
+            "p1_win_probability": solution["p1_win_probability"],
+            "gap": equilibrium_gap(game, solution["x"], solution["y"]),
+        })
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    try:
+        import scipy  # noqa: F401  (optional dependency, only needed here)
+    except ImportError:
+        sys.exit("sequence_form.py needs scipy for the LP, an optional dependency: pip install scipy")
+
+    parser = argparse.ArgumentParser(description="Sequence-form LP of the hidden-hand game")
+    parser.add_argument("--hand-sizes", type=int, nargs="+", default=[1, 2, 3, 4, 5])
+    parser.add_argument("--max-moves", type=int, default=15)
+    parser.add_argument("--observe-types", action="store_true",
+                        help="show the opponent's play types (only the hands stay hidden)")
+    args = parser.parse_args()
+
+    for row in benchmark(args.hand_sizes, args.max_moves, observe_types=args.observe_types):
+        print(f"hand size {row['hand_size']}: {row['starting_pairs']} starting pairs, {row['nodes']} nodes, "
+              f"sequences {row['sequences']}, infosets {row['infosets']}, {row['payoff_nonzeros']} payoff entries; "
+              f"build {row['build_seconds']:.2f}s, LP {row['solve_seconds']:.2f}s; "
+              f"value {row['value']:.6f} (P1 wins {row['p1_win_probability']:.4f}), gap {row['gap']:.1e}")
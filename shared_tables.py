@@ -0,0 +1,330 @@
+"""
+Read-only tables published once into multiprocessing.shared_memory and attached zero-copy by
+worker processes.
+
+Without them every worker of a process pool reads game_results.csv with pandas and builds its
+own Path -> prob dict (strategies._path_probs), so pool startup time and total memory grow with
+the number of workers times the table size. Here the parent builds the tables once:
+
+    SharedPathTable   Path -> prob of game.load_path_probabilities, as a sorted array of 64-bit
+                      path hashes, the probabilities and the UTF-8 path bytes (to confirm hits).
+                      It is a read-only Mapping, so it can be passed as path_probs to
+                      game.build_game_tree / lazy_equilibrium_search.
+    SharedSolutions   solved trees as arrays indexed by node id (TreeBuilder ids are dense and
+                      start at 0): state, parent, best_child and the (p1, p2) values, for many
+                      solves in one block.
+
+Both are numpy views on a single shared-memory block; a worker attaches from a small picklable
+descriptor and copies nothing. The process that published a table must close() and unlink() it.
+
+solve_starts_in_pool runs lazy_equilibrium_search for many starting pairs in a process pool
+whose workers attach to one published SharedPathTable instead of reloading the CSV.
+"""
+import hashlib
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_ALIGNMENT = 64
+
+
+def _path_hash(path):
+    # Stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(path.encode(), digest_size=8).digest(), "little")
+
+
+###############################################################################
+# Arrays packed into one shared-memory block
+###############################################################################
+class SharedArrays:
+    """
+    Named numpy arrays in one shared-memory block. publish() copies the arrays in; attach()
+    maps an existing block from its descriptor (name, [(field, dtype, shape, offset)]).
+    """
+
+    def __init__(self, shm, layout, owner):
+        self.shm = shm
+        self.layout = layout
+        self.owner = owner
+        self.arrays = {
+            field: np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            for field, dtype, shape, offset in layout
+        }
+        if not owner:
+            for array in self.arrays.values():
+                array.flags.writeable = False
+
+    @classmethod
+    def publish(cls, arrays, name=None):
+        layout = []
+        size = 0
+        for field, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            size = -(-size // _ALIGNMENT) * _ALIGNMENT
+            layout.append((field, array.dtype.str, array.shape, size))
+            size += array.nbytes
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+        shared = cls(shm, layout, owner=True)
+        for field, array in arrays.items():
+            shared.arrays[field][...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, descriptor):
+        name, layout = descriptor
+        return cls(shared_memory.SharedMemory(name=name), layout, owner=False)
+
+    @property
+    def descriptor(self):
+        return self.shm.name, self.layout
+
+    @property
+    def nbytes(self):
+        return self.shm.size
+
+    def close(self):
+        self.arrays = {}
+        self.shm.close()
+
+    def unlink(self):
+        if self.owner:
+            self.shm.unlink()
+
+
+###############################################################################
+# Path -> prob table
+###############################################################################
+class SharedPathTable(Mapping):
+    """
+    Read-only Path -> prob mapping backed by shared memory (see the module docstring).
+    """
+
+    def __init__(self, shared):
+        self.shared = shared
+        arrays = shared.arrays
+        self.hashes = arrays["hashes"]
+        self.probs = arrays["probs"]
+        self.offsets = arrays["offsets"]
+        self.blob = arrays["blob"]
+
+    @classmethod
+    def publish(cls, path_probs, name=None):
+        entries = sorted((_path_hash(path), path.encode(), prob) for path, prob in path_probs.items())
+        keys = [key for _, key, _ in entries]
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum([len(key) for key in keys], out=offsets[1:])
+        return cls(SharedArrays.publish({
+            "hashes": np.array([h for h, _, _ in entries], dtype=np.uint64),
+            "probs": np.array([prob for _, _, prob in entries], dtype=np.float64),
+            "offsets": offsets,
+            "blob": np.frombuffer(b"".join(keys), dtype=np.uint8),
+        }, name))
+
+    @classmethod
+    def attach(cls, descriptor):
+        return cls(SharedArrays.attach(descriptor))
+
+    @property
+    def descriptor(self):
+        return self.shared.descriptor
+
+    def _index(self, path):
+        if not isinstance(path, str):
+            return -1
+        target = np.uint64(_path_hash(path))
+        i = int(np.searchsorted(self.hashes, target))
+        key = path.encode()
+        # several paths can share a hash; compare the stored bytes
+        while i < len(self.hashes) and self.hashes[i] == target:
+            start, end = self.offsets[i], self.offsets[i + 1]
+            if self.blob[start:end].tobytes() == key:
+                return i
+            i += 1
+        return -1
+
+    def __getitem__(self, path):
+        i = self._index(path)
+        if i < 0:
+            raise KeyError(path)
+        return float(self.probs[i])
+
+    def get(self, path, default=None):
+        i = self._index(path)
+        return default if i < 0 else float(self.probs[i])
+
+    def __contains__(self, path):
+        return self._index(path) >= 0
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __iter__(self):
+        for i in range(len(self.hashes)):
+            yield self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode()
+
+    def close(self):
+        self.hashes = self.probs = self.offsets = self.blob = None
+        self.shared.close()
+
+    def unlink(self):
+        self.shared.unlink()
+
+
+###############################################################################
+# Solved value tables
+###############################################################################
+def solution_arrays(game_tree, node_lookup, root_id, best_payoff, best_child):
+    """
+    One solved tree (outputs of build_game_tree + backward_induction_spe or of
+    lazy_equilibrium_search) as arrays indexed by node id. Nodes without a value get NaN values
+    and best_child -1.
+    """
+    n = max(node_lookup) + 1
+    state = np.zeros(n, dtype=np.int64)
+    parent = np.full(n, -1, dtype=np.int64)
+    chosen = np.full(n, -1, dtype=np.int64)
+    value = np.full((n, 2), np.nan)
+    for nid, node in node_lookup.items():
+        state[nid] = node["state"]
+    for nid, children in game_tree.items():
+        parent[children] = nid
+    for nid, payoff in best_payoff.items():
+        value[nid] = payoff
+        if best_child.get(nid) is not None:
+            chosen[nid] = best_child[nid]
+    return {"root": root_id, "state": state, "parent": parent, "best_child": chosen, "value": value}
+
+
+class SharedSolutions:
+    """
+    Several solution_arrays in one shared-memory block, keyed by (player1_start, player2_start).
+    Node arrays are concatenated; solve i owns rows offsets[i]:offsets[i + 1] and its node ids
+    are local to that range.
+    """
+
+    def __init__(self, shared, keys):
+        self.shared = shared
+        self.keys = keys
+        self.index = {key: i for i, key in enumerate(keys)}
+        self.arrays = shared.arrays
+
+    @classmethod
+    def publish(cls, solutions, name=None):
+        """
+        solutions: {(player1_start, player2_start): solution_arrays(...)}
+        """
+        keys = list(solutions)
+        parts = [solutions[key] for key in keys]
+        offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+        np.cumsum([len(part["state"]) for part in parts], out=offsets[1:])
+        return cls(SharedArrays.publish({
+            "offsets": offsets,
+            "roots": np.array([part["root"] for part in parts], dtype=np.int64),
+            "state": np.concatenate([part["state"] for part in parts]),
+            "parent": np.concatenate([part["parent"] for part in parts]),
+            "best_child": np.concatenate([part["best_child"] for part in parts]),
+            "value": np.concatenate([part["value"] for part in parts]).reshape(-1, 2),
+        }, name), keys)
+
+    @classmethod
+    def attach(cls, descriptor):
+        shared_descriptor, keys = descriptor
+        return cls(SharedArrays.attach(shared_descriptor), keys)
+
+    @property
+    def descriptor(self):
+        return self.shared.descriptor, self.keys
+
+    def solve(self, player1_start, player2_start):
+        """
+        Zero-copy views {root, state, parent, best_child, value} of one solve.
+        """
+        i = self.index[(tuple(player1_start), tuple(player2_start))]
+        start, end = self.arrays["offsets"][i], self.arrays["offsets"][i + 1]
+        view = {field: self.arrays[field][start:end] for field in ("state", "parent", "best_child", "value")}
+        view["root"] = int(self.arrays["roots"][i])
+        return view
+
+    def root_value(self, player1_start, player2_start):
+        view = self.solve(player1_start, player2_start)
+        return tuple(float(v) for v in view["value"][view["root"]])
+
+    def close(self):
+        self.arrays = {}
+        self.shared.close()
+
+    def unlink(self):
+        self.shared.unlink()
+
+
+###############################################################################
+# Worker side
+###############################################################################
+_worker_tables = {}
+
+
+def attach_worker_tables(descriptors):
+    """
+    ProcessPoolExecutor initializer: attach {csv_file: SharedPathTable descriptor} once per
+    worker. strategies._path_probs and _solve_start then use the attached tables.
+    """
+    for csv_file, descriptor in descriptors.items():
+        _worker_tables[csv_file] = SharedPathTable.attach(descriptor)
+
+
+def worker_path_table(csv_file):
+    """
+    The table attached for csv_file in this worker, or None.
+    """
+    return _worker_tables.get(csv_file)
+
+
+def _solve_start(csv_file, player1_start, player2_start, max_moves):
+    from game import lazy_equilibrium_search
+
+    solution = lazy_equilibrium_search(player1_start, player2_start, max_moves=max_moves,
+                                       path_probs=worker_path_table(csv_file))
+    return solution_arrays(*solution)
+
+
+def solve_starts_in_pool(starts, csv_file="game_results.csv", max_moves=15, max_workers=None, path_probs=None):
+    """
+    Solve every (player1_start, player2_start) in starts with lazy_equilibrium_search in a
+    process pool. The Path -> prob table is published once and attached by every worker.
+    Returns {(player1_start, player2_start): solution_arrays}, ready for SharedSolutions.publish.
+    """
+    if path_probs is None:
+        from game import load_path_probabilities
+
+        path_probs = load_path_probabilities(csv_file)
+    table = SharedPathTable.publish(path_probs)
+    try:
+        with ProcessPoolExecutor(max_workers, initializer=attach_worker_tables,
+                                 initargs=({csv_file: table.descriptor},)) as executor:
+            futures = {
+                (tuple(p1), tuple(p2)): executor.submit(_solve_start, csv_file, p1, p2, max_moves)
+                for p1, p2 in starts
+            }
+            return {key: future.result() for key, future in futures.items()}
+    finally:
+        table.close()
+        table.unlink()
+
+
+if __name__ == "__main__":
+    import time
+    from tournament import all_starting_hands
+
+    start = time.perf_counter()
+    solutions = solve_starts_in_pool(all_starting_hands(), "game_results.csv", max_moves=15)
+    print(f"Solved {len(solutions)} starting pairs in a process pool in {time.perf_counter() - start:.1f}s")
+
+    shared = SharedSolutions.publish(solutions)
+    try:
+        print(f"Published {len(shared.arrays['state'])} solved nodes ({shared.shared.nbytes / 1e6:.1f} MB)")
+        print("(2,3) vs (5,0) root value:", shared.root_value((2, 3), (5, 0)))
+    finally:
+        shared.close()
+        shared.unlink()
@@ -1,19 +1,4 @@
-import random
-import pandas as pd
-
-# 定义获取所有可能移动的函数
-def get_possible_moves(player, true_cards, fake_cards, first_player_move):
-    moves = []
-    if true_cards > 0:
-        for count in range(1, true_cards + 1):
-            moves.append({"player": player, "type": "play_true", "count": count})
-    if fake_cards > 0:
-        for count in range(1, fake_cards + 1):
-            moves.append({"player": player, "type": "play_fake", "count": count})
-    if not first_player_move:
-        moves.append({"player": player, "type": "challenge"})
-    return moves
-
+import state_codec as codec
 
 
 # 格式化路径为字符串
@@ -23,15 +8,15 @@ def format_path(history, current_action):
         [f"Player {action['player']} {action['type']} {action.get('count', '')}".strip() for action in all_actions]
     )
 
-def update_probabilities_with_csv(possible_moves, history, data, current_player):
+# path_counts: csv_stream.load_path_counts 读出的 Path -> (P1_win, P2_win)
+def update_probabilities_with_csv(possible_moves, history, path_counts, current_player):
     all_equal_prob = True
     for move in possible_moves:
         path = format_path(history, move)
         if current_player == 1:
-            matched_row = data[data["Path"] == path]
-            if not matched_row.empty:
-                row4 = matched_row.iloc[0, 3]
-                row5 = matched_row.iloc[0, 4]
+            matched_row = path_counts.get(path)
+            if matched_row is not None:
+                row4, row5 = matched_row
                 probability = row5 / (row4 + row5) if (row4 + row5) > 0 else 0
                 move["probability"] = probability
                 if probability != 0.5:
@@ -43,18 +28,22 @@ def update_probabilities_with_csv(possible_moves, history, data, current_player)
     return all_equal_prob
 
 # 单局游戏模拟函数
-def single_game_simulation_with_probabilities(player1, player2, csv_file, max_moves=10):
-    # 加载CSV文件
-    data = pd.read_csv(csv_file)
+def single_game_simulation_with_probabilities(player1, player2, csv_file, max_moves=10, rng=None):
+    # 流式加载CSV文件(不需要 pandas)，推迟导入以加快启动
+    from csv_stream import load_path_counts
+    from rng_streams import python_rng
+
+    path_counts = load_path_counts(csv_file)
+    # rng: 种子、RandomStreams 或 random.Random；None 时使用全局 random 模块(不可复现)
+    rng = python_rng(rng)
 
+    # 局面用 state_codec 的整数编码表示，合法动作和子状态由 codec.successors 直接生成
+    state = codec.encode_state(1, player1, player2)
     history = []
-    current_player = 1
-    p1 = list(player1)
-    p2 = list(player2)
-    first_player_move = True
 
     for step in range(max_moves):
-        if p1[0] + p1[1] == 0 or p2[0] + p2[1] == 0:
+        current_player = codec.current_player(state)
+        if sum(codec.hand(state, 1)) == 0 or sum(codec.hand(state, 2)) == 0:
             # 必须进行挑战
             challenger = current_player
             last_action = history[-1] if history else None
@@ -67,16 +56,12 @@ def single_game_simulation_with_probabilities(player1, player2, csv_file, max_mo
                 "winner": winner
             }
 
-        if current_player == 1:
-            true_cards, fake_cards = p1
-        else:
-            true_cards, fake_cards = p2
-
-        # 获取可能的行动
-        possible_moves = get_possible_moves(current_player, true_cards, fake_cards, first_player_move)
+        # 获取可能的行动(顺序同 get_possible_moves，第一步不能挑战)
+        options = codec.successors(state)
+        possible_moves = [codec.move_to_action(current_player, move) for move, _ in options]
         
         # 更新行动概率
-        update_probabilities_with_csv(possible_moves, history, data, current_player)
+        update_probabilities_with_csv(possible_moves, history, path_counts, current_player)
 
         # 打印可能的行动及其概率
         print(f"\nStep {step + 1}: Player {current_player}'s possible actions:")
@@ -84,17 +69,16 @@ def single_game_simulation_with_probabilities(player1, player2, csv_file, max_mo
             print(f"  {move['type']} {move.get('count', '')}: {move['probability']:.4f}")
             path = format_path(history, move)
             # 在CSV中查找路径并打印第四列和第五列
-            matched_row = data[data["Path"] == path]
-            if not matched_row.empty:
-                fourth_col = matched_row.iloc[0, 3]
-                fifth_col = matched_row.iloc[0, 4]
+            matched_row = path_counts.get(path)
+            if matched_row is not None:
+                fourth_col, fifth_col = matched_row
                 print(f"    Matching path in CSV: {path}")
                 print(f"    Column 4: {fourth_col}, Column 5: {fifth_col}")
 
-        all_equal_prob = update_probabilities_with_csv(possible_moves, history, data, current_player)
+        all_equal_prob = update_probabilities_with_csv(possible_moves, history, path_counts, current_player)
         # 选择概率最大的行动
         if all_equal_prob:
-            selected_move = random.choice(possible_moves)
+            selected_move = rng.choice(possible_moves)
             print(f"Selected action randomly: {selected_move['type']} {selected_move.get('count', '')}")
         else:
             selected_move = min(possible_moves, key=lambda x: x["probability"])
@@ -102,27 +86,16 @@ def single_game_simulation_with_probabilities(player1, player2, csv_file, max_mo
         
         
 
-        if selected_move["type"] == "play_true":
-            true_cards -= selected_move["count"]
-        elif selected_move["type"] == "play_fake":
-            fake_cards -= selected_move["count"]
-        elif selected_move["type"] == "challenge":
-            challenge_success = history[-1]["type"] == "play_fake" if history else False
-            winner = current_player if challenge_success else 3 - current_player
+        child_state = options[possible_moves.index(selected_move)][1]
+        if codec.is_terminal(child_state):
             return {
                 "initial_state": (player1, player2),
                 "history": history + [selected_move],
-                "winner": winner
+                "winner": codec.challenge_winner(child_state)
             }
 
-        if current_player == 1:
-            p1 = [true_cards, fake_cards]
-        else:
-            p2 = [true_cards, fake_cards]
-
         history.append(selected_move)
-        current_player = 3 - current_player
-        first_player_move = False
+        state = child_state
 
     raise ValueError("游戏未以挑战结束。")
 
@@ -132,17 +105,18 @@ def format_history(history):
         [f"Player {action['player']} {action['type']} {action.get('count', '')}".strip() for action in history]
     )
 
-# 初始化游戏
-player1_start = (3, 2)  # 玩家1初始手牌
-player2_start = (2, 3)  # 玩家2初始手牌
+if __name__ == "__main__":
+    # 初始化游戏
+    player1_start = (3, 2)  # 玩家1初始手牌
+    player2_start = (2, 3)  # 玩家2初始手牌
 
-# CSV 文件路径
-csv_file = "game_results.csv"
+    # CSV 文件路径
+    csv_file = "game_results.csv"
 
-# 运行模拟
-outcome = single_game_simulation_with_probabilities(player1_start, player2_start, csv_file, max_moves=15)
+    # 运行模拟
+    outcome = single_game_simulation_with_probabilities(player1_start, player2_start, csv_file, max_moves=15, rng=0)
 
-# 输出格式化历史和胜者
-formatted_history = format_history(outcome["history"])
-print(f"\nGame History: {formatted_history}")
-print(f"Winner: Player {outcome['winner']}")
+    # 输出格式化历史和胜者
+    formatted_history = format_history(outcome["history"])
+    print(f"\nGame History: {formatted_history}")
+    print(f"Winner: Player {outcome['winner']}")
@@ -0,0 +1,235 @@
+"""
+Canonical integer encoding of a Liar's Bar game state.
+
+A state packs (current_player, p1 true/fake, p2 true/fake, last action type/count, step)
+into one Python int, so it can be used directly as a memo key or array index and
+successors can be generated with shifts and masks instead of copying tuples/dicts.
+
+Bit layout, from the least significant bit:
+    current_player   1 bit              (0 -> player 1, 1 -> player 2)
+    p1_true          CARD_BITS
+    p1_fake          CARD_BITS
+    p2_true          CARD_BITS
+    p2_fake          CARD_BITS
+    last_type        2 bits             (NO_ACTION / PLAY_TRUE / PLAY_FAKE / CHALLENGE)
+    last_count       CARD_BITS          (for CHALLENGE: 1 if the challenge succeeded, else 0)
+    step             STEP_BITS
+"""
+
+CARD_BITS = 6
+STEP_BITS = 10
+CARD_MASK = (1 << CARD_BITS) - 1
+STEP_MASK = (1 << STEP_BITS) - 1
+MAX_CARDS = CARD_MASK
+MAX_STEPS = STEP_MASK
+
+NO_ACTION = 0
+PLAY_TRUE = 1
+PLAY_FAKE = 2
+CHALLENGE = 3
+
+ACTION_NAMES = {PLAY_TRUE: "play_true", PLAY_FAKE: "play_fake", CHALLENGE: "challenge"}
+ACTION_CODES = {name: code for code, name in ACTION_NAMES.items()}
+
+P1_TRUE_SHIFT = 1
+P1_FAKE_SHIFT = P1_TRUE_SHIFT + CARD_BITS
+P2_TRUE_SHIFT = P1_FAKE_SHIFT + CARD_BITS
+P2_FAKE_SHIFT = P2_TRUE_SHIFT + CARD_BITS
+LAST_TYPE_SHIFT = P2_FAKE_SHIFT + CARD_BITS
+LAST_COUNT_SHIFT = LAST_TYPE_SHIFT + 2
+STEP_SHIFT = LAST_COUNT_SHIFT + CARD_BITS
+STATE_BITS = STEP_SHIFT + STEP_BITS
+
+# Everything except the last action and the step: (player, hands)
+POSITION_MASK = (1 << LAST_TYPE_SHIFT) - 1
+LAST_ACTION_MASK = ((1 << STEP_SHIFT) - 1) ^ POSITION_MASK
+STEP_ONE = 1 << STEP_SHIFT
+
+
+def encode_state(current_player, p1_hand, p2_hand, last_type=NO_ACTION, last_count=0, step=0):
+    """
+    Pack a game state into an int. Hands are (true_cards, fake_cards) tuples.
+    """
+    for cards in (*p1_hand, *p2_hand, last_count):
+        if not 0 <= cards <= MAX_CARDS:
+            raise ValueError(f"card count {cards} does not fit in {CARD_BITS} bits")
+    if not 0 <= step <= MAX_STEPS:
+        raise ValueError(f"step {step} does not fit in {STEP_BITS} bits")
+    return (
+        (current_player - 1)
+        | (p1_hand[0] << P1_TRUE_SHIFT)
+        | (p1_hand[1] << P1_FAKE_SHIFT)
+        | (p2_hand[0] << P2_TRUE_SHIFT)
+        | (p2_hand[1] << P2_FAKE_SHIFT)
+        | (last_type << LAST_TYPE_SHIFT)
+        | (last_count << LAST_COUNT_SHIFT)
+        | (step << STEP_SHIFT)
+    )
+
+
+def decode_state(state):
+    """
+    Inverse of encode_state:
+    returns (current_player, p1_hand, p2_hand, last_type, last_count, step).
+    """
+    return (
+        current_player(state),
+        ((state >> P1_TRUE_SHIFT) & CARD_MASK, (state >> P1_FAKE_SHIFT) & CARD_MASK),
+        ((state >> P2_TRUE_SHIFT) & CARD_MASK, (state >> P2_FAKE_SHIFT) & CARD_MASK),
+        (state >> LAST_TYPE_SHIFT) & 3,
+        (state >> LAST_COUNT_SHIFT) & CARD_MASK,
+        (state >> STEP_SHIFT) & STEP_MASK,
+    )
+
+
+def current_player(state):
+    return (state & 1) + 1
+
+
+def hand(state, player):
+    """
+    (true_cards, fake_cards) of the given player.
+    """
+    if player == 1:
+        return (state >> P1_TRUE_SHIFT) & CARD_MASK, (state >> P1_FAKE_SHIFT) & CARD_MASK
+    return (state >> P2_TRUE_SHIFT) & CARD_MASK, (state >> P2_FAKE_SHIFT) & CARD_MASK
+
+
+def last_action(state):
+    """
+    (last_type, last_count) of the action that led to this state.
+    """
+    return (state >> LAST_TYPE_SHIFT) & 3, (state >> LAST_COUNT_SHIFT) & CARD_MASK
+
+
+def step(state):
+    return (state >> STEP_SHIFT) & STEP_MASK
+
+
+def is_terminal(state):
+    return (state >> LAST_TYPE_SHIFT) & 3 == CHALLENGE
+
+
+def challenge_winner(state):
+    """
+    Winner of a terminal (challenge) state: the challenger if the challenge succeeded.
+    """
+    challenger = 2 - (state & 1)
+    return challenger if (state >> LAST_COUNT_SHIFT) & 1 else 3 - challenger
+
+
+def encode_move(move_type, count=0):
+    """
+    Moves are small ints too: type in the high bits, count in the low CARD_BITS.
+    """
+    return (move_type << CARD_BITS) | count
+
+
+def decode_move(move):
+    return move >> CARD_BITS, move & CARD_MASK
+
+
+def move_to_action(player, move):
+    """
+    Convert a move code to the action dict used by the tree builders and simulators,
+    e.g. {"player": 1, "type": "play_true", "count": 2} or {"player": 2, "type": "challenge"}.
+    """
+    move_type, count = decode_move(move)
+    if move_type == CHALLENGE:
+        return {"player": player, "type": "challenge"}
+    return {"player": player, "type": ACTION_NAMES[move_type], "count": count}
+
+
+def action_to_move(action):
+    return encode_move(ACTION_CODES[action["type"]], action.get("count", 0))
+
+
+def successors(state, forced_when_any_empty=False):
+    """
+    All (move, child_state) pairs of a non-terminal state, in the same order as
+    get_possible_moves: play_true 1..t, play_fake 1..f, then challenge (not on the first step).
+
+    A player with no cards left is forced to challenge (game.py / bayes.py rules).
+    With forced_when_any_empty=True the challenge is forced as soon as either player
+    is out of cards, which is the rule used by the "all state.py" enumerator.
+    """
+    player_bit = state & 1
+    true_shift = P2_TRUE_SHIFT if player_bit else P1_TRUE_SHIFT
+    fake_shift = P2_FAKE_SHIFT if player_bit else P1_FAKE_SHIFT
+    true_cards = (state >> true_shift) & CARD_MASK
+    fake_cards = (state >> fake_shift) & CARD_MASK
+
+    # Common part of every child: switch player, clear last action, advance step
+    base = ((state & POSITION_MASK) ^ 1) + (state & ~POSITION_MASK & ~LAST_ACTION_MASK) + STEP_ONE
+
+    success = 1 if (state >> LAST_TYPE_SHIFT) & 3 == PLAY_FAKE else 0
+    challenge = (
+        encode_move(CHALLENGE),
+        base | (CHALLENGE << LAST_TYPE_SHIFT) | (success << LAST_COUNT_SHIFT),
+    )
+
+    if forced_when_any_empty:
+        out_of_cards = (state >> P1_TRUE_SHIFT) & CARD_MASK == 0 and (state >> P1_FAKE_SHIFT) & CARD_MASK == 0
+        out_of_cards = out_of_cards or ((state >> P2_TRUE_SHIFT) & CARD_MASK == 0
+                                        and (state >> P2_FAKE_SHIFT) & CARD_MASK == 0)
+    else:
+        out_of_cards = true_cards + fake_cards == 0
+    if out_of_cards:
+        return [challenge]
+
+    children = []
+    for count in range(1, true_cards + 1):
+        children.append((
+            (PLAY_TRUE << CARD_BITS) | count,
+            base - (count << true_shift) | (PLAY_TRUE << LAST_TYPE_SHIFT) | (count << LAST_COUNT_SHIFT),
+        ))
+    for count in range(1, fake_cards + 1):
+        children.append((
+            (PLAY_FAKE << CARD_BITS) | count,
+            base - (count << fake_shift) | (PLAY_FAKE << LAST_TYPE_SHIFT) | (count << LAST_COUNT_SHIFT),
+        ))
+    if (state >> STEP_SHIFT) & STEP_MASK > 0:
+        children.append(challenge)
+    return children
+
+
+# Set in memo keys in place of the step (see canonical_state); above every state bit
+HORIZON_FREE = 1 << STATE_BITS
+
+
+def remaining_cards(state):
+    return (
+        ((state >> P1_TRUE_SHIFT) & CARD_MASK) + ((state >> P1_FAKE_SHIFT) & CARD_MASK)
+        + ((state >> P2_TRUE_SHIFT) & CARD_MASK) + ((state >> P2_FAKE_SHIFT) & CARD_MASK)
+    )
+
+
+def canonical_state(state, horizon=None):
+    """
+    Representative of a non-terminal state under the symmetries of the rules, for memo keys.
+
+    - Step: the step only matters for the first move (no challenge at step 0) and for a depth
+      cut-off. horizon is the last step at which the caller still expands a non-terminal state.
+      Every play removes at least one card, so no non-terminal descendant is deeper than
+      step + remaining_cards. When that is within the horizon the cut-off cannot bind, and the
+      step is replaced by the HORIZON_FREE flag. Without a horizon the step is kept.
+    - Player roles: the rules do not depend on the seat, so a state with player 2 to move is
+      equivalent to the same state with the seats (and hands) exchanged and player 1 to move.
+      While the step is in the key its parity already fixes the seat, so this only merges
+      positions once the step has been dropped.
+    - Count of the last play: only its type decides a challenge, so last_count is dropped.
+
+    Returns (canonical_state, swapped). Values of the canonical state are from the point of view
+    of the player to move; when swapped is True, "player 1" in them is player 2 of state.
+    """
+    state &= ~(CARD_MASK << LAST_COUNT_SHIFT)
+    if horizon is not None:
+        steps = (state >> STEP_SHIFT) & STEP_MASK
+        if steps > 0 and steps + remaining_cards(state) <= horizon:
+            state = (state & ~(STEP_MASK << STEP_SHIFT)) | HORIZON_FREE
+    if not state & 1:
+        return state, False
+    p1_bits = state & (((1 << (2 * CARD_BITS)) - 1) << P1_TRUE_SHIFT)
+    p2_bits = state & (((1 << (2 * CARD_BITS)) - 1) << P2_TRUE_SHIFT)
+    rest = state & ~POSITION_MASK
+    return rest | (p2_bits >> (2 * CARD_BITS)) | (p1_bits << (2 * CARD_BITS)), True
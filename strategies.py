@@ -0,0 +1,319 @@
+"""
+Strategies behind a common choose_move(state) interface.
+
+A decision state is a dict:
+    {
+        "player": 1 or 2,                    # seat that has to move
+        "state": int,                        # state_codec encoding (both hands, last action, step)
+        "history": [action, ...],            # action dicts, as in game.py
+        "legal_moves": [action, ...],        # in get_possible_moves order
+        "player1_start": (true, fake),
+        "player2_start": (true, fake),
+        "rng": random.Random,                # per-match random stream
+        "history_key": str,                  # optional, history_key(history) if the caller tracks it
+    }
+and choose_move returns one of state["legal_moves"].
+
+choose_moves(states) is the batched form: simulators and tournaments advance many games in
+lockstep and make one call per strategy per step. The adapters below cache their decision per
+decision point (state int + history path), so games that share a decision point are only
+scored once, in this batch and in every later one.
+
+Strategies that need expensive precomputation (solving trees) describe it with
+prepare_job(key) -> (function, args); the tournament runs that in a process pool
+and hands the picklable result back through install(key, result). choose_move itself
+must stay cheap, because it is called on the event loop.
+"""
+import state_codec as codec
+from bayes import bayesian_best_move_over_types
+from csv_stream import load_path_counts
+from game import format_path, lazy_equilibrium_search, load_path_probabilities
+
+
+def history_key(history):
+    """
+    The CSV path of a history, "" for the root (same format as game.format_path).
+    """
+    if not history:
+        return ""
+    return format_path(history[:-1], history[-1])
+
+
+def state_history_key(state):
+    key = state.get("history_key")
+    return key if key is not None else history_key(state["history"])
+
+
+class Strategy:
+    """
+    Base class. Subclasses set name and implement choose_move.
+    """
+    name = "strategy"
+
+    def prepare_key(self, state):
+        """
+        Key of the precomputation a match needs, or None if the strategy needs none.
+        """
+        return None
+
+    def prepare_job(self, key):
+        raise NotImplementedError
+
+    def install(self, key, result):
+        raise NotImplementedError
+
+    def is_prepared(self, key):
+        return True
+
+    def choose_move(self, state):
+        raise NotImplementedError
+
+    def choose_moves(self, states):
+        """
+        Batched choose_move, one result per state.
+        """
+        return [self.choose_move(state) for state in states]
+
+
+class CachedDecisionStrategy(Strategy):
+    """
+    Base class for deterministic policies: subclasses implement decide(state), returning the
+    index of the chosen legal move (or None to pick uniformly at random with state["rng"]),
+    and decision_key(state), which must identify everything decide depends on.
+    """
+
+    def __init__(self):
+        self._decisions = {}
+
+    def decision_key(self, state):
+        return (state["state"], state_history_key(state))
+
+    def decide(self, state):
+        raise NotImplementedError
+
+    def choose_move(self, state):
+        return self.choose_moves([state])[0]
+
+    def choose_moves(self, states):
+        decisions = self._decisions
+        moves = []
+        for state in states:
+            key = self.decision_key(state)
+            if key not in decisions:
+                decisions[key] = self.decide(state)
+            index = decisions[key]
+            if index is None:
+                moves.append(state["rng"].choice(state["legal_moves"]))
+            else:
+                moves.append(state["legal_moves"][index])
+        return moves
+
+
+class RandomStrategy(Strategy):
+    """
+    Uniform random play, the baseline of random_path_from_root_to_leaf.
+    """
+    name = "random"
+
+    def choose_move(self, state):
+        return state["rng"].choice(state["legal_moves"])
+
+
+class CsvPolicyStrategy(CachedDecisionStrategy):
+    """
+    The policy of simulation.single_game_simulation_with_probabilities: score every legal move
+    by the opponent's win share on its CSV path and play the lowest; if no scored move differs
+    from 0.5, play uniformly at random. Moves without a CSV row score 0, as in
+    update_probabilities_with_csv. simulation.py only scores for player 1 (player 2 plays
+    randomly); here the same rule is applied from whichever seat the strategy occupies.
+    """
+    name = "csv_policy"
+
+    def __init__(self, csv_file="game_results.csv", path_counts=None):
+        super().__init__()
+        self.path_counts = path_counts if path_counts is not None else load_path_counts(csv_file)
+
+    def move_scores(self, state):
+        """
+        (scores, all_equal_prob) for state["legal_moves"].
+        """
+        scores = []
+        all_equal_prob = True
+        opponent_index = 2 - state["player"]
+        for move in state["legal_moves"]:
+            counts = self.path_counts.get(format_path(state["history"], move))
+            if counts is None:
+                scores.append(0)
+                continue
+            total = counts[0] + counts[1]
+            probability = counts[opponent_index] / total if total > 0 else 0
+            scores.append(probability)
+            if probability != 0.5:
+                all_equal_prob = False
+        return scores, all_equal_prob
+
+    def decide(self, state):
+        scores, all_equal_prob = self.move_scores(state)
+        if all_equal_prob:
+            return None
+        return min(range(len(scores)), key=lambda i: scores[i])
+
+
+###############################################################################
+# Tree-solving strategies; the solvers run in worker processes
+###############################################################################
+_worker_path_probs = {}
+
+
+def _path_probs(csv_file):
+    # Loaded once per worker process and reused by every job it runs, unless the parent
+    # published the table in shared memory (Tournament(share_tables=True))
+    from shared_tables import worker_path_table
+
+    table = worker_path_table(csv_file)
+    if table is not None:
+        return table
+    if csv_file not in _worker_path_probs:
+        _worker_path_probs[csv_file] = load_path_probabilities(csv_file)
+    return _worker_path_probs[csv_file]
+
+
+def _decision_values(game_tree, node_lookup, best_payoff, player):
+    """
+    {history_key: {move: payoff of player after that move}} for every node where player moves.
+    """
+    values = {}
+    for nid, children in game_tree.items():
+        node = node_lookup[nid]
+        if not children or node["current_player"] != player:
+            continue
+        key = history_key(node["history"])
+        values[key] = {
+            codec.action_to_move(node_lookup[cid]["history"][-1]): best_payoff[cid][player - 1]
+            for cid in children
+        }
+    return values
+
+
+def solve_spe_policy(csv_file, max_moves, player1_start, player2_start):
+    """
+    SPE policy of game.backward_induction_spe as {history_key: best move} (move codes).
+    """
+    game_tree, node_lookup, root_id, best_payoff, best_child = lazy_equilibrium_search(
+        player1_start, player2_start, max_moves=max_moves, path_probs=_path_probs(csv_file)
+    )
+    policy = {}
+    for nid, cid in best_child.items():
+        if cid is not None:
+            policy[history_key(node_lookup[nid]["history"])] = codec.action_to_move(node_lookup[cid]["history"][-1])
+    return policy
+
+
+def solve_bayes_values(csv_file, max_moves, own_hand, seat, opponent_hands):
+    """
+    One complete-information tree per opponent type, as in bayes.py's __main__;
+    returns the per-type decision values of seat.
+    """
+    type_values = []
+    for opponent_hand in opponent_hands:
+        if seat == 1:
+            player1_start, player2_start = own_hand, opponent_hand
+        else:
+            player1_start, player2_start = opponent_hand, own_hand
+        game_tree, node_lookup, _, best_payoff, _ = lazy_equilibrium_search(
+            player1_start, player2_start, max_moves=max_moves, path_probs=_path_probs(csv_file)
+        )
+        type_values.append(_decision_values(game_tree, node_lookup, best_payoff, seat))
+    return type_values
+
+
+def _legal_index(legal_moves, move):
+    # Index of a move code among the legal action dicts, first legal move if it is missing
+    for index, action in enumerate(legal_moves):
+        if codec.action_to_move(action) == move:
+            return index
+    return 0
+
+
+class SpeStrategy(CachedDecisionStrategy):
+    """
+    Plays best_child of the complete-information SPE for the actual starting hands.
+    """
+    name = "spe"
+
+    def __init__(self, csv_file="game_results.csv", max_moves=15):
+        super().__init__()
+        self.csv_file = csv_file
+        self.max_moves = max_moves
+        self.policies = {}
+
+    def prepare_key(self, state):
+        return (state["player1_start"], state["player2_start"])
+
+    def prepare_job(self, key):
+        return solve_spe_policy, (self.csv_file, self.max_moves, key[0], key[1])
+
+    def install(self, key, result):
+        self.policies[key] = result
+
+    def is_prepared(self, key):
+        return key in self.policies
+
+    def decision_key(self, state):
+        return (self.prepare_key(state), state_history_key(state))
+
+    def decide(self, state):
+        policy = self.policies[self.prepare_key(state)]
+        move = policy.get(state_history_key(state))
+        return 0 if move is None else _legal_index(state["legal_moves"], move)
+
+
+class BayesianStrategy(CachedDecisionStrategy):
+    """
+    The agent of bayes.py: knows only its own hand, solves one complete-information tree per
+    opponent type and plays argmax of the prior-weighted payoff (bayesian_best_move_over_types).
+    Types whose tree cannot contain the observed history are dropped and the remaining
+    priors renormalised. By default the opponent may hold any (k, hand_size - k) split.
+    """
+    name = "bayesian"
+
+    def __init__(self, csv_file="game_results.csv", max_moves=15, opponent_types=None, hand_size=5):
+        super().__init__()
+        self.csv_file = csv_file
+        self.max_moves = max_moves
+        if opponent_types is None:
+            opponent_types = [((t, hand_size - t), 1.0 / (hand_size + 1)) for t in range(hand_size + 1)]
+        self.opponent_types = opponent_types
+        self.type_values = {}
+
+    def prepare_key(self, state):
+        seat = state["player"]
+        own_hand = state["player1_start"] if seat == 1 else state["player2_start"]
+        return (own_hand, seat)
+
+    def prepare_job(self, key):
+        opponent_hands = [hand for hand, _ in self.opponent_types]
+        return solve_bayes_values, (self.csv_file, self.max_moves, key[0], key[1], opponent_hands)
+
+    def install(self, key, result):
+        self.type_values[key] = result
+
+    def is_prepared(self, key):
+        return key in self.type_values
+
+    def decision_key(self, state):
+        return (self.prepare_key(state), state_history_key(state))
+
+    def decide(self, state):
+        key = state_history_key(state)
+        move_values = []
+        priors = []
+        for (_, prior), values in zip(self.opponent_types, self.type_values[self.prepare_key(state)]):
+            if key in values:
+                move_values.append(values[key])
+                priors.append(prior)
+        if not priors:
+            return None
+        total = sum(priors)
+        best_move, _ = bayesian_best_move_over_types(move_values, [prior / total for prior in priors])
+        return 0 if best_move is None else _legal_index(state["legal_moves"], best_move)
@@ -0,0 +1,233 @@
+"""
+Compact, indexed export of solved strategies (SQLite).
+
+One database holds any number of solves (starting pair + max_moves). Every node of a solved tree
+is one row of
+
+    nodes(solve_id, node, parent, move, state, best_child, value_p1, value_p2)
+
+where node is the node's BFS index (0 = root), move is the state_codec move code that leads to it,
+state its state_codec encoding and best_child the BFS index of the child chosen by the solver
+(NULL at leaves). Histories are not stored: they are recovered from the parent links.
+
+Indexes on (solve_id, state) and (solve_id, parent, move) make lookups by state or by history
+touch only the rows they return, so a dashboard can query single decisions without loading a
+whole solution.
+"""
+import sqlite3
+from collections import deque
+
+import state_codec as codec
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS solves (
+    solve_id INTEGER PRIMARY KEY,
+    player1_start TEXT NOT NULL,
+    player2_start TEXT NOT NULL,
+    max_moves INTEGER NOT NULL,
+    source TEXT,
+    root_value_p1 REAL,
+    root_value_p2 REAL,
+    UNIQUE (player1_start, player2_start, max_moves)
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    solve_id INTEGER NOT NULL,
+    node INTEGER NOT NULL,
+    parent INTEGER,
+    move INTEGER,
+    state INTEGER NOT NULL,
+    best_child INTEGER,
+    value_p1 REAL NOT NULL,
+    value_p2 REAL NOT NULL,
+    PRIMARY KEY (solve_id, node)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS nodes_by_state ON nodes (solve_id, state);
+CREATE INDEX IF NOT EXISTS nodes_by_move ON nodes (solve_id, parent, move);
+"""
+
+
+def _hand_text(hand):
+    return f"({hand[0]},{hand[1]})"
+
+
+def connect(db_file, read_only=False):
+    if read_only:
+        return sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    conn = sqlite3.connect(db_file)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def export_solution(conn, player1_start, player2_start, max_moves, game_tree, node_lookup, root_id,
+                    best_payoff, best_child, source=None):
+    """
+    Write one solved tree (the outputs of build_game_tree + backward_induction_spe or of
+    lazy_equilibrium_search). An earlier export of the same starting pair and max_moves is
+    replaced. Returns the solve_id.
+    """
+    p1_text, p2_text = _hand_text(player1_start), _hand_text(player2_start)
+    with conn:
+        conn.execute("DELETE FROM nodes WHERE solve_id IN (SELECT solve_id FROM solves "
+                     "WHERE player1_start = ? AND player2_start = ? AND max_moves = ?)",
+                     (p1_text, p2_text, max_moves))
+        conn.execute("DELETE FROM solves WHERE player1_start = ? AND player2_start = ? AND max_moves = ?",
+                     (p1_text, p2_text, max_moves))
+        root_value = best_payoff[root_id]
+        solve_id = conn.execute(
+            "INSERT INTO solves (player1_start, player2_start, max_moves, source, root_value_p1, root_value_p2) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (p1_text, p2_text, max_moves, source, root_value[0], root_value[1]),
+        ).lastrowid
+
+        # BFS numbering, children in game_tree order
+        index_of = {root_id: 0}
+        order = [root_id]
+        queue = deque([root_id])
+        while queue:
+            nid = queue.popleft()
+            for cid in game_tree.get(nid, ()):
+                index_of[cid] = len(order)
+                order.append(cid)
+                queue.append(cid)
+
+        def rows():
+            parent_of = {cid: nid for nid in order for cid in game_tree.get(nid, ())}
+            for nid in order:
+                node = node_lookup[nid]
+                parent = parent_of.get(nid)
+                chosen = best_child.get(nid)
+                yield (
+                    solve_id,
+                    index_of[nid],
+                    None if parent is None else index_of[parent],
+                    None if parent is None else codec.action_to_move(node["history"][-1]),
+                    node["state"],
+                    None if chosen is None else index_of[chosen],
+                    best_payoff[nid][0],
+                    best_payoff[nid][1],
+                )
+
+        conn.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows())
+    return solve_id
+
+
+###############################################################################
+# Point lookups
+###############################################################################
+def find_solve(conn, player1_start, player2_start, max_moves=15):
+    row = conn.execute(
+        "SELECT solve_id FROM solves WHERE player1_start = ? AND player2_start = ? AND max_moves = ?",
+        (_hand_text(player1_start), _hand_text(player2_start), max_moves),
+    ).fetchone()
+    if row is None:
+        raise KeyError(f"no solve for {player1_start} vs {player2_start} with max_moves={max_moves}")
+    return row[0]
+
+
+def _history(conn, solve_id, node):
+    # Walk the parent links back to the root
+    actions = []
+    while True:
+        parent, move, state = conn.execute(
+            "SELECT parent, move, state FROM nodes WHERE solve_id = ? AND node = ?", (solve_id, node)
+        ).fetchone()
+        if parent is None:
+            return actions[::-1]
+        # the mover of this edge is the player who is not to move in the child
+        actions.append(codec.move_to_action(3 - codec.current_player(state), move))
+        node = parent
+
+
+def _decision(conn, solve_id, row):
+    node, state, best_child, value_p1, value_p2 = row
+    best_action = None
+    if best_child is not None:
+        (move,) = conn.execute(
+            "SELECT move FROM nodes WHERE solve_id = ? AND node = ?", (solve_id, best_child)
+        ).fetchone()
+        best_action = codec.move_to_action(codec.current_player(state), move)
+    return {
+        "node": node,
+        "state": state,
+        "history": _history(conn, solve_id, node),
+        "best_action": best_action,
+        "value": (value_p1, value_p2),
+    }
+
+
+def lookup_state(conn, player1_start, player2_start, state, max_moves=15):
+    """
+    Every node of the solve with the given state int (several histories can reach the same
+    state), as dicts {node, state, history, best_action, value}.
+    """
+    solve_id = find_solve(conn, player1_start, player2_start, max_moves)
+    rows = conn.execute(
+        "SELECT node, state, best_child, value_p1, value_p2 FROM nodes WHERE solve_id = ? AND state = ?",
+        (solve_id, state),
+    ).fetchall()
+    return [_decision(conn, solve_id, row) for row in rows]
+
+
+def lookup_history(conn, player1_start, player2_start, history, max_moves=15):
+    """
+    The node reached by a history of action dicts, or None if the solve does not contain it.
+    """
+    solve_id = find_solve(conn, player1_start, player2_start, max_moves)
+    node = 0
+    for action in history:
+        row = conn.execute(
+            "SELECT node FROM nodes WHERE solve_id = ? AND parent = ? AND move = ?",
+            (solve_id, node, codec.action_to_move(action)),
+        ).fetchone()
+        if row is None:
+            return None
+        node = row[0]
+    row = conn.execute(
+        "SELECT node, state, best_child, value_p1, value_p2 FROM nodes WHERE solve_id = ? AND node = ?",
+        (solve_id, node),
+    ).fetchone()
+    return _decision(conn, solve_id, row)
+
+
+def equilibrium_path(conn, player1_start, player2_start, max_moves=15):
+    """
+    [(action, value after it)] along best_child from the root.
+    """
+    solve_id = find_solve(conn, player1_start, player2_start, max_moves)
+    path = []
+    node = 0
+    while True:
+        state, best_child = conn.execute(
+            "SELECT state, best_child FROM nodes WHERE solve_id = ? AND node = ?", (solve_id, node)
+        ).fetchone()
+        if best_child is None:
+            return path
+        move, value_p1, value_p2 = conn.execute(
+            "SELECT move, value_p1, value_p2 FROM nodes WHERE solve_id = ? AND node = ?", (solve_id, best_child)
+        ).fetchone()
+        path.append((codec.move_to_action(codec.current_player(state), move), (value_p1, value_p2)))
+        node = best_child
+
+
+if __name__ == "__main__":
+    import os
+    import time
+    from game import format_path, lazy_equilibrium_search, load_path_probabilities
+    from tournament import all_starting_hands
+
+    csv_file = "game_results.csv"
+    db_file = "strategies.sqlite"
+    conn = connect(db_file)
+    start = time.perf_counter()
+    for player1_start, player2_start in all_starting_hands():
+        path_probs = load_path_probabilities(csv_file, start=(player1_start, player2_start))
+        solution = lazy_equilibrium_search(player1_start, player2_start, max_moves=15, path_probs=path_probs)
+        export_solution(conn, player1_start, player2_start, 15, *solution, source=csv_file)
+    print(f"Exported 36 solves to {db_file} ({os.path.getsize(db_file) / 1e6:.1f} MB) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    conn = connect(db_file, read_only=True)
+    for action, value in equilibrium_path(conn, (2, 3), (5, 0)):
+        print(" ", format_path([], action), value)
+    root = lookup_history(conn, (2, 3), (5, 0), [])
+    print("Root decision:", root["best_action"], root["value"])
@@ -0,0 +1,289 @@
+"""
+Asyncio tournament for pitting strategies (strategies.py) against each other.
+
+Matches are played with the game.py tree rules on integer states (state_codec):
+a player with no cards left must challenge, challenges are allowed after the first move,
+and a match that reaches max_moves without a challenge is a draw.
+
+Round-robin matches are played in lockstep batches (one choose_moves call per strategy
+per step) and batches run concurrently on the event loop; solver precomputation
+(SPE / per-type Bayesian trees) is offloaded to a process pool and shared by every
+match that needs the same starting hands; the pool workers read the path table from
+shared memory (shared_tables) rather than each loading the CSV. Results are streamed
+as they finish, either from Tournament.run_round_robin (an async generator) or over a local
+JSON-lines TCP service (serve).
+"""
+import asyncio
+import itertools
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import state_codec as codec
+from deck import HAND_SIZE, starting_hands
+from game import format_path, load_path_probabilities
+from rng_streams import RandomStreams
+from shared_tables import SharedPathTable, attach_worker_tables
+
+
+def all_starting_hands(hand_size=HAND_SIZE, deck=None):
+    """
+    The 36 (for 5-card hands) starting pairs of find_all_game_outcomes (see deck.starting_hands).
+    """
+    return starting_hands(hand_size, deck)
+
+
+class Tournament:
+    def __init__(self, max_moves=15, max_workers=None, concurrency=64, seed=0, share_tables=True):
+        self.max_moves = max_moves
+        self.max_workers = max_workers
+        self.concurrency = concurrency
+        self.seed = seed
+        self.share_tables = share_tables
+        self.strategies = {}
+        self._pending = {}
+        self._executor = None
+
+    def register(self, strategy):
+        if strategy.name in self.strategies:
+            raise ValueError(f"strategy {strategy.name!r} is already registered")
+        self.strategies[strategy.name] = strategy
+
+    async def _prepare(self, strategy, key):
+        if key is None or strategy.is_prepared(key):
+            return
+        pending_key = (strategy.name, key)
+        if pending_key not in self._pending:
+            function, args = strategy.prepare_job(key)
+            loop = asyncio.get_running_loop()
+            self._pending[pending_key] = loop.run_in_executor(self._executor, function, *args)
+        result = await self._pending[pending_key]
+        if not strategy.is_prepared(key):
+            strategy.install(key, result)
+
+    async def play_match(self, strategy1, strategy2, player1_start, player2_start, rng):
+        """
+        Play one match, strategy1 as player 1. Returns the result dict.
+        """
+        results = await self.play_batch([(strategy1, strategy2, player1_start, player2_start, rng)])
+        return results[0]
+
+    async def play_batch(self, matches):
+        """
+        Play many matches in lockstep. matches is a list of
+        (strategy1, strategy2, player1_start, player2_start, rng); on every step each strategy
+        gets a single choose_moves call covering all the games where it is to move.
+        Returns the result dicts in the order of matches.
+        """
+        for strategy1, strategy2, player1_start, player2_start, _ in matches:
+            for seat, strategy in ((1, strategy1), (2, strategy2)):
+                start = {"player": seat, "player1_start": player1_start, "player2_start": player2_start}
+                await self._prepare(strategy, strategy.prepare_key(start))
+
+        games = []
+        for strategy1, strategy2, player1_start, player2_start, rng in matches:
+            games.append({
+                "seats": {1: strategy1, 2: strategy2},
+                "player1_start": player1_start,
+                "player2_start": player2_start,
+                "rng": rng,
+                "state": codec.encode_state(1, player1_start, player2_start),
+                "history": [],
+                "history_key": "",
+                "winner": None,
+            })
+
+        active = games
+        while active:
+            by_strategy = {}
+            for game in active:
+                if codec.step(game["state"]) >= self.max_moves:
+                    continue
+                player = codec.current_player(game["state"])
+                game["options"] = codec.successors(game["state"])
+                legal_moves = [codec.move_to_action(player, move) for move, _ in game["options"]]
+                decision = {
+                    "player": player,
+                    "state": game["state"],
+                    "history": game["history"],
+                    "history_key": game["history_key"],
+                    "legal_moves": legal_moves,
+                    "player1_start": game["player1_start"],
+                    "player2_start": game["player2_start"],
+                    "rng": game["rng"],
+                }
+                strategy = game["seats"][player]
+                by_strategy.setdefault(strategy.name, (strategy, []))[1].append((game, decision))
+
+            next_active = []
+            for strategy, group in by_strategy.values():
+                actions = strategy.choose_moves([decision for _, decision in group])
+                for (game, decision), action in zip(group, actions):
+                    game["state"] = game["options"][decision["legal_moves"].index(action)][1]
+                    game["history"] = game["history"] + [action]
+                    action_str = format_path([], action)
+                    game["history_key"] = f"{game['history_key']} -> {action_str}" if game["history_key"] else action_str
+                    if codec.is_terminal(game["state"]):
+                        game["winner"] = codec.challenge_winner(game["state"])
+                    else:
+                        next_active.append(game)
+            active = next_active
+            # let other batches run between steps
+            await asyncio.sleep(0)
+
+        return [
+            {
+                "player1": game["seats"][1].name,
+                "player2": game["seats"][2].name,
+                "player1_start": game["player1_start"],
+                "player2_start": game["player2_start"],
+                "winner": game["winner"],
+                "winner_name": game["seats"][game["winner"]].name if game["winner"] else None,
+                "moves": len(game["history"]),
+            }
+            for game in games
+        ]
+
+    def schedule(self, matches_per_pairing, names=None, hands=None):
+        """
+        Round-robin schedule: every unordered pair of strategies plays matches_per_pairing
+        matches, alternating seats and cycling through the starting hands.
+        Yields (match_index, name1, name2, player1_start, player2_start).
+        """
+        names = list(names or self.strategies)
+        hands = hands or all_starting_hands()
+        index = 0
+        for name_a, name_b in itertools.combinations(names, 2):
+            for i in range(matches_per_pairing):
+                player1_start, player2_start = hands[(i // 2) % len(hands)]
+                first, second = (name_a, name_b) if i % 2 == 0 else (name_b, name_a)
+                yield index, first, second, player1_start, player2_start
+                index += 1
+
+    async def run_round_robin(self, matches_per_pairing, names=None, hands=None, batch_size=256):
+        """
+        Async generator streaming one result dict per finished match.
+        Matches are played in lockstep batches of batch_size (see play_batch); batches run
+        concurrently. Each match has its own random stream RandomStreams(seed).game(match_index),
+        so results do not depend on batching or on how batches interleave.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        streams = RandomStreams(self.seed)
+
+        async def run(batch):
+            async with semaphore:
+                results = await self.play_batch([
+                    (self.strategies[name1], self.strategies[name2], player1_start, player2_start,
+                     streams.game(index).python())
+                    for index, name1, name2, player1_start, player2_start in batch
+                ])
+            for (index, *_), result in zip(batch, results):
+                result["match"] = index
+            return results
+
+        schedule = list(self.schedule(matches_per_pairing, names, hands))
+        tables = self._publish_tables(names)
+        try:
+            with ProcessPoolExecutor(self.max_workers, initializer=attach_worker_tables,
+                                     initargs=({f: t.descriptor for f, t in tables.items()},)) as executor:
+                self._executor = executor
+                tasks = [
+                    asyncio.ensure_future(run(schedule[i:i + batch_size]))
+                    for i in range(0, len(schedule), batch_size)
+                ]
+                try:
+                    for finished in asyncio.as_completed(tasks):
+                        for result in await finished:
+                            yield result
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                    self._executor = None
+                    self._pending.clear()
+        finally:
+            for table in tables.values():
+                table.close()
+                table.unlink()
+
+    def _publish_tables(self, names=None):
+        """
+        With share_tables, load the path table of every CSV used by the solver strategies once
+        here and publish it in shared memory, so pool workers attach to it instead of each
+        reading and indexing the CSV (see shared_tables).
+        """
+        if not self.share_tables:
+            return {}
+        csv_files = {getattr(self.strategies[name], "csv_file", None) for name in (names or self.strategies)}
+        return {
+            csv_file: SharedPathTable.publish(load_path_probabilities(csv_file))
+            for csv_file in csv_files if csv_file is not None
+        }
+
+
+def summarize(results):
+    """
+    Per ordered-by-name pairing: wins of each side, draws and win rates.
+    """
+    summary = {}
+    for result in results:
+        name_a, name_b = sorted((result["player1"], result["player2"]))
+        entry = summary.setdefault(f"{name_a} vs {name_b}", {name_a: 0, name_b: 0, "draws": 0, "matches": 0})
+        entry["matches"] += 1
+        if result["winner_name"] is None:
+            entry["draws"] += 1
+        else:
+            entry[result["winner_name"]] += 1
+    for pairing, entry in summary.items():
+        name_a, name_b = pairing.split(" vs ")
+        entry["win_rate"] = {name: entry[name] / entry["matches"] for name in (name_a, name_b)}
+    return summary
+
+
+###############################################################################
+# Local JSON-lines service
+###############################################################################
+async def serve(tournament, host="127.0.0.1", port=8765):
+    """
+    Every request is one JSON line, e.g. {"matches_per_pairing": 1000, "strategies": ["spe", "bayesian"]}.
+    The server streams one JSON line per finished match and finishes with {"summary": {...}}.
+    Requests are handled one at a time so they share the tournament's solved caches.
+    """
+    lock = asyncio.Lock()
+
+    async def handle(reader, writer):
+        try:
+            while line := await reader.readline():
+                request = json.loads(line)
+                async with lock:
+                    results = []
+                    async for result in tournament.run_round_robin(
+                        request.get("matches_per_pairing", 100), request.get("strategies")
+                    ):
+                        results.append(result)
+                        writer.write((json.dumps(result) + "\n").encode())
+                        await writer.drain()
+                    writer.write((json.dumps({"summary": summarize(results)}) + "\n").encode())
+                    await writer.drain()
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+async def _main(matches_per_pairing, csv_file):
+    from strategies import BayesianStrategy, CsvPolicyStrategy, RandomStrategy, SpeStrategy
+
+    tournament = Tournament()
+    for strategy in (CsvPolicyStrategy(csv_file), SpeStrategy(csv_file), BayesianStrategy(csv_file), RandomStrategy()):
+        tournament.register(strategy)
+
+    results = []
+    async for result in tournament.run_round_robin(matches_per_pairing):
+        results.append(result)
+    for pairing, entry in summarize(results).items():
+        print(pairing, entry)
+
+
+if __name__ == "__main__":
+    asyncio.run(_main(matches_per_pairing=1000, csv_file="game_results.csv"))